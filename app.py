@@ -1,833 +1,1556 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-import gspread
-from google.oauth2.service_account import Credentials
-import json
-
-st.set_page_config(page_title="量化雷達 雙彩種切換版", layout="wide")
-
-# ==========================================
-# 📝 側邊欄：彩種切換開關
-# ==========================================
-st.sidebar.title("🎲 選擇分析彩種")
-game_choice = st.sidebar.radio("目前分析目標：", ["539", "天天樂"])
-
-if st.sidebar.button("🔄 強制同步雲端資料庫"):
-    st.cache_data.clear()
-    st.rerun()
-
-st.sidebar.markdown("---")
-
-# ==========================================
-# ⚙️ 核心演算法參數微調
-# ==========================================
-st.sidebar.header("⚙️ 演算法參數微調")
-death_sea_gap = st.sidebar.slider(
-    "💀 死亡之海斷層間距", 
-    min_value=4, max_value=12, value=7, step=1, 
-    help="當兩個號碼間隔大於此數值，視為死亡之海。"
-)
-include_repeat = st.sidebar.checkbox(
-    "♻️ 包含連莊號 (解除封印)", 
-    value=True, 
-    help="勾選後保留昨日號碼在動能觀察池；取消則視為全殺棄子。"
-)
-
-st.sidebar.markdown("---")
-
-# ==========================================
-# 🚀 突破號 & 殺牌 (冷轉熱) 參數微調
-# ==========================================
-st.sidebar.header("🚀 突破與殺牌參數微調")
-breakout_long_period = st.sidebar.number_input(
-    "🔭 長線觀察期數 (近 N 期)", 
-    min_value=30, max_value=300, value=100, step=10
-)
-breakout_long_thresh = st.sidebar.number_input(
-    f"📉 長線冷門標準 (近 {breakout_long_period} 期開出 ≤)", 
-    min_value=1, max_value=50, value=12, step=1
-)
-st.sidebar.markdown("---")
-breakout_short_period = st.sidebar.number_input(
-    "🔍 短線觀察期數 (近 N 期)", 
-    min_value=5, max_value=50, value=20, step=1
-)
-breakout_short_thresh = st.sidebar.number_input(
-    f"📈 短線爆發標準 (近 {breakout_short_period} 期開出 ≥)", 
-    min_value=1, max_value=15, value=3, step=1
-)
-
-st.sidebar.markdown("---")
-
-# ==========================================
-# 🔗 連接 Google Sheets 資料庫
-# ==========================================
-def get_google_sheet(sheet_name):
-    scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    creds_dict = json.loads(st.secrets["gcp_json"])
-    creds = Credentials.from_service_account_info(creds_dict, scopes=scopes)
-    client = gspread.authorize(creds)
-    doc = client.open_by_url("https://docs.google.com/spreadsheets/d/1PrG36Oebngqhm7DrhEUNpfTtSk8k50jdAo2069aBJw8/edit?gid=978302798#gid=978302798")
-    return doc.worksheet(sheet_name)
-
-@st.cache_data(ttl=600)
-def load_data(game_name):
-    sheet = get_google_sheet(game_name)
-    data = sheet.get_all_records()
-    df = pd.DataFrame(data)
-    
-    if df.empty:
-        return pd.DataFrame(columns=['Date', 'Issue', 'N1', 'N2', 'N3', 'N4', 'N5'])
-        
-    rename_dict = {
-        'Date (開獎日期)': 'Date', 'Issue (期數)': 'Issue',
-        'N1 (號碼1)': 'N1', 'N2 (號碼2)': 'N2', 'N3 (號碼3)': 'N3',
-        'N4 (號碼4)': 'N4', 'N5 (號碼5)': 'N5'
-    }
-    df = df.rename(columns=rename_dict)
-    df['Issue'] = pd.to_numeric(df['Issue'], errors='coerce')
-    df = df.dropna(subset=['Issue'])
-    df['Issue'] = df['Issue'].astype(int)
-    return df
-
-df = load_data(game_choice)
-
-# ==========================================
-# 🧠 空間演算法核心引擎
-# ==========================================
-def get_predictions(target_draw, gap_limit, allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh):
-    target_draw = sorted(target_draw)
-    extended_draw = [0] + target_draw + [40]
-    
-    death_seas = []
-    for i in range(len(extended_draw)-1):
-        start, end = extended_draw[i], extended_draw[i+1]
-        if end - start - 1 >= gap_limit: 
-            death_seas.append((start, end))
-            
-    short_picks = []
-    for n in target_draw:
-        for c in [n-1, n+1]:
-            if 1 <= c <= 39 and not any(sea_start < c < sea_end for sea_start, sea_end in death_seas):
-                short_picks.append(int(c))
-                
-    if allow_repeat: short_picks.extend(target_draw)
-    short_picks = list(set(short_picks))
-            
-    sandwiches = [int(target_draw[i]+1) for i in range(len(target_draw)-1) if target_draw[i+1]-target_draw[i]==2]
-            
-    max_gap = 0
-    geometric_centers = []
-    for i in range(len(extended_draw)-1):
-        gap = extended_draw[i+1] - extended_draw[i] - 1
-        if gap > max_gap:
-            max_gap = gap
-            center = (extended_draw[i+1] + extended_draw[i]) / 2
-            geometric_centers = [int(np.floor(center)), int(np.ceil(center))] if center % 1 != 0 else [int(center)]
-        elif gap == max_gap and gap > 0:
-            center = (extended_draw[i+1] + extended_draw[i]) / 2
-            geometric_centers.extend([int(np.floor(center)), int(np.ceil(center))] if center % 1 != 0 else [int(center)])
-    geometric_centers = [int(c) for c in geometric_centers if 1 <= c <= 39]
-
-    tails = [n % 10 for n in target_draw]
-    hot_tails = [t for t in set(tails) if tails.count(t) >= 2]
-    
-    tail_resonances = []
-    if hot_tails:
-        for t in hot_tails:
-            for n in range(1, 40):
-                if n % 10 == t: tail_resonances.append(n)
-
-    if not allow_repeat:
-        short_picks = [p for p in short_picks if p not in target_draw]
-        sandwiches = [p for p in sandwiches if p not in target_draw]
-        geometric_centers = [p for p in geometric_centers if p not in target_draw]
-        tail_resonances = [p for p in tail_resonances if p not in target_draw]
-
-    long_picks = list(set(geometric_centers + sandwiches + tail_resonances))
-    consensus_picks = sorted(list(set(short_picks).intersection(set(long_picks))))
-    
-    worst_10_picks = []
-    breakout_picks = []
-    
-    if s_long_series is not None:
-        cold_nums = [p for p in range(1, 40) if any(s < p < e for s,e in death_seas) and p not in target_draw and p not in short_picks[:10] and p not in long_picks[:10]]
-        neutral_nums = [p for p in range(1, 40) if p not in target_draw and p not in short_picks[:10] and p not in long_picks[:10] and p not in cold_nums]
-        
-        cold_sorted = sorted(cold_nums, key=lambda x: s_long_series.get(x, 0))
-        neutral_sorted = sorted(neutral_nums, key=lambda x: s_long_series.get(x, 0))
-        
-        dead_pool = target_draw if not allow_repeat else []
-        worst_10_pool = dead_pool + cold_sorted + neutral_sorted
-        worst_10_picks = sorted(worst_10_pool[:10])
-
-    if s_long_series is not None and s_short_series is not None:
-        for p in range(1, 40):
-            if s_long_series.get(p, 0) <= long_thresh and s_short_series.get(p, 0) >= short_thresh:
-                if p not in worst_10_picks: breakout_picks.append(p)
-    
-    return short_picks, long_picks, consensus_picks, death_seas, sandwiches, geometric_centers, tail_resonances, max_gap, worst_10_picks, breakout_picks
-
-# ==========================================
-# 📝 側邊欄設定區
-# ==========================================
-st.sidebar.title("🧭 系統導覽")
-page = st.sidebar.radio("選擇分析面板：", [
-    "🎯 39碼全解析雷達", 
-    "⚔️ 雙引擎策略看板", 
-    "📈 回測與勝率追蹤", 
-    "📊 頻率機率回測實驗室",
-    "🧬 關聯矩陣(拖牌)實驗室", 
-    "📖 核心理論白皮書"
-])
-
-st.sidebar.markdown("---")
-st.sidebar.header("⏳ 時光機設定")
-
-if not df.empty:
-    options = df.index.tolist()
-    options.reverse()
-    def format_option(idx):
-        row = df.loc[idx]
-        return f"期數 {row['Issue']} ({row['Date']})"
-    selected_idx = st.sidebar.selectbox("選擇分析基準日：", options, format_func=format_option, key=f"time_machine_{game_choice}")
-else:
-    st.sidebar.warning(f"⚠️ 你的【{game_choice}】資料庫目前是空的！")
-    selected_idx = None
-
-st.sidebar.markdown("---")
-
-if not df.empty:
-    auto_next_issue = int(df.iloc[-1]['Issue']) + 1
-    try:
-        last_date = pd.to_datetime(df.iloc[-1]['Date'])
-        auto_next_date = (last_date + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
-    except:
-        auto_next_date = "2026-03-01"
-else:
-    auto_next_issue = 1
-    auto_next_date = "2026-03-01"
-
-with st.sidebar.expander(f"📝 輸入【{game_choice}】最新開獎號碼"):
-    new_date = st.text_input("開獎日期 (YYYY-MM-DD)", value=auto_next_date)
-    new_issue = st.number_input("期數", min_value=1, value=auto_next_issue, step=1)
-    st.markdown("*(輸入順序不拘，系統會自動排序)*")
-    n1 = st.number_input("號碼 1", min_value=1, max_value=39, value=1)
-    n2 = st.number_input("號碼 2", min_value=1, max_value=39, value=2)
-    n3 = st.number_input("號碼 3", min_value=1, max_value=39, value=3)
-    n4 = st.number_input("號碼 4", min_value=1, max_value=39, value=4)
-    n5 = st.number_input("號碼 5", min_value=1, max_value=39, value=5)
-
-    if st.button("🚀 寫入雲端並重新計算"):
-        if not df.empty and new_issue in df['Issue'].values:
-            st.error(f"⚠️ 期數 {new_issue} 已經存在！")
-        else:
-            sorted_nums = sorted([n1, n2, n3, n4, n5])
-            new_row = [new_date, new_issue, sorted_nums[0], sorted_nums[1], sorted_nums[2], sorted_nums[3], sorted_nums[4]]
-            with st.spinner(f'正在寫入 {game_choice} Google 雲端資料庫...'):
-                sheet = get_google_sheet(game_choice)
-                sheet.append_row(new_row, value_input_option="USER_ENTERED")
-            st.success(f"✅ 成功寫入期數 {new_issue}！")
-            st.cache_data.clear()
-            st.rerun()
-
-if df.empty:
-    st.title(f"🎯 歡迎啟用【{game_choice}】分析雷達")
-    st.stop()
-
-# ==========================================
-# 🧠 當前選定日的狀態計算
-# ==========================================
-historical_df = df.loc[:selected_idx]
-target_draw = historical_df.iloc[-1][['N1', 'N2', 'N3', 'N4', 'N5']].tolist()
-target_date = historical_df.iloc[-1]['Date']
-target_issue = historical_df.iloc[-1]['Issue']
-
-if selected_idx + 1 < len(df):
-    next_draw = df.loc[selected_idx + 1][['N1', 'N2', 'N3', 'N4', 'N5']].tolist()
-else:
-    next_draw = []
-
-nums_long = historical_df.tail(breakout_long_period)[['N1', 'N2', 'N3', 'N4', 'N5']].values.flatten()
-s_long = pd.Series(0, index=np.arange(1, 40)).add(pd.Series(nums_long).value_counts(), fill_value=0).astype(int)
-
-nums_short = historical_df.tail(breakout_short_period)[['N1', 'N2', 'N3', 'N4', 'N5']].values.flatten()
-s_short = pd.Series(0, index=np.arange(1, 40)).add(pd.Series(nums_short).value_counts(), fill_value=0).astype(int)
-
-short_picks, long_picks, consensus_picks, death_seas, sandwiches, geometric_centers, tail_resonances, max_gap, worst_10_picks, breakout_picks = get_predictions(
-    target_draw, death_sea_gap, include_repeat, s_long, s_short, breakout_long_thresh, breakout_short_thresh
-)
-
-# ==========================================
-# 🖥️ 頁面 1：🎯 39碼全解析雷達
-# ==========================================
-if page == "🎯 39碼全解析雷達":
-    st.title(f"🎯 {game_choice} 39碼全解析雷達")
-    st.markdown(f"### 基準日：{target_date} (期數 {target_issue}) | 開出號碼： `{target_draw}`")
-    
-    col_a, col_b = st.columns(2)
-    with col_a:
-        st.error(f"""
-        ### 🛑 十大避開地雷 (終極殺牌)
-        歷史頻率與深海交叉比對，動能極度冰凍，建議 **優先剔除**：
-        ## **{', '.join([str(n) for n in worst_10_picks])}**
-        """)
-    with col_b:
-        if breakout_picks:
-            st.success(f"""
-            ### 🚀 底部爆量起漲 (冷轉熱突破號)
-            符合「近{breakout_long_period}期冷門(≤{breakout_long_thresh}次)、近{breakout_short_period}期爆發(≥{breakout_short_thresh}次)」強勢表態：
-            ## **{', '.join([str(n) for n in breakout_picks])}**
-            """)
-        else:
-            st.info(f"""
-            ### 🚀 底部爆量起漲 (冷轉熱突破號)
-            *(今日無符合條件的起漲號碼)*
-            """)
-
-    st.markdown("---")
-    st.markdown("### 📊 長短線雙核心深度戰略報表 (實戰動態微調版)")
-    
-    st.markdown("""
-    💡 **圖例說明**： 
-    <span style='color: #d9534f; background-color: #fff5f5; border: 1px solid #d9534f; padding: 2px 6px; border-radius: 4px; font-weight: bold;'>紅底框號碼</span> 代表為**基準日當天**開出之號碼。
-    <span style='color: #3c763d; background-color: #dff0d8; border: 1px solid #4cae4c; padding: 2px 6px; border-radius: 4px; font-weight: bold;'>綠底框號碼</span> 代表成功命中**下一期**實際開獎！(僅限歷史期數回測可見)
-    """, unsafe_allow_html=True)
-    
-    def get_category_picks_html(picks, category_name):
-        sorted_picks = sorted(list(set(picks))) if picks else []
-        sub_list = []
-        if category_name == "HOT": sub_list = sorted_picks[:5]
-        elif category_name == "WARM": sub_list = sorted_picks[5:10] if len(sorted_picks) > 5 else []
-        elif category_name == "REPEAT_OR_DEAD":
-            if include_repeat: sub_list = [p for p in target_draw if p not in sorted_picks[:10]]
-            else: sub_list = target_draw
-        elif category_name == "NEUTRAL":
-            sub_list = [p for p in range(1, 40) if p not in sorted_picks[:10] and p not in target_draw and not any(s < p < e for s,e in death_seas)]
-        elif category_name == "COLD":
-            sub_list = [p for p in range(1, 40) if any(s < p < e for s,e in death_seas) and p not in target_draw and p not in sorted_picks[:10]]
-        
-        if not sub_list: return "無"
-        
-        formatted = []
-        for p in sub_list:
-            is_target = p in target_draw
-            is_next = p in next_draw
-            
-            if is_target and is_next:
-                formatted.append(f"<span style='color: #fff; background-color: #8a6d3b; padding: 2px 6px; border-radius: 4px; font-weight:bold;'>{p:02d}</span>")
-            elif is_next:
-                formatted.append(f"<span style='color: #3c763d; background-color: #dff0d8; border: 1px solid #4cae4c; padding: 2px 6px; border-radius: 4px; font-weight:bold;'>{p:02d}</span>")
-            elif is_target:
-                formatted.append(f"<span style='color: #d9534f; background-color: #fff5f5; border: 1px solid #d9534f; padding: 2px 6px; border-radius: 4px; font-weight:bold;'>{p:02d}</span>")
-            else:
-                formatted.append(f"<span style='font-size:16px;'>{p:02d}</span>")
-                
-        return "<span style='line-height: 2.2;'>" + "&nbsp;&nbsp;".join(formatted) + "</span>"
-
-    row3_icon = "♻️ **連莊觀察區**<br>*(昨日開出)*" if include_repeat else "💀 **最不可能開出**<br>*(全殺棄子)*"
-
-    html_table = f"""
-<table style="width:100%; border-collapse: collapse; text-align: left; font-size: 16px;">
-<tr style="background-color: #f0f2f6;">
-<th style="padding: 12px; border: 1px solid #ddd; width: 15%;">推薦等級</th>
-<th style="padding: 12px; border: 1px solid #ddd; width: 42%;">長線平衡派 (抄底與修補)</th>
-<th style="padding: 12px; border: 1px solid #ddd; width: 43%;">短線動能派 (順勢與擴散)</th>
-</tr>
-<tr>
-<td style="padding: 12px; border: 1px solid #ddd;">🔥 **極可能開出**<br>*(必買主支)*</td>
-<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(long_picks, 'HOT')}</td>
-<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(short_picks, 'HOT')}</td>
-</tr>
-<tr>
-<td style="padding: 12px; border: 1px solid #ddd;">⭐ **高機率開出**<br>*(強勢輔助)*</td>
-<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(long_picks, 'WARM')}</td>
-<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(short_picks, 'WARM')}</td>
-</tr>
-<tr>
-<td style="padding: 12px; border: 1px solid #ddd;">{row3_icon}</td>
-<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(long_picks, 'REPEAT_OR_DEAD')}</td>
-<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(short_picks, 'REPEAT_OR_DEAD')}</td>
-</tr>
-<tr>
-<td style="padding: 12px; border: 1px solid #ddd;">⚖️ **中等機率**</td>
-<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(long_picks, 'NEUTRAL')}</td>
-<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(short_picks, 'NEUTRAL')}</td>
-</tr>
-<tr>
-<td style="padding: 12px; border: 1px solid #ddd;">❄️ **低機率**</td>
-<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(long_picks, 'COLD')}</td>
-<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(short_picks, 'COLD')}</td>
-</tr>
-</table>
-"""
-    st.markdown(html_table, unsafe_allow_html=True)
-
-# ==========================================
-# 🖥️ 頁面 2：⚔️ 雙引擎策略看板
-# ==========================================
-elif page == "⚔️ 雙引擎策略看板":
-    st.title(f"⚔️ {game_choice} 雙引擎策略決策看板")
-    st.markdown(f"### 基準日：{target_date} (期數 {target_issue}) | 開出號碼： `{target_draw}`")
-    st.markdown("---")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        st.error("🔴 短線動能派")
-        st.markdown("#### 🔥 順勢動能 (+1 / -1)")
-        st.info(f"建議名單： {short_picks}" if short_picks else "*(今日無)*")
-        st.markdown(f"#### 💀 避開死水 (斷層大於 {death_sea_gap} 碼的區間)")
-        if death_seas:
-            for sea in death_seas:
-                s_text = "01" if sea[0] == 0 else f"{sea[0]+1:02d}"
-                e_text = "39" if sea[1] == 40 else f"{sea[1]-1:02d}"
-                st.warning(f"🚫 `{s_text} ~ {e_text}` (間距: {sea[1]-sea[0]-1})")
-        else:
-            st.success("今日無大型斷層區。")
-
-    with col2:
-        st.info("🔵 長線平衡派")
-        st.markdown("#### 🎯 史詩斷層 (幾何中心)")
-        st.markdown(f"*(當前最大斷層間距為: {max_gap})*")
-        st.error(f"建議名單： {geometric_centers}" if geometric_centers else "*(無明顯斷層)*")
-        st.markdown("#### 🥪 黃金對稱 (必補夾心)")
-        st.error(f"建議名單： {sandwiches}" if sandwiches else "*(今日未成形)*")
-        st.markdown("#### 🧲 同尾數共鳴 (家族召喚)")
-        st.error(f"建議名單： {tail_resonances}" if tail_resonances else "*(今日無同尾數)*")
-
-    st.markdown("---")
-    st.header("⭐️ 雙重共識牌 (疊加勝率)")
-    if consensus_picks: st.success(f"### 🎯 極高勝率主支： {consensus_picks}")
-    else: st.warning("今日兩派未達成共識，建議分開參考上方指標。")
-
-# ==========================================
-# 🖥️ 頁面 3：📈 回測與勝率追蹤
-# ==========================================
-elif page == "📈 回測與勝率追蹤":
-    st.title(f"📈 {game_choice} 策略勝率與全面回測追蹤")
-    
-    test_periods = 100
-    if len(df) > test_periods:
-        results = []
-        start_idx = len(df) - test_periods - 1
-        for i in range(start_idx, len(df) - 1):
-            past_draw = [int(x) for x in df.iloc[i][['N1', 'N2', 'N3', 'N4', 'N5']].tolist()]
-            actual_next_draw = [int(x) for x in df.iloc[i+1][['N1', 'N2', 'N3', 'N4', 'N5']].tolist()]
-            draw_date = df.iloc[i+1]['Date']
-            
-            historical_for_backtest = df.iloc[:i+1]
-            nums_long_bt = historical_for_backtest.tail(breakout_long_period)[['N1', 'N2', 'N3', 'N4', 'N5']].values.flatten()
-            s_long_bt = pd.Series(0, index=np.arange(1, 40)).add(pd.Series(nums_long_bt).value_counts(), fill_value=0).astype(int)
-            
-            nums_short_bt = historical_for_backtest.tail(breakout_short_period)[['N1', 'N2', 'N3', 'N4', 'N5']].values.flatten()
-            s_short_bt = pd.Series(0, index=np.arange(1, 40)).add(pd.Series(nums_short_bt).value_counts(), fill_value=0).astype(int)
-            
-            sp, lp, cp, _, _, _, _, _, worst_10, breakout = get_predictions(
-                past_draw, death_sea_gap, include_repeat, s_long_bt, s_short_bt, breakout_long_thresh, breakout_short_thresh
-            )
-            
-            short_hits = len(set(sp).intersection(set(actual_next_draw)))
-            long_hits = len(set(lp).intersection(set(actual_next_draw)))
-            breakout_hits = len(set(breakout).intersection(set(actual_next_draw)))
-            breakout_suggested = len(breakout)
-            kill_fails = len(set(worst_10).intersection(set(actual_next_draw)))
-            successful_kills = 10 - kill_fails
-            
-            results.append({
-                "Date": draw_date,
-                "✅ 實際開獎": str(actual_next_draw),
-                "🔴 短線推薦": str(sp) if sp else "-",
-                "🔴 命中": short_hits,
-                "🔵 長線推薦": str(lp) if lp else "-",
-                "🔵 命中": long_hits,
-                "🚀 突破轉強": str(breakout) if breakout else "-",
-                "🚀 推薦數": breakout_suggested,  
-                "🚀 命中數": breakout_hits,       
-                "💀 十大殺牌": str(worst_10) if worst_10 else "-",
-                "🛡️ 成功閃避": successful_kills
-            })
-        
-        res_df = pd.DataFrame(results).set_index("Date")
-        res_df["🔴 短線累積"] = res_df["🔴 命中"].cumsum()
-        res_df["🔵 長線累積"] = res_df["🔵 命中"].cumsum()
-        
-        total_kills_attempted = len(res_df) * 10
-        total_successful_kills = res_df["🛡️ 成功閃避"].sum()
-        kill_defense_rate = (total_successful_kills / total_kills_attempted) * 100
-        
-        total_breakout_suggested = res_df["🚀 推薦數"].sum()
-        total_breakout_hits = res_df["🚀 命中數"].sum()
-        breakout_win_rate = (total_breakout_hits / total_breakout_suggested) * 100 if total_breakout_suggested > 0 else 0.0
-        
-        st.markdown("---")
-        col1, col2, col3, col4 = st.columns(4)
-        col1.metric("🔴 短線累積命中", f"{res_df['🔴 短線累積'].iloc[-1]} 顆")
-        col2.metric("🔵 長線累積命中", f"{res_df['🔵 長線累積'].iloc[-1]} 顆")
-        col3.metric(
-            "🚀 突破號狙擊勝率", 
-            f"{breakout_win_rate:.1f} %", 
-            f"共抓出 {total_breakout_suggested} 顆，命中 {total_breakout_hits} 顆",
-            delta_color="normal"
-        )
-        col4.metric("🛡️ 十大殺牌防守率", f"{kill_defense_rate:.1f} %", "越高越好", delta_color="normal")
-        
-        st.line_chart(res_df[["🔴 短線累積", "🔵 長線累積"]])
-        
-        with st.expander("📝 展開查看：每日覆盤明細對帳單"):
-            st.dataframe(res_df[["✅ 實際開獎", "🔴 短線推薦", "🔴 命中", "🔵 長線推薦", "🔵 命中", "🚀 突破轉強", "🚀 命中數", "💀 十大殺牌", "🛡️ 成功閃避"]], use_container_width=True)
-            
-    else:
-        st.warning("⚠️ 資料庫目前不足 100 期，無法進行完整回測。")
-
-# ==========================================
-# 🖥️ 頁面 4：📊 頻率機率回測實驗室
-# ==========================================
-elif page == "📊 頻率機率回測實驗室":
-    st.title(f"📊 {game_choice} 頻率機率回測實驗室")
-    st.markdown("""
-    這裡專門驗證**「條件機率」**：如果一個號碼在過去 N 期內出現了 M 次，它下一期**不開出來（殺牌成功）**的真實機率到底是多少？
-    透過歷史回測，我們可以直接找出最安全的**無腦剔除區間**！
-    """)
-    st.markdown("---")
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        test_window = st.number_input("🔍 主期數 (跑回測用，近 N 期)", min_value=5, max_value=100, value=30, step=5)
-    with col2:
-        test_window_2 = st.number_input("🔭 副期數 (對比動能用，近 M 期)", min_value=5, max_value=300, value=100, step=10)
-    with col3:
-        test_periods = st.number_input("⏳ 歷史回測樣本數 (近 X 期)", min_value=50, max_value=500, value=150, step=50)
-        
-    st.markdown("---")
-
-    if len(df) >= test_window + test_periods:
-        with st.spinner('正在進行百萬次交叉比對運算中...'):
-            results = {} 
-            start_idx = len(df) - test_periods - 1
-            
-            for i in range(start_idx, len(df) - 1):
-                past_window = df.iloc[i - test_window + 1 : i + 1]
-                flat_past = past_window[['N1', 'N2', 'N3', 'N4', 'N5']].values.flatten()
-                freq_counts = pd.Series(0, index=np.arange(1, 40)).add(pd.Series(flat_past).value_counts(), fill_value=0).astype(int)
-                
-                actual_next_draw = df.iloc[i+1][['N1', 'N2', 'N3', 'N4', 'N5']].tolist()
-                
-                for num in range(1, 40):
-                    f = freq_counts[num]
-                    if f not in results:
-                        results[f] = {'總遇見次數': 0, '開出次數': 0, '不開次數': 0}
-                    results[f]['總遇見次數'] += 1
-                    
-                    if num in actual_next_draw:
-                        results[f]['開出次數'] += 1
-                    else:
-                        results[f]['不開次數'] += 1
-            
-            output = []
-            for f in sorted(results.keys()):
-                total = results[f]['總遇見次數']
-                hits = results[f]['開出次數']
-                misses = results[f]['不開次數']
-                
-                hit_rate = (hits / total * 100) if total > 0 else 0
-                miss_rate = (misses / total * 100) if total > 0 else 0
-                
-                output.append({
-                    "近 N 期出現次數 (M)": f"{f} 次",
-                    "歷史樣本總數": total,
-                    "下期開出": hits,
-                    "下期不開 (殺牌)": misses,
-                    "✨ 開出機率 (做多)": f"{hit_rate:.1f} %",
-                    "🛡️ 不出機率 (殺牌)": f"{miss_rate:.1f} %",
-                    "Raw_Miss_Rate": miss_rate, 
-                    "Raw_Hit_Rate": hit_rate
-                })
-            
-            prob_df = pd.DataFrame(output)
-            st.success(f"✅ 回測完成！以下是近 {test_periods} 期內，以【主期數 {test_window} 期】為觀察窗的機率分佈：")
-            
-            display_df = prob_df.drop(columns=["Raw_Miss_Rate", "Raw_Hit_Rate"])
-            st.dataframe(display_df, use_container_width=True)
-            
-            col_chart1, col_chart2 = st.columns(2)
-            with col_chart1:
-                st.markdown("### 🛡️ 殺牌專屬：不出機率長條圖")
-                st.caption("柱子越高，代表該頻率下期「絕對不開」的機率越大，最適合剔除。")
-                miss_chart_data = prob_df.set_index("近 N 期出現次數 (M)")["Raw_Miss_Rate"]
-                st.bar_chart(miss_chart_data, color="#d9534f")
-                
-            with col_chart2:
-                st.markdown("### ✨ 做多專屬：開出機率長條圖")
-                st.caption("柱子越高，代表該頻率下期「爆發開出」的機率越大，適合買進。")
-                hit_chart_data = prob_df.set_index("近 N 期出現次數 (M)")["Raw_Hit_Rate"]
-                st.bar_chart(hit_chart_data, color="#5cb85c")
-            
-            st.markdown("---")
-            st.markdown(f"### 🎯 明日實戰指南：以 {test_window} 期頻率精準打擊")
-            
-            latest_window = historical_df.tail(test_window)[['N1', 'N2', 'N3', 'N4', 'N5']].values.flatten()
-            latest_freq = pd.Series(0, index=np.arange(1, 40)).add(pd.Series(latest_window).value_counts(), fill_value=0).astype(int)
-            
-            valid_probs = prob_df[prob_df["歷史樣本總數"] >= 5]
-            if not valid_probs.empty:
-                best_kill_row = valid_probs.loc[valid_probs["Raw_Miss_Rate"].idxmax()]
-                best_kill_freq = int(best_kill_row["近 N 期出現次數 (M)"].replace(" 次", ""))
-                best_kill_prob = best_kill_row["🛡️ 不出機率 (殺牌)"]
-                kill_nums = [n for n in range(1, 40) if latest_freq[n] == best_kill_freq]
-                
-                best_hit_row = valid_probs.loc[valid_probs["Raw_Hit_Rate"].idxmax()]
-                best_hit_freq = int(best_hit_row["近 N 期出現次數 (M)"].replace(" 次", ""))
-                best_hit_prob = best_hit_row["✨ 開出機率 (做多)"]
-                hit_nums = [n for n in range(1, 40) if latest_freq[n] == best_hit_freq]
-                
-                col_guide1, col_guide2 = st.columns(2)
-                with col_guide1:
-                    st.error(f"""
-                    🛑 **最強殺牌區 (建議剔除)**
-                    歷史回測顯示，主期數出現「**{best_kill_freq} 次**」的號碼，下期不開機率高達 **{best_kill_prob}**。
-                    明日建議優先剔除：
-                    ## `{kill_nums}`
-                    """)
-                with col_guide2:
-                    st.success(f"""
-                    🚀 **最強主支區 (建議買進)**
-                    歷史回測顯示，主期數出現「**{best_hit_freq} 次**」的號碼，下期開出機率高達 **{best_hit_prob}**。
-                    明日建議優先考慮：
-                    ## `{hit_nums}`
-                    """)
-            
-            with st.expander("🔍 詳細查看：39碼目前各頻率狀態 (視覺標籤升級版)"):
-                
-                st.markdown("""
-                💡 **圖例說明**： 
-                <span style='color: #d9534f; background-color: #fff5f5; border: 1px solid #d9534f; padding: 2px 6px; border-radius: 4px; font-weight: bold;'>紅底框號碼</span> 代表為**基準日當天**開出之號碼。
-                <span style='color: #3c763d; background-color: #dff0d8; border: 1px solid #4cae4c; padding: 2px 6px; border-radius: 4px; font-weight: bold;'>綠底框號碼</span> 代表成功命中**下一期**實際開獎！(僅限歷史期數回測可見)
-                """, unsafe_allow_html=True)
-                
-                latest_window_2 = historical_df.tail(test_window_2)[['N1', 'N2', 'N3', 'N4', 'N5']].values.flatten()
-                latest_freq_2 = pd.Series(0, index=np.arange(1, 40)).add(pd.Series(latest_window_2).value_counts(), fill_value=0).astype(int)
-                
-                freq_dict = {}
-                for n in range(1, 40):
-                    f = latest_freq[n]
-                    if f not in freq_dict: freq_dict[f] = []
-                    freq_dict[f].append(n)
-                
-                avg_f = test_window * 5 / 39
-                
-                html_freq_table = f"""
-<table style="width:100%; border-collapse: collapse; text-align: left; font-size: 16px; line-height: 2.2;">
-<tr style="background-color: #f0f2f6;">
-<th style="padding: 12px; border: 1px solid #ddd; width: 20%;">短線熱度 ({test_window}期)</th>
-<th style="padding: 12px; border: 1px solid #ddd; width: 80%;">號碼分佈 <span style='font-size:13px; font-weight:normal; color:#666;'>&nbsp;*(灰色括號內為 {test_window_2} 期之長線基期次數)*</span></th>
-</tr>
-"""
-                for f in sorted(freq_dict.keys(), reverse=True):
-                    if f >= avg_f * 1.5: icon, color = "🔥", "#d9534f"
-                    elif f >= avg_f: icon, color = "⭐", "#f0ad4e"
-                    elif f > 1: icon, color = "⚖️", "#333333"
-                    elif f == 1: icon, color = "❄️", "#5bc0de"
-                    else: icon, color = "💀", "#999999"
-                        
-                    nums_html = []
-                    for n in sorted(freq_dict[f]):
-                        long_f = latest_freq_2[n]
-                        is_target = n in target_draw
-                        is_next = n in next_draw
-                        
-                        if is_target and is_next:
-                            nums_html.append(f"<span style='display:inline-block; margin-right:15px;'><span style='color: #fff; background-color: #8a6d3b; padding: 2px 6px; border-radius: 4px; font-weight:bold; font-size:18px;'>{n:02d}</span> <span style='color:#888; font-size:13px;'>(長: {long_f}次)</span></span>")
-                        elif is_next:
-                            nums_html.append(f"<span style='display:inline-block; margin-right:15px;'><span style='color: #3c763d; background-color: #dff0d8; border: 1px solid #4cae4c; padding: 2px 6px; border-radius: 4px; font-weight:bold; font-size:18px;'>{n:02d}</span> <span style='color:#888; font-size:13px;'>(長: {long_f}次)</span></span>")
-                        elif is_target:
-                            nums_html.append(f"<span style='display:inline-block; margin-right:15px;'><span style='color: #d9534f; background-color: #fff5f5; border: 1px solid #d9534f; padding: 2px 6px; border-radius: 4px; font-weight:bold; font-size:18px;'>{n:02d}</span> <span style='color:#d9534f; font-size:13px;'>(長: {long_f}次)</span></span>")
-                        else:
-                            nums_html.append(f"<span style='display:inline-block; margin-right:15px;'><b style='font-size:18px;'>{n:02d}</b> <span style='color:#888; font-size:13px;'>(長: {long_f}次)</span></span>")
-                    
-                    nums_str = "".join(nums_html)
-                    
-                    html_freq_table += f"""
-<tr>
-<td style="padding: 12px; border: 1px solid #ddd; color: {color};"><b>{icon} 出現 {f} 次</b></td>
-<td style="padding: 12px; border: 1px solid #ddd;">{nums_str}</td>
-</tr>
-"""
-                html_freq_table += "</table>"
-                
-                st.markdown(html_freq_table, unsafe_allow_html=True)
-
-    else:
-        st.warning(f"⚠️ 資料庫數據不足！需要至少 {test_window + test_periods} 期資料才能進行此回測。")
-
-# ==========================================
-# 🖥️ 頁面 6：🧬 關聯矩陣(拖牌)實驗室 (✨ 殺牌絕緣體大升級版)
-# ==========================================
-elif page == "🧬 關聯矩陣(拖牌)實驗室":
-    st.title(f"🧬 {game_choice} 關聯矩陣 (拖牌與絕緣) 實驗室")
-    st.markdown("""
-    利用**「馬可夫鏈（Markov Chain）」**概念打造的條件機率尋標器。
-    系統會掃描歷史數據庫：**「當某個號碼開出時，下一期哪顆號碼最常跟著開出？又有哪顆號碼『絕對不跟著開』？」** 幫您找出號碼間的最強量子糾纏（買進）與絕對絕緣體（殺牌）！
-    """)
-    st.markdown("---")
-    
-    st.header(f"🎯 明日戰略：今日開出號碼的「最強拖牌與絕緣矩陣」")
-    st.markdown(f"**今日（基準日）開出號碼：** `{target_draw}`")
-    
-    lookback = st.slider("歷史追溯期數 (分析過去 N 期內的拖牌關聯)", min_value=50, max_value=500, value=200, step=50)
-    
-    if len(df) > lookback:
-        with st.spinner("正在進行矩陣交叉運算..."):
-            hist_subset = historical_df.tail(lookback).reset_index(drop=True)
-            
-            matrix_data = []
-            all_recommendations = []
-            all_never_drawn = []
-            
-            # 針對今天開出的每一顆號碼，去尋找它的歷史拖牌與絕緣牌
-            for draw_num in target_draw:
-                appearances = 0
-                next_draws = []
-                
-                for i in range(len(hist_subset) - 1):
-                    curr_draw = hist_subset.iloc[i][['N1', 'N2', 'N3', 'N4', 'N5']].values
-                    if draw_num in curr_draw:
-                        appearances += 1
-                        next_draws.extend(hist_subset.iloc[i+1][['N1', 'N2', 'N3', 'N4', 'N5']].values)
-                
-                if appearances > 0:
-                    freq = pd.Series(next_draws).value_counts()
-                    
-                    # 抓出最常跟著開出的前 3 名
-                    top_3 = freq.head(3)
-                    top_3_str = ", ".join([f"{int(k):02d} ({v}次)" for k, v in top_3.items()])
-                    
-                    for k in top_3.keys():
-                        all_recommendations.append(int(k))
-                        
-                    # ✨ 核心升級：抓出「0 次開出」的絕對絕緣牌
-                    never_drawn_for_this = [n for n in range(1, 40) if n not in freq.index]
-                    all_never_drawn.extend(never_drawn_for_this)
-                    
-                    if never_drawn_for_this:
-                        # 如果有從未開出的號碼，直接列出
-                        never_drawn_str = ", ".join([f"{n:02d}" for n in never_drawn_for_this])
-                    else:
-                        # 如果全部39碼都至少開過一次，就列出頻率最低的墊底牌
-                        bottom_3 = freq.tail(3)
-                        never_drawn_str = "無 0次 (墊底冷牌: " + ", ".join([f"{int(k):02d} ({v}次)" for k, v in bottom_3.items()]) + ")"
-                        
-                    matrix_data.append({
-                        "今日開出號碼": f"{draw_num:02d}",
-                        "歷史樣本(次)": appearances,
-                        "🏆 下期最常跟著開 (最強拖牌)": top_3_str,
-                        "🛑 下期從未跟著開 (絕對絕緣)": never_drawn_str
-                    })
-            
-            if matrix_data:
-                matrix_df = pd.DataFrame(matrix_data)
-                st.dataframe(matrix_df, use_container_width=True)
-                
-                col_res1, col_res2 = st.columns(2)
-                
-                with col_res1:
-                    # 尋找「共振主支」：被多顆號碼同時拖出的牌
-                    rec_counts = pd.Series(all_recommendations).value_counts()
-                    strong_resonances = rec_counts[rec_counts >= 2].index.tolist()
-                    
-                    if strong_resonances:
-                        st.success(f"""
-                        ### 🔥 終極共振主支 (建議買進)
-                        ## `{sorted(strong_resonances)}`
-                        *(這些號碼同時被今日「多顆」號碼強烈拖出，爆發機率極高！)*
-                        """)
-                    else:
-                        st.info("### 🔥 終極共振主支\n*(今日號碼拖牌較為分散，無強烈共振現象，請直接參考上方表格的首選拖牌)*")
-
-                with col_res2:
-                    # 尋找「共振殺牌」：被多顆號碼同時排斥 (0次拖出) 的牌
-                    kill_counts = pd.Series(all_never_drawn).value_counts()
-                    
-                    # 只要被今天開出的其中 3 顆以上號碼給「聯合排斥」，就是神級殺牌
-                    strong_kills = kill_counts[kill_counts >= 3].index.tolist()
-                    
-                    if strong_kills:
-                        st.error(f"""
-                        ### 🛡️ 終極共振絕緣牌 (強力殺牌)
-                        ## `{sorted(strong_kills)}`
-                        *(這些號碼被今日高達 3 顆以上的號碼「聯合排斥(0次紀錄)」，下期極難開出，建議大膽剔除！)*
-                        """)
-                    else:
-                        # 退一步看有沒有被 2 顆號碼排斥的
-                        strong_kills_2 = kill_counts[kill_counts >= 2].index.tolist()
-                        if strong_kills_2:
-                            st.error(f"""
-                            ### 🛡️ 次級共振絕緣牌 (建議殺牌)
-                            ## `{sorted(strong_kills_2)}`
-                            *(這些號碼被今日 2 顆號碼聯合排斥，建議優先避開)*
-                            """)
-                        else:
-                            st.info("### 🛡️ 終極共振絕緣牌\n*(今日無明顯的聯合排斥現象，請參考表格中各號碼的絕緣牌)*")
-            else:
-                st.warning("歷史數據不足以分析這些號碼的拖牌。")
-
-        st.markdown("---")
-        
-        # ==========================================
-        # 🔍 手動拖牌查詢器
-        # ==========================================
-        st.header("🔍 手動拖牌與殺牌查詢器")
-        target_num = st.selectbox("選擇要分析的『母體號碼』", range(1, 40), index=0)
-        
-        appearances = 0
-        next_draws = []
-        for i in range(len(hist_subset) - 1):
-            curr_draw = hist_subset.iloc[i][['N1', 'N2', 'N3', 'N4', 'N5']].values
-            if target_num in curr_draw:
-                appearances += 1
-                next_draws.extend(hist_subset.iloc[i+1][['N1', 'N2', 'N3', 'N4', 'N5']].values)
-                
-        if appearances > 0:
-            st.write(f"過去 **{lookback} 期** 中，號碼 **{target_num:02d}** 共開出 **{appearances} 次**。")
-            freq = pd.Series(next_draws).value_counts().reset_index()
-            freq.columns = ['下期開出號碼', '開出次數']
-            freq['拖牌機率'] = (freq['開出次數'] / appearances * 100).round(1).astype(str) + " %"
-            
-            # ✨ 抓出絕對不會跟著這顆號碼開的「絕緣體」
-            never_drawn_manual = [n for n in range(1, 40) if n not in next_draws]
-            if never_drawn_manual:
-                st.error(f"🛑 **絕對絕緣體 (0次開出)**：在過去 {lookback} 期中，只要 **{target_num:02d}** 開出，**從未**跟著開出的號碼有： `{never_drawn_manual}`")
-            
-            col_chart1, col_chart2 = st.columns([1, 2])
-            with col_chart1:
-                st.dataframe(freq.head(10), hide_index=True)
-            with col_chart2:
-                chart_data = freq.head(10).set_index('下期開出號碼')['開出次數']
-                st.bar_chart(chart_data, color="#f0ad4e")
-        else:
-            st.write(f"在過去 {lookback} 期內，沒有找到號碼 {target_num} 的開出紀錄。")
-            
-    else:
-        st.warning(f"⚠️ 資料庫數據不足！需要至少 {lookback} 期資料才能進行拖牌分析。")
-
-# ==========================================
-# 🖥️ 頁面 7：📖 核心理論白皮書
-# ==========================================
-elif page == "📖 核心理論白皮書":
-    st.title("📖 核心理論與策略解析 (Whitepaper)")
-    st.markdown("""
-    ### 🎯 系統開發核心理念
-    本系統採用了量化金融中經典的**均值回歸**與**動能突破**理論，並將其轉化為彩券分析模型。系統具備雙核心判斷邏輯，並內建動態參數微調面板，允許操作者針對不同的市場週期，隨時改變演算法的嚴格程度。
-
-    ### 🚀 突破號 (冷轉熱) 策略
-    此策略源自於股市中的「底部爆量起漲」。透過比對大週期（長線基期）的冷門號碼，在小週期（短線基期）內是否出現異常的資金動能（頻繁開出），來精準捕捉即將發動的強勢主支。
-
-    ### 🛑 十大殺牌防禦機制
-    在所有投資市場中，學會「不買什麼」比「買什麼」更能保護本金。系統結合了空間斷層理論（死亡之海）與歷史開出機率，為您自動剃除動能陷入冰凍的十顆地雷，大幅提升投資組合的勝率與期望值。
-    
-    ### 📊 頻率機率回測 (條件機率)
-    利用過去數百期的真實數據，嚴格計算出特定頻率號碼的「真實開出機率」與「不出機率(殺牌機率)」，打破憑感覺選號的盲點，用科學證據尋找莊家破綻。
-    
-    ### 🧬 馬可夫鏈關聯矩陣 (拖牌與絕緣)
-    不看單一號碼，而是計算號碼間的「量子糾纏」。透過海量歷史數據比對出「A 開出後最容易開出 B (拖牌)」以及「A 開出後絕對不開 C (絕緣)」的規律。透過多顆號碼的交叉共振，能找出極高勝率的主支與殺牌。
-    """)
+import streamlit as st
+import pandas as pd
+import copy
+import os
+from math import comb
+import numpy as np
+from radar import NUM_COLS, archive, bits_to_numbers, build_draw_store, ingest, metrics, numbers_to_bits, prefetch, tickets, watch, wheels
+from radar import sync as sheet_sync
+from radar.sources import load_local, local_snapshot_path
+from radar.backtest import summarize
+from radar.btcache import backtest_ledger, ledger_rows
+from radar.walkforward import WALK_CHUNK, walk_forward_run
+from radar.montecarlo import compare_to_baseline, run_baseline
+from radar.freq import best_per_window, frequency_surface, surface_rates, window_row
+from radar.features import feature_predictions, feature_table
+from radar.assoc import AssociationIndex, association_table
+from radar.combos import ComboIndex, combo_report
+from radar.drought import BUY_BAND, KILL_PERCENTILE, MIN_SAMPLES, DroughtIndex, drought_backtest, drought_signals, summarize_drought
+from radar.markov import TransitionIndex, follower_report, never_followed, ranked_followers, resonance_picks, window_first_follow, window_matrix
+from radar.sweep import param_grid, run_sweep, sample_params
+
+st.set_page_config(page_title="量化雷達 雙彩種切換版", layout="wide")
+
+# 整次 rerun 的耗時；選好面板後再補上 page 標籤
+rerun_span = metrics.span('rerun').start()
+
+# ==========================================
+# 📝 側邊欄：彩種切換開關
+# ==========================================
+st.sidebar.title("🎲 選擇分析彩種")
+GAMES = ["539", "天天樂"]
+game_choice = st.sidebar.radio("目前分析目標：", GAMES)
+
+# 有雲端金鑰時預設讀雲端，沒有 (離線分析機) 就直接讀專案內的快照檔
+try:
+    has_cloud_secret = "gcp_json" in st.secrets
+except Exception:
+    has_cloud_secret = False
+data_sources = ["☁️ Google 雲端試算表", "💾 本機快照檔"]
+data_source = st.sidebar.radio("資料來源：", data_sources, index=0 if has_cloud_secret else 1)
+
+if st.sidebar.button("🔄 強制同步雲端資料庫"):
+    sheet_sync.invalidate()
+    prefetch.forget()
+    st.cache_data.clear()
+    st.rerun()
+
+st.sidebar.markdown("---")
+
+# ==========================================
+# ⚙️ 核心演算法參數微調
+# ==========================================
+st.sidebar.header("⚙️ 演算法參數微調")
+death_sea_gap = st.sidebar.slider(
+    "💀 死亡之海斷層間距", 
+    min_value=4, max_value=12, value=7, step=1, 
+    help="當兩個號碼間隔大於此數值，視為死亡之海。"
+)
+include_repeat = st.sidebar.checkbox(
+    "♻️ 包含連莊號 (解除封印)", 
+    value=True, 
+    help="勾選後保留昨日號碼在動能觀察池；取消則視為全殺棄子。"
+)
+
+st.sidebar.markdown("---")
+
+# ==========================================
+# 🚀 突破號 & 殺牌 (冷轉熱) 參數微調
+# ==========================================
+st.sidebar.header("🚀 突破與殺牌參數微調")
+breakout_long_period = st.sidebar.number_input(
+    "🔭 長線觀察期數 (近 N 期)", 
+    min_value=30, max_value=300, value=100, step=10
+)
+breakout_long_thresh = st.sidebar.number_input(
+    f"📉 長線冷門標準 (近 {breakout_long_period} 期開出 ≤)", 
+    min_value=1, max_value=50, value=12, step=1
+)
+st.sidebar.markdown("---")
+breakout_short_period = st.sidebar.number_input(
+    "🔍 短線觀察期數 (近 N 期)", 
+    min_value=5, max_value=50, value=20, step=1
+)
+breakout_short_thresh = st.sidebar.number_input(
+    f"📈 短線爆發標準 (近 {breakout_short_period} 期開出 ≥)", 
+    min_value=1, max_value=15, value=3, step=1
+)
+
+# 回測帳本、逐期推進與參數掃描共用的參數鍵 (與 radar.sweep.PARAM_KEYS 相同)
+strategy_params = {
+    'death_sea_gap': death_sea_gap, 'include_repeat': include_repeat,
+    'breakout_long_period': breakout_long_period, 'breakout_long_thresh': breakout_long_thresh,
+    'breakout_short_period': breakout_short_period, 'breakout_short_thresh': breakout_short_thresh,
+}
+
+st.sidebar.markdown("---")
+
+# ==========================================
+# 🔗 連接 Google Sheets 資料庫
+# ==========================================
+SHEET_URL = sheet_sync.DEFAULT_SHEET_URL
+
+def get_google_sheet(sheet_name):
+    # 授權後的 client 與工作表在同一行程內共用，不必每次重新解析金鑰與開檔
+    return sheet_sync.get_worksheet(st.secrets["gcp_json"], SHEET_URL, sheet_name)
+
+def load_sheet_frame(game_name):
+    # 只讀上次同步之後的新列；最後幾列內容對不上才整張重抓
+    state, _ = sheet_sync.sync_sheet(get_google_sheet(game_name), game_name)
+    return sheet_sync.state_frame(state)
+
+DATA_LOADERS = {
+    "☁️ Google 雲端試算表": load_sheet_frame,
+    "💾 本機快照檔": load_local,
+}
+# 與 `python -m radar watch --source ...` 的來源代號對應
+SOURCE_KEYS = {
+    "☁️ Google 雲端試算表": 'sheet',
+    "💾 本機快照檔": 'local',
+}
+
+def snapshot_version(game_name, source_name):
+    # 監看行程還在跑就回傳最新快照的版本號，否則為 0 (由 app 自己讀資料來源)
+    meta = watch.latest_meta(game_name, SOURCE_KEYS[source_name])
+    return meta['version'] if meta else 0
+
+def warm_game(game_name, source_name, params, version=0):
+    # 背景執行緒：有監看快照就直接載入 (倉儲、特徵表、拖牌索引都已算好)，
+    # 否則抓資料、建 DrawStore；再把還沒有的索引與回測帳本排進預載佇列
+    meta = watch.latest_meta(game_name, SOURCE_KEYS[source_name]) if version else None
+    transition_index = None
+    if meta is not None:
+        df, game_store, transition_index = watch.read_snapshot(meta)
+    else:
+        df = DATA_LOADERS[source_name](game_name)
+        game_store = build_draw_store(df)
+        # 每期特徵表跟著倉儲一起進快取，時光機切到任何一期都只需查表
+        feature_table(game_store)
+    # 倉儲改用封存檔的 memmap 版本：快取與參數掃描子行程只序列化檔案位置，不複製歷史資料
+    game_store = archive.archived_store(game_store, archive.archive_path(game_name, SOURCE_KEYS[source_name]))
+    if len(game_store):
+        ident = (game_name, source_name, len(game_store), int(game_store.issues[-1]))
+        if transition_index is not None:
+            prefetch.put(('transition',) + ident, transition_index)
+        else:
+            prefetch.submit(('transition',) + ident, TransitionIndex, game_store.nums)
+        prefetch.submit(('association',) + ident, AssociationIndex, game_store.masks)
+        prefetch.submit(('combo',) + ident, ComboIndex, game_store.nums)
+        prefetch.submit(('drought',) + ident, DroughtIndex, game_store.masks)
+        prefetch.submit(('ledger',) + ident + (tuple(params.items()),), backtest_ledger, game_store, game_name, SOURCE_KEYS[source_name], params)
+    return df, game_store
+
+@metrics.cached(st.cache_data(ttl=600), 'load_data')
+def load_data(game_name, source_name=data_sources[0], version=0):
+    # version 為監看快照的版本號：監看行程發佈新快照後自然換成新的快取鍵
+    return prefetch.take(('data', game_name, source_name, version), warm_game, game_name, source_name, strategy_params, version)
+
+# 兩個彩種同時在背景預載 (已在快取裡的會略過)，切換彩種或開對照頁時不必再等網路
+game_versions = {game_name: snapshot_version(game_name, data_source) for game_name in GAMES}
+for game_name in GAMES:
+    prefetch.submit(('data', game_name, data_source, game_versions[game_name]), warm_game, game_name, data_source, strategy_params, game_versions[game_name])
+
+with metrics.span('stage', stage='load_data'):
+    df, store = load_data(game_choice, data_source, game_versions[game_choice])
+
+@metrics.cached(st.cache_resource(max_entries=4), 'load_transition_index')
+def load_transition_index(game_name, source_name, n_draws, last_issue, _store):
+    # 以彩種 + 資料長度 + 最新期數當快取鍵，新期數寫入後自動重建
+    return prefetch.take(('transition', game_name, source_name, n_draws, last_issue), TransitionIndex, _store.nums)
+
+@metrics.cached(st.cache_resource(max_entries=4), 'load_association_index')
+def load_association_index(game_name, source_name, n_draws, last_issue, _store):
+    return prefetch.take(('association', game_name, source_name, n_draws, last_issue), AssociationIndex, _store.masks)
+
+@metrics.cached(st.cache_resource(max_entries=4), 'load_combo_index')
+def load_combo_index(game_name, source_name, n_draws, last_issue, _store):
+    return prefetch.take(('combo', game_name, source_name, n_draws, last_issue), ComboIndex, _store.nums)
+
+@metrics.cached(st.cache_resource(max_entries=4), 'load_drought_index')
+def load_drought_index(game_name, source_name, n_draws, last_issue, _store):
+    return prefetch.take(('drought', game_name, source_name, n_draws, last_issue), DroughtIndex, _store.masks)
+
+@metrics.cached(st.cache_data(max_entries=16), 'load_frequency_surface')
+def load_frequency_surface(game_name, source_name, n_draws, last_issue, windows, test_periods, _store):
+    sample_ends = np.arange(n_draws - test_periods, n_draws)
+    return frequency_surface(_store.prefix, _store.masks, windows, sample_ends)
+
+@metrics.cached(st.cache_data(max_entries=16), 'load_baseline')
+def load_baseline(params_items, rows, n_sims, seed=0):
+    # 隨機基準只跟參數與回測長度有關，與實際資料無關，兩個彩種可以共用
+    return run_baseline(dict(params_items), rows, n_sims, seed)
+is_local_source = data_source == "💾 本機快照檔"
+if is_local_source:
+    st.sidebar.caption(f"📂 快照檔：`{local_snapshot_path()}`")
+
+# ==========================================
+# 📝 側邊欄設定區
+# ==========================================
+st.sidebar.title("🧭 系統導覽")
+page = st.sidebar.radio("選擇分析面板：", [
+    "🎯 39碼全解析雷達", 
+    "⚔️ 雙引擎策略看板", 
+    "📈 回測與勝率追蹤", 
+    "📊 頻率機率回測實驗室",
+    "🧊 遺漏值實驗室",
+    "🧬 關聯矩陣(拖牌)實驗室", 
+    "🧩 組合實驗室",
+    "🧪 參數掃描實驗室",
+    "🆚 雙彩種對照",
+    "📖 核心理論白皮書"
+])
+rerun_span.labels['page'] = page
+
+st.sidebar.markdown("---")
+st.sidebar.header("⏳ 時光機設定")
+
+if not df.empty:
+    options = df.index.tolist()
+    options.reverse()
+    def format_option(idx):
+        row = df.loc[idx]
+        return f"期數 {row['Issue']} ({row['Date']})"
+    selected_idx = st.sidebar.selectbox("選擇分析基準日：", options, format_func=format_option, key=f"time_machine_{game_choice}")
+else:
+    st.sidebar.warning(f"⚠️ 你的【{game_choice}】資料庫目前是空的！")
+    selected_idx = None
+
+st.sidebar.markdown("---")
+
+if not df.empty:
+    try:
+        last_date = pd.Timestamp(store.dates[-1])
+        auto_next_date = (last_date + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    except:
+        auto_next_date = "2026-03-01"
+    auto_next_issue = ingest.next_issue(store.issues[-1], auto_next_date)
+else:
+    auto_next_issue = 1
+    auto_next_date = "2026-03-01"
+
+def commit_draws(rows):
+    # 一次 append_rows 寫入雲端，再把新期數就地接到目前的倉儲與拖牌/關聯索引上，
+    # 交給預載層給下一次 load_data 取用：不清空其他快取、也不必重抓整張表
+    with st.spinner(f'正在寫入 {game_choice} Google 雲端資料庫 ({len(rows)} 期)...'):
+        sheet_sync.append_draws(get_google_sheet(game_choice), game_choice, ingest.batch_values(rows))
+
+    indexes = {}
+    if len(store):
+        old_ident = (game_choice, data_source, len(store), int(store.issues[-1]))
+        # 快取裡的索引可能正被其他使用者讀取，複製一份再附加
+        indexes['transition'] = copy.deepcopy(load_transition_index(*old_ident, store))
+        indexes['association'] = copy.deepcopy(load_association_index(*old_ident, store))
+        indexes['combo'] = copy.deepcopy(load_combo_index(*old_ident, store))
+        indexes['drought'] = copy.deepcopy(load_drought_index(*old_ident, store))
+    store.append(rows['Issue'].values, rows['Date'].values, rows[NUM_COLS].values)
+    feature_table(store)
+    new_masks = store.masks[len(store) - len(rows):]
+    new_ident = (game_choice, data_source, len(store), int(store.issues[-1]))
+    if indexes:
+        indexes['transition'].append(store.nums[len(store) - len(rows):])
+        indexes['association'].append(new_masks)
+        indexes['combo'].append(store.nums[len(store) - len(rows):])
+        indexes['drought'].append(new_masks)
+        for name, index in indexes.items():
+            prefetch.put((name,) + new_ident, index)
+    archived = archive.archived_store(store, archive.archive_path(game_choice, SOURCE_KEYS[data_source]))
+    prefetch.put(('data', game_choice, data_source, game_versions[game_choice]), (pd.concat([df, rows], ignore_index=True), archived))
+    # 回測帳本以資料指紋為鍵，只需補算新列；先在背景補好
+    prefetch.submit(('ledger',) + new_ident + (tuple(strategy_params.items()),), backtest_ledger, store, game_choice, SOURCE_KEYS[data_source], strategy_params)
+    load_data.clear(game_choice, data_source, game_versions[game_choice])
+
+def show_batch_report(report):
+    for message in report['errors']:
+        st.error(f"❌ {message}")
+    for message in report['warnings']:
+        st.warning(f"⚠️ {message}")
+    if report['skipped']:
+        st.info(f"ℹ️ 已存在且號碼相同，略過：{', '.join(map(str, report['skipped']))}")
+
+with st.sidebar.expander(f"📝 輸入【{game_choice}】最新開獎號碼"):
+    new_date = st.text_input("開獎日期 (YYYY-MM-DD)", value=auto_next_date)
+    new_issue = st.number_input("期數", min_value=1, value=auto_next_issue, step=1)
+    st.markdown("*(輸入順序不拘，系統會自動排序)*")
+    n1 = st.number_input("號碼 1", min_value=1, max_value=39, value=1)
+    n2 = st.number_input("號碼 2", min_value=1, max_value=39, value=2)
+    n3 = st.number_input("號碼 3", min_value=1, max_value=39, value=3)
+    n4 = st.number_input("號碼 4", min_value=1, max_value=39, value=4)
+    n5 = st.number_input("號碼 5", min_value=1, max_value=39, value=5)
+
+    if st.button("🚀 寫入雲端並重新計算"):
+        # 與批次匯入走同一套驗證 (期數索引、連號、日期、號碼不重複)
+        report = ingest.validate_batch(pd.DataFrame([[new_date, new_issue, n1, n2, n3, n4, n5]], columns=['Date', 'Issue'] + NUM_COLS), store)
+        if is_local_source:
+            st.error("⚠️ 本機快照模式為唯讀，請切換到雲端資料來源再寫入。")
+        elif report['skipped']:
+            st.error(f"⚠️ 期數 {new_issue} 已經存在！")
+        elif report['errors']:
+            show_batch_report(report)
+        else:
+            commit_draws(report['rows'])
+            st.success(f"✅ 成功寫入期數 {new_issue}！")
+            st.rerun()
+
+with st.sidebar.expander(f"📦 批次匯入 / 補登【{game_choice}】"):
+    st.caption("上傳 CSV / xlsx (欄位 Date、Issue、N1~N5)，或直接在下方表格補登一段期數；驗證通過後一次寫入。")
+    batch_file = st.file_uploader("上傳開獎檔", type=["csv", "xlsx"], key=f"batch_file_{game_choice}")
+    if batch_file is not None:
+        batch_frame = ingest.read_batch(batch_file.getvalue(), game_choice)
+    else:
+        batch_count = st.number_input("補登期數", min_value=1, max_value=60, value=3, step=1)
+        batch_frame = st.data_editor(
+            ingest.issue_range_frame(auto_next_issue, batch_count, auto_next_date),
+            hide_index=True, key=f"batch_editor_{game_choice}_{auto_next_issue}_{batch_count}",
+        ).dropna(subset=NUM_COLS, how='all')
+    batch_report = ingest.validate_batch(batch_frame, store)
+    show_batch_report(batch_report)
+    if not batch_report['rows'].empty:
+        st.dataframe(batch_report['rows'], hide_index=True)
+        if st.button(f"🚀 一次寫入 {len(batch_report['rows'])} 期", disabled=bool(batch_report['errors'])):
+            if is_local_source:
+                st.error("⚠️ 本機快照模式為唯讀，請切換到雲端資料來源再寫入。")
+            else:
+                commit_draws(batch_report['rows'])
+                st.rerun()
+
+if df.empty:
+    st.title(f"🎯 歡迎啟用【{game_choice}】分析雷達")
+    st.stop()
+
+# ==========================================
+# 🧠 當前選定日的狀態計算
+# ==========================================
+target_draw = store.draw(selected_idx)
+target_date = df['Date'].iat[selected_idx]
+target_issue = int(store.issues[selected_idx])
+
+if selected_idx + 1 < len(store):
+    next_draw = store.draw(selected_idx + 1)
+else:
+    next_draw = []
+
+def count_series(counts):
+    return pd.Series(counts, index=np.arange(1, 40))
+
+with metrics.span('stage', stage='window_counts'):
+    s_long = count_series(store.window_counts(selected_idx + 1, breakout_long_period))
+    s_short = count_series(store.window_counts(selected_idx + 1, breakout_short_period))
+
+with metrics.span('stage', stage='get_predictions'):
+    short_picks, long_picks, consensus_picks, death_seas, sandwiches, geometric_centers, tail_resonances, max_gap, worst_10_picks, breakout_picks = feature_predictions(
+        store, selected_idx, death_sea_gap, include_repeat, s_long, s_short, breakout_long_thresh, breakout_short_thresh
+    )
+
+# ==========================================
+# 🖥️ 頁面 1：🎯 39碼全解析雷達
+# ==========================================
+if page == "🎯 39碼全解析雷達":
+    st.title(f"🎯 {game_choice} 39碼全解析雷達")
+    st.markdown(f"### 基準日：{target_date} (期數 {target_issue}) | 開出號碼： `{target_draw}`")
+    
+    col_a, col_b = st.columns(2)
+    with col_a:
+        st.error(f"""
+        ### 🛑 十大避開地雷 (終極殺牌)
+        歷史頻率與深海交叉比對，動能極度冰凍，建議 **優先剔除**：
+        ## **{', '.join([str(n) for n in worst_10_picks])}**
+        """)
+    with col_b:
+        if breakout_picks:
+            st.success(f"""
+            ### 🚀 底部爆量起漲 (冷轉熱突破號)
+            符合「近{breakout_long_period}期冷門(≤{breakout_long_thresh}次)、近{breakout_short_period}期爆發(≥{breakout_short_thresh}次)」強勢表態：
+            ## **{', '.join([str(n) for n in breakout_picks])}**
+            """)
+        else:
+            st.info(f"""
+            ### 🚀 底部爆量起漲 (冷轉熱突破號)
+            *(今日無符合條件的起漲號碼)*
+            """)
+
+    st.markdown("---")
+    st.markdown("### 📊 長短線雙核心深度戰略報表 (實戰動態微調版)")
+    
+    st.markdown("""
+    💡 **圖例說明**： 
+    <span style='color: #d9534f; background-color: #fff5f5; border: 1px solid #d9534f; padding: 2px 6px; border-radius: 4px; font-weight: bold;'>紅底框號碼</span> 代表為**基準日當天**開出之號碼。
+    <span style='color: #3c763d; background-color: #dff0d8; border: 1px solid #4cae4c; padding: 2px 6px; border-radius: 4px; font-weight: bold;'>綠底框號碼</span> 代表成功命中**下一期**實際開獎！(僅限歷史期數回測可見)
+    """, unsafe_allow_html=True)
+    
+    def get_category_picks_html(picks, category_name):
+        sorted_picks = sorted(list(set(picks))) if picks else []
+        sub_list = []
+        if category_name == "HOT": sub_list = sorted_picks[:5]
+        elif category_name == "WARM": sub_list = sorted_picks[5:10] if len(sorted_picks) > 5 else []
+        elif category_name == "REPEAT_OR_DEAD":
+            if include_repeat: sub_list = [p for p in target_draw if p not in sorted_picks[:10]]
+            else: sub_list = target_draw
+        elif category_name == "NEUTRAL":
+            sub_list = [p for p in range(1, 40) if p not in sorted_picks[:10] and p not in target_draw and not any(s < p < e for s,e in death_seas)]
+        elif category_name == "COLD":
+            sub_list = [p for p in range(1, 40) if any(s < p < e for s,e in death_seas) and p not in target_draw and p not in sorted_picks[:10]]
+        
+        if not sub_list: return "無"
+        
+        formatted = []
+        for p in sub_list:
+            is_target = p in target_draw
+            is_next = p in next_draw
+            
+            if is_target and is_next:
+                formatted.append(f"<span style='color: #fff; background-color: #8a6d3b; padding: 2px 6px; border-radius: 4px; font-weight:bold;'>{p:02d}</span>")
+            elif is_next:
+                formatted.append(f"<span style='color: #3c763d; background-color: #dff0d8; border: 1px solid #4cae4c; padding: 2px 6px; border-radius: 4px; font-weight:bold;'>{p:02d}</span>")
+            elif is_target:
+                formatted.append(f"<span style='color: #d9534f; background-color: #fff5f5; border: 1px solid #d9534f; padding: 2px 6px; border-radius: 4px; font-weight:bold;'>{p:02d}</span>")
+            else:
+                formatted.append(f"<span style='font-size:16px;'>{p:02d}</span>")
+                
+        return "<span style='line-height: 2.2;'>" + "&nbsp;&nbsp;".join(formatted) + "</span>"
+
+    row3_icon = "♻️ **連莊觀察區**<br>*(昨日開出)*" if include_repeat else "💀 **最不可能開出**<br>*(全殺棄子)*"
+
+    html_span = metrics.span('stage', stage='radar_html').start()
+    html_table = f"""
+<table style="width:100%; border-collapse: collapse; text-align: left; font-size: 16px;">
+<tr style="background-color: #f0f2f6;">
+<th style="padding: 12px; border: 1px solid #ddd; width: 15%;">推薦等級</th>
+<th style="padding: 12px; border: 1px solid #ddd; width: 42%;">長線平衡派 (抄底與修補)</th>
+<th style="padding: 12px; border: 1px solid #ddd; width: 43%;">短線動能派 (順勢與擴散)</th>
+</tr>
+<tr>
+<td style="padding: 12px; border: 1px solid #ddd;">🔥 **極可能開出**<br>*(必買主支)*</td>
+<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(long_picks, 'HOT')}</td>
+<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(short_picks, 'HOT')}</td>
+</tr>
+<tr>
+<td style="padding: 12px; border: 1px solid #ddd;">⭐ **高機率開出**<br>*(強勢輔助)*</td>
+<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(long_picks, 'WARM')}</td>
+<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(short_picks, 'WARM')}</td>
+</tr>
+<tr>
+<td style="padding: 12px; border: 1px solid #ddd;">{row3_icon}</td>
+<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(long_picks, 'REPEAT_OR_DEAD')}</td>
+<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(short_picks, 'REPEAT_OR_DEAD')}</td>
+</tr>
+<tr>
+<td style="padding: 12px; border: 1px solid #ddd;">⚖️ **中等機率**</td>
+<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(long_picks, 'NEUTRAL')}</td>
+<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(short_picks, 'NEUTRAL')}</td>
+</tr>
+<tr>
+<td style="padding: 12px; border: 1px solid #ddd;">❄️ **低機率**</td>
+<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(long_picks, 'COLD')}</td>
+<td style="padding: 12px; border: 1px solid #ddd;">{get_category_picks_html(short_picks, 'COLD')}</td>
+</tr>
+</table>
+"""
+    html_span.stop()
+    st.markdown(html_table, unsafe_allow_html=True)
+
+    st.markdown("---")
+    
+    # ==========================================
+    # 🎡 包牌產生器 (覆蓋設計)
+    # ==========================================
+    st.header("🎡 包牌產生器 (覆蓋設計)")
+    st.markdown("號碼池有 8~15 顆時，全部包下來太貴。系統會求出**最少注數**的組合：只要當期開出的 5 碼中有 **m 顆**落在池內，就**保證至少一注中 k 顆**。同一組 (池大小, k, m) 解過一次就存檔，之後直接取用。")
+    wheel_source_labels = {'consensus': "⭐️ 雙重共識", 'hot': "🔥 必買主支 (HOT)", 'warm': "⭐ 強勢輔助 (WARM)", 'breakout': "🚀 突破號"}
+    wheel_sources = st.multiselect("號碼池來源", list(wheel_source_labels), default=['consensus', 'hot', 'breakout'], format_func=wheel_source_labels.get)
+    radar_pick_bits = {
+        'consensus': numbers_to_bits(consensus_picks), 'short': numbers_to_bits(short_picks),
+        'long': numbers_to_bits(long_picks), 'breakout': numbers_to_bits(breakout_picks),
+    }
+    default_pool = bits_to_numbers(wheels.pool_bits(radar_pick_bits, wheel_sources))
+    wheel_pool = st.multiselect(f"號碼池 (可再增刪，{wheels.MIN_POOL} ~ {wheels.MAX_POOL} 顆)", list(range(1, 40)), default=default_pool[:wheels.MAX_POOL], max_selections=wheels.MAX_POOL)
+    
+    col_w1, col_w2, col_w3 = st.columns(3)
+    with col_w1:
+        wheel_m = st.selectbox("池中開出 m 顆", [2, 3, 4, 5], index=1)
+    with col_w2:
+        wheel_k = st.selectbox("保證至少一注中 k 顆", list(range(1, wheel_m + 1)), index=min(2, wheel_m - 1))
+    with col_w3:
+        wheel_budget = st.slider("⏱️ 搜尋時間上限 (秒)", min_value=0.5, max_value=10.0, value=float(wheels.WHEEL_BUDGET), step=0.5)
+    wheel_improve = st.button("🔁 再搜尋一輪 (嘗試用更少注)")
+    
+    if len(wheel_pool) < wheels.MIN_POOL:
+        st.info(f"號碼池目前 {len(wheel_pool)} 顆，至少需要 {wheels.MIN_POOL} 顆才能組成 5 碼注單。")
+    else:
+        with st.spinner(f"正在求解 {len(wheel_pool)} 碼池「中 {wheel_m} 保 {wheel_k}」的最少注數..."):
+            with metrics.span('stage', stage='wheel_tickets'):
+                wheel = wheels.wheel_tickets(wheel_pool, wheel_k, wheel_m, wheel_budget, improve=wheel_improve)
+        wheel_count = len(wheel['tickets'])
+        col_wm1, col_wm2, col_wm3 = st.columns(3)
+        col_wm1.metric("🎫 注數", f"{wheel_count} 注")
+        col_wm2.metric("💰 成本", f"{wheel_count * wheels.TICKET_PRICE:,} 元")
+        col_wm3.metric("📦 全包需要", f"{comb(len(wheel_pool), 5):,} 注")
+        st.caption(f"{'✅ 取用已存檔的設計' if wheel['status'] == 'hit' else '🧮 本次重新求解'}，此設計累積搜尋 {wheel['searched']:.1f} 秒")
+        wheel_rows = []
+        for n, ticket in enumerate(wheel['tickets'], start=1):
+            row = {"#": n, "🎫 注單": " ".join(f"{x:02d}" for x in ticket)}
+            if next_draw:
+                row["✅ 下期命中"] = len(set(ticket) & set(next_draw))
+            wheel_rows.append(row)
+        st.dataframe(pd.DataFrame(wheel_rows), use_container_width=True, hide_index=True)
+        if next_draw:
+            _, wheel_paid = wheels.wheel_payout(wheel['masks'], numbers_to_bits(next_draw))
+            st.success(f"📬 下一期開獎 `{next_draw}`：池內開出 {len(set(wheel_pool) & set(next_draw))} 顆，這組包牌獎金 **{wheel_paid:,} 元** (成本 {wheel_count * wheels.TICKET_PRICE:,} 元)")
+    
+    with st.expander("📈 包牌回測 (以 539 獎金表計算)"):
+        st.markdown("每一期都用**當期**的號碼池來源重新組池、包牌，對下一期開獎計算獎金；池小於 5 顆或大於 15 顆的期別不下注。")
+        wheel_bt_draws = st.number_input("回測最近 N 期", min_value=10, max_value=500, value=100, step=10, key="wheel_bt_draws")
+        if st.button("🚀 開始包牌回測"):
+            with st.spinner("正在逐期包牌並對獎..."):
+                with metrics.span('stage', stage='wheel_backtest'):
+                    wheel_bt = wheels.wheel_backtest(store, strategy_params, wheel_sources, wheel_k, wheel_m, selected_idx - wheel_bt_draws, selected_idx, wheel_budget)
+            summary = wheel_bt['summary']
+            col_bt1, col_bt2, col_bt3, col_bt4 = st.columns(4)
+            col_bt1.metric("下注期數", f"{summary['played']} / {summary['draws']}")
+            col_bt2.metric("總成本", f"{summary['cost']:,} 元")
+            col_bt3.metric("總獎金", f"{summary['payout']:,} 元")
+            col_bt4.metric("報酬率", f"{summary['roi']:.1f} %")
+            st.write(f"池內開出 ≥ {wheel_m} 顆的期數：**{summary['guaranteed']}** 期，其中保證中 {wheel_k} 顆兌現 **{summary['guarantee_met']}** 期。")
+            st.bar_chart(pd.Series(summary['best_hits'], index=[f"{h} 顆" for h in range(6)], name="期數"))
+            st.dataframe(pd.DataFrame([{
+                "期數": int(store.issues[r['position'] + 1]), "號碼池": " ".join(f"{x:02d}" for x in r['pool']),
+                "池內開出": r['in_pool'], "注數": r['tickets'], "最佳命中": r['best_hits'], "成本": r['cost'], "獎金": r['payout'],
+            } for r in reversed(wheel_bt['rows'])]), use_container_width=True, hide_index=True)
+
+# ==========================================
+# 🖥️ 頁面 2：⚔️ 雙引擎策略看板
+# ==========================================
+elif page == "⚔️ 雙引擎策略看板":
+    st.title(f"⚔️ {game_choice} 雙引擎策略決策看板")
+    st.markdown(f"### 基準日：{target_date} (期數 {target_issue}) | 開出號碼： `{target_draw}`")
+    st.markdown("---")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.error("🔴 短線動能派")
+        st.markdown("#### 🔥 順勢動能 (+1 / -1)")
+        st.info(f"建議名單： {short_picks}" if short_picks else "*(今日無)*")
+        st.markdown(f"#### 💀 避開死水 (斷層大於 {death_sea_gap} 碼的區間)")
+        if death_seas:
+            for sea in death_seas:
+                s_text = "01" if sea[0] == 0 else f"{sea[0]+1:02d}"
+                e_text = "39" if sea[1] == 40 else f"{sea[1]-1:02d}"
+                st.warning(f"🚫 `{s_text} ~ {e_text}` (間距: {sea[1]-sea[0]-1})")
+        else:
+            st.success("今日無大型斷層區。")
+
+    with col2:
+        st.info("🔵 長線平衡派")
+        st.markdown("#### 🎯 史詩斷層 (幾何中心)")
+        st.markdown(f"*(當前最大斷層間距為: {max_gap})*")
+        st.error(f"建議名單： {geometric_centers}" if geometric_centers else "*(無明顯斷層)*")
+        st.markdown("#### 🥪 黃金對稱 (必補夾心)")
+        st.error(f"建議名單： {sandwiches}" if sandwiches else "*(今日未成形)*")
+        st.markdown("#### 🧲 同尾數共鳴 (家族召喚)")
+        st.error(f"建議名單： {tail_resonances}" if tail_resonances else "*(今日無同尾數)*")
+
+    st.markdown("---")
+    st.header("⭐️ 雙重共識牌 (疊加勝率)")
+    if consensus_picks: st.success(f"### 🎯 極高勝率主支： {consensus_picks}")
+    else: st.warning("今日兩派未達成共識，建議分開參考上方指標。")
+
+    st.markdown("---")
+    
+    # ==========================================
+    # 🎫 全組合智能選號 (575,757 注一次評分)
+    # ==========================================
+    st.header("🎫 全組合智能選號")
+    st.markdown("把上方名單直接變成整注：系統對 **C(39,5) = 575,757 注** 全部評分，依「共識、短線、長線、突破號的命中顆數」與「長短線熱度」加權排序，並可一鍵剔除碰到殺牌的注。")
+    col_t1, col_t2 = st.columns(2)
+    with col_t1:
+        ticket_k = st.number_input("🎫 列出前 K 注", min_value=1, max_value=50, value=10, step=1)
+    with col_t2:
+        ticket_exclude_kill = st.checkbox("🛡️ 剔除含殺牌 (冷門 10 碼) 的注", value=True)
+    with st.expander("⚖️ 評分權重"):
+        weight_cols = st.columns(len(tickets.TICKET_FEATURES))
+        ticket_weight_labels = {
+            'consensus': "⭐️ 共識", 'short': "🔴 短線", 'long': "🔵 長線",
+            'breakout': "🚀 突破", 'short_freq': "🔥 短線熱度", 'long_freq': "🌡️ 長線熱度",
+        }
+        ticket_weights = {
+            field: col.number_input(ticket_weight_labels[field], min_value=0.0, max_value=10.0, value=float(tickets.TICKET_WEIGHTS[field]), step=0.5, key=f"ticket_weight_{field}")
+            for field, col in zip(tickets.TICKET_FEATURES, weight_cols)
+        }
+    
+    ticket_picks = {
+        'consensus': numbers_to_bits(consensus_picks), 'short': numbers_to_bits(short_picks),
+        'long': numbers_to_bits(long_picks), 'breakout': numbers_to_bits(breakout_picks),
+    }
+    ticket_kill = numbers_to_bits(worst_10_picks) if ticket_exclude_kill else 0
+    with metrics.span('stage', stage='rank_tickets'):
+        ticket_rows = tickets.rank_tickets(
+            tickets.ticket_table(), ticket_picks, s_long.values, s_short.values,
+            breakout_long_period, breakout_short_period, ticket_k, ticket_kill, ticket_weights,
+        )
+    if ticket_rows:
+        ticket_df = pd.DataFrame([{
+            "🎫 推薦注": " ".join(f"{n:02d}" for n in row['numbers']),
+            "分數": round(row['score'], 2),
+            "⭐️ 共識": row['consensus'], "🔴 短線": row['short'], "🔵 長線": row['long'], "🚀 突破": row['breakout'],
+            "🔥 短線熱度": round(row['short_freq'], 2), "🌡️ 長線熱度": round(row['long_freq'], 2),
+            **({"✅ 下期命中": len(set(row['numbers']) & set(next_draw))} if next_draw else {}),
+        } for row in ticket_rows])
+        st.dataframe(ticket_df, use_container_width=True, hide_index=True)
+    else:
+        st.warning("排除殺牌後已沒有可選的注。")
+    
+    with st.expander("📈 選號回測 (每期重新評分全部注)"):
+        ticket_bt_draws = st.number_input("回測最近 N 期", min_value=10, max_value=500, value=100, step=10)
+        if st.button("🚀 開始選號回測"):
+            with st.spinner(f"正在對 {ticket_bt_draws} 期逐期評分 575,757 注..."):
+                with metrics.span('stage', stage='ticket_backtest'):
+                    ticket_bt = tickets.ticket_backtest(
+                        store, strategy_params, selected_idx - ticket_bt_draws, selected_idx, ticket_k,
+                        ticket_exclude_kill, ticket_weights,
+                    )
+            bt_rows = len(ticket_bt['best_hits'])
+            if bt_rows:
+                total = ticket_bt['distribution'].sum(axis=0)
+                avg_hits = (total * np.arange(6)).sum() / total.sum()
+                col_b1, col_b2, col_b3 = st.columns(3)
+                col_b1.metric("每注平均命中", f"{avg_hits:.2f} 顆", f"{avg_hits - 25 / 39:+.2f} (隨機 0.64)")
+                col_b2.metric("前 K 注最佳命中 ≥ 2 顆", f"{(ticket_bt['best_hits'] >= 2).mean() * 100:.1f} %")
+                col_b3.metric("前 K 注最佳命中 ≥ 3 顆", f"{(ticket_bt['best_hits'] >= 3).mean() * 100:.1f} %")
+                st.bar_chart(pd.Series(np.bincount(ticket_bt['best_hits'], minlength=6), index=[f"{h} 顆" for h in range(6)], name="期數"))
+            else:
+                st.info("基準日之前的資料不足以回測。")
+
+# ==========================================
+# 🖥️ 頁面 3：📈 回測與勝率追蹤
+# ==========================================
+elif page == "📈 回測與勝率追蹤":
+    st.title(f"📈 {game_choice} 策略勝率與全面回測追蹤")
+    
+    test_periods = 100
+    if len(df) > test_periods:
+        results = []
+        start_idx = len(df) - test_periods - 1
+        # 帳本以 (彩種, 參數, 資料指紋) 存在磁碟，新開獎寫入後只補算新的那一列
+        with metrics.span('stage', stage='backtest_ledger'):
+            ledger, ledger_status = backtest_ledger(store, game_choice, SOURCE_KEYS[data_source], strategy_params)
+        metrics.incr('backtest_ledger', status=ledger_status)
+        bt, bt_hits, bt_cum = ledger_rows(ledger, start_idx)
+        
+        for row, i in enumerate(range(start_idx, len(store) - 1)):
+            actual_next_draw = store.draw(i + 1)
+            draw_date = df['Date'].iat[i + 1]
+            
+            sp = bits_to_numbers(bt['short'][row])
+            lp = bits_to_numbers(bt['long'][row])
+            worst_10 = bits_to_numbers(bt['worst_10'][row])
+            breakout = bits_to_numbers(bt['breakout'][row])
+            
+            short_hits = int(bt_hits['short_hits'][row])
+            long_hits = int(bt_hits['long_hits'][row])
+            breakout_hits = int(bt_hits['breakout_hits'][row])
+            breakout_suggested = len(breakout)
+            kill_fails = int(bt_hits['kill_fails'][row])
+            successful_kills = 10 - kill_fails
+            
+            results.append({
+                "Date": draw_date,
+                "✅ 實際開獎": str(actual_next_draw),
+                "🔴 短線推薦": str(sp) if sp else "-",
+                "🔴 命中": short_hits,
+                "🔵 長線推薦": str(lp) if lp else "-",
+                "🔵 命中": long_hits,
+                "🚀 突破轉強": str(breakout) if breakout else "-",
+                "🚀 推薦數": breakout_suggested,  
+                "🚀 命中數": breakout_hits,       
+                "💀 十大殺牌": str(worst_10) if worst_10 else "-",
+                "🛡️ 成功閃避": successful_kills
+            })
+        
+        res_df = pd.DataFrame(results).set_index("Date")
+        res_df["🔴 短線累積"] = bt_cum['short_hits']
+        res_df["🔵 長線累積"] = bt_cum['long_hits']
+        
+        total_kills_attempted = len(res_df) * 10
+        total_successful_kills = total_kills_attempted - int(bt_cum['kill_fails'][-1])
+        kill_defense_rate = (total_successful_kills / total_kills_attempted) * 100
+        
+        total_breakout_suggested = int(bt_cum['breakout_suggested'][-1])
+        total_breakout_hits = int(bt_cum['breakout_hits'][-1])
+        breakout_win_rate = (total_breakout_hits / total_breakout_suggested) * 100 if total_breakout_suggested > 0 else 0.0
+        
+        st.markdown("---")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("🔴 短線累積命中", f"{res_df['🔴 短線累積'].iloc[-1]} 顆")
+        col2.metric("🔵 長線累積命中", f"{res_df['🔵 長線累積'].iloc[-1]} 顆")
+        col3.metric(
+            "🚀 突破號狙擊勝率", 
+            f"{breakout_win_rate:.1f} %", 
+            f"共抓出 {total_breakout_suggested} 顆，命中 {total_breakout_hits} 顆",
+            delta_color="normal"
+        )
+        col4.metric("🛡️ 十大殺牌防守率", f"{kill_defense_rate:.1f} %", "越高越好", delta_color="normal")
+        
+        # 🎲 同一組參數套在均勻隨機 5/39 歷史上的表現分佈，p 值 = 隨機策略不輸實際成績的機率
+        if st.toggle("🎲 顯示隨機基準 (Monte Carlo)", help="以同樣參數回測數千段模擬的隨機歷史，看實際成績是否真的勝過運氣。"):
+            n_sims = st.select_slider("模擬次數", options=[500, 1000, 2000, 5000], value=2000)
+            with st.spinner(f"正在模擬 {n_sims} 段隨機歷史..."):
+                baseline = load_baseline(tuple(strategy_params.items()), len(res_df), n_sims)
+            observed = {
+                'short_hits': int(bt_cum['short_hits'][-1]), 'long_hits': int(bt_cum['long_hits'][-1]),
+                'breakout_win_rate': breakout_win_rate, 'kill_defense_rate': kill_defense_rate,
+            }
+            labels = {
+                'short_hits': ("🔴 短線累積命中", "顆"), 'long_hits': ("🔵 長線累積命中", "顆"),
+                'breakout_win_rate': ("🚀 突破號狙擊勝率", "%"), 'kill_defense_rate': ("🛡️ 十大殺牌防守率", "%"),
+            }
+            baseline_rows = []
+            for metric, stats in compare_to_baseline(observed, baseline).items():
+                label, unit = labels[metric]
+                baseline_rows.append({
+                    "指標": label,
+                    "實際": f"{stats['observed']:.1f} {unit}",
+                    "隨機平均": f"{stats['mean']:.1f} {unit}",
+                    "95% 隨機區間": f"{stats['low']:.1f} ~ {stats['high']:.1f} {unit}",
+                    "p 值": round(stats['p_value'], 4),
+                    "判讀": "✅ 顯著優於隨機" if stats['p_value'] < 0.05 else "➖ 與隨機無顯著差異",
+                })
+            st.dataframe(pd.DataFrame(baseline_rows).set_index("指標"), use_container_width=True)
+            st.caption(f"隨機基準：{n_sims} 段均勻隨機歷史 × 每段 {len(res_df)} 期回測 (固定種子，可重現)。")
+        
+        st.line_chart(res_df[["🔴 短線累積", "🔵 長線累積"]])
+        
+        with st.expander("📝 展開查看：每日覆盤明細對帳單"):
+            st.dataframe(res_df[["✅ 實際開獎", "🔴 短線推薦", "🔴 命中", "🔵 長線推薦", "🔵 命中", "🚀 突破轉強", "🚀 命中數", "💀 十大殺牌", "🛡️ 成功閃避"]], use_container_width=True)
+            
+    else:
+        st.warning("⚠️ 資料庫目前不足 100 期，無法進行完整回測。")
+
+    # 全歷史 (或自選區間) 逐期推進：結果逐段寫進磁碟上的欄位檔，邊算邊更新指標與曲線，可中途停止再續跑
+    st.markdown("---")
+    st.header("🚶 全歷史逐期推進回測 (walk-forward)")
+    if len(store) > 1:
+        wf_start, wf_end = st.slider(
+            "回測基準期區間 (第幾期，驗證其下一期)",
+            min_value=0, max_value=len(store) - 1,
+            value=(min(breakout_long_period - 1, len(store) - 2), len(store) - 1),
+        )
+        st.caption(f"期數 {store.issues[wf_start]} → {store.issues[wf_end]}，共 {max(wf_end - wf_start, 0)} 期回測")
+        wf_run = walk_forward_run(store, game_choice, strategy_params, wf_start, wf_end)
+
+        col_run, col_stop = st.columns(2)
+        wf_clicked = col_run.button("▶️ 開始 / 繼續回測")
+        # 按下停止會觸發重新執行，正在跑的迴圈隨之中斷；已寫入的列保留在磁碟，下次從斷點續跑
+        col_stop.button("⏹️ 停止")
+
+        wf_progress = st.progress(0.0)
+        wf_metrics = st.empty()
+        wf_chart = st.empty()
+
+        def render_walk_forward(run):
+            total = max(run.total, 1)
+            wf_progress.progress(run.done / total, text=f"已完成 {run.done:,} / {run.total:,} 期")
+            summary = run.summary()
+            with wf_metrics.container():
+                c1, c2, c3, c4 = st.columns(4)
+                c1.metric("🔴 短線累積命中", f"{summary['short_hits']} 顆")
+                c2.metric("🔵 長線累積命中", f"{summary['long_hits']} 顆")
+                c3.metric("🚀 突破號狙擊勝率", f"{summary['breakout_win_rate']:.1f} %",
+                          f"共抓出 {summary['breakout_suggested']} 顆，命中 {summary['breakout_hits']} 顆")
+                c4.metric("🛡️ 十大殺牌防守率", f"{summary['kill_defense_rate']:.1f} %")
+            if run.done:
+                # 曲線最多畫約 2000 個點，長歷史也不會拖慢前端
+                cols = run.columns(['issue', 'short_hits_cum', 'long_hits_cum'])
+                step = max(run.done // 2000, 1)
+                wf_chart.line_chart(pd.DataFrame({
+                    "🔴 短線累積": cols['short_hits_cum'][::step],
+                    "🔵 長線累積": cols['long_hits_cum'][::step],
+                }, index=cols['issue'][::step]))
+
+        if wf_clicked and not wf_run.finished:
+            for _ in wf_run.stream(store, strategy_params, chunk=max(min(WALK_CHUNK, wf_run.total // 20), 50)):
+                render_walk_forward(wf_run)
+        else:
+            render_walk_forward(wf_run)
+            if 0 < wf_run.done < wf_run.total:
+                st.info(f"⏸️ 已停止於第 {wf_run.done:,} 期，按「▶️ 開始 / 繼續回測」從斷點接著跑。")
+
+        if wf_run.done:
+            with st.expander("📝 展開查看：逐期推進最近 200 期明細"):
+                cols = wf_run.columns()
+                tail = slice(max(wf_run.done - 200, 0), wf_run.done)
+                st.dataframe(pd.DataFrame({
+                    "期數": cols['issue'][tail],
+                    "🔴 短線推薦": [str(bits_to_numbers(m)) for m in cols['short'][tail]],
+                    "🔴 命中": cols['short_hits'][tail],
+                    "🔵 長線推薦": [str(bits_to_numbers(m)) for m in cols['long'][tail]],
+                    "🔵 命中": cols['long_hits'][tail],
+                    "🚀 突破轉強": [str(bits_to_numbers(m)) for m in cols['breakout'][tail]],
+                    "🚀 命中數": cols['breakout_hits'][tail],
+                    "💀 十大殺牌": [str(bits_to_numbers(m)) for m in cols['worst_10'][tail]],
+                    "🛡️ 成功閃避": 10 - cols['kill_fails'][tail].astype(int),
+                }).set_index("期數"), use_container_width=True)
+
+# ==========================================
+# 🖥️ 頁面 4：📊 頻率機率回測實驗室
+# ==========================================
+elif page == "📊 頻率機率回測實驗室":
+    st.title(f"📊 {game_choice} 頻率機率回測實驗室")
+    st.markdown("""
+    這裡專門驗證**「條件機率」**：如果一個號碼在過去 N 期內出現了 M 次，它下一期**不開出來（殺牌成功）**的真實機率到底是多少？
+    透過歷史回測，我們可以直接找出最安全的**無腦剔除區間**！
+    """)
+    st.markdown("---")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        test_window = st.number_input("🔍 主期數 (跑回測用，近 N 期)", min_value=5, max_value=100, value=30, step=5)
+    with col2:
+        test_window_2 = st.number_input("🔭 副期數 (對比動能用，近 M 期)", min_value=5, max_value=300, value=100, step=10)
+    with col3:
+        test_periods = st.number_input("⏳ 歷史回測樣本數 (近 X 期)", min_value=50, max_value=500, value=150, step=50)
+    surface_range = st.slider("🧭 曲面掃描範圍 (一次算完這個範圍內的所有觀察窗 N)", min_value=5, max_value=100, value=(5, 100))
+        
+    st.markdown("---")
+
+    if len(df) >= test_window + test_periods:
+        with st.spinner('正在進行百萬次交叉比對運算中...'):
+            # 所有觀察窗 N × 所有樣本期一次由前綴和算完，得到 (N × M) 的樣本數與開出數曲面
+            surface_windows = tuple(sorted(
+                {w for w in range(surface_range[0], surface_range[1] + 1) if w + test_periods <= len(df)} | {test_window}
+            ))
+            surface = load_frequency_surface(game_choice, data_source, len(store), int(store.issues[-1]), surface_windows, test_periods, store)
+            
+            results = {}
+            for f, total, hits in window_row(surface, test_window):
+                results[f] = {'總遇見次數': total, '開出次數': hits, '不開次數': total - hits}
+            
+            output = []
+            for f in sorted(results.keys()):
+                total = results[f]['總遇見次數']
+                hits = results[f]['開出次數']
+                misses = results[f]['不開次數']
+                
+                hit_rate = (hits / total * 100) if total > 0 else 0
+                miss_rate = (misses / total * 100) if total > 0 else 0
+                
+                output.append({
+                    "近 N 期出現次數 (M)": f"{f} 次",
+                    "歷史樣本總數": total,
+                    "下期開出": hits,
+                    "下期不開 (殺牌)": misses,
+                    "✨ 開出機率 (做多)": f"{hit_rate:.1f} %",
+                    "🛡️ 不出機率 (殺牌)": f"{miss_rate:.1f} %",
+                    "Raw_Miss_Rate": miss_rate, 
+                    "Raw_Hit_Rate": hit_rate
+                })
+            
+            prob_df = pd.DataFrame(output)
+            st.success(f"✅ 回測完成！以下是近 {test_periods} 期內，以【主期數 {test_window} 期】為觀察窗的機率分佈：")
+            
+            display_df = prob_df.drop(columns=["Raw_Miss_Rate", "Raw_Hit_Rate"])
+            st.dataframe(display_df, use_container_width=True)
+            
+            col_chart1, col_chart2 = st.columns(2)
+            with col_chart1:
+                st.markdown("### 🛡️ 殺牌專屬：不出機率長條圖")
+                st.caption("柱子越高，代表該頻率下期「絕對不開」的機率越大，最適合剔除。")
+                miss_chart_data = prob_df.set_index("近 N 期出現次數 (M)")["Raw_Miss_Rate"]
+                st.bar_chart(miss_chart_data, color="#d9534f")
+                
+            with col_chart2:
+                st.markdown("### ✨ 做多專屬：開出機率長條圖")
+                st.caption("柱子越高，代表該頻率下期「爆發開出」的機率越大，適合買進。")
+                hit_chart_data = prob_df.set_index("近 N 期出現次數 (M)")["Raw_Hit_Rate"]
+                st.bar_chart(hit_chart_data, color="#5cb85c")
+            
+            st.markdown("---")
+            st.markdown("### 🧭 觀察窗全景：哪個 N 最準？")
+            st.caption(f"同一批 {test_periods} 個樣本、{len(surface['windows'])} 個觀察窗一次算完；每個 N 只採計樣本數 ≥ 5 的 M。")
+            best_windows = pd.DataFrame(best_per_window(surface))
+            if not best_windows.empty:
+                top_kill = best_windows.loc[best_windows['kill_rate'].idxmax()]
+                top_hit = best_windows.loc[best_windows['hit_rate'].idxmax()]
+                col_best1, col_best2 = st.columns(2)
+                col_best1.metric("🛡️ 最佳殺牌觀察窗", f"近 {int(top_kill['window'])} 期", f"出現 {int(top_kill['kill_m'])} 次 → 不出 {top_kill['kill_rate']:.1f} %")
+                col_best2.metric("✨ 最佳做多觀察窗", f"近 {int(top_hit['window'])} 期", f"出現 {int(top_hit['hit_m'])} 次 → 開出 {top_hit['hit_rate']:.1f} %")
+                st.line_chart(best_windows.set_index('window')[['kill_rate', 'hit_rate']].rename(
+                    columns={'kill_rate': "🛡️ 最強殺牌不出率", 'hit_rate': "✨ 最強主支開出率"}
+                ))
+            
+            with st.expander("🌡️ 展開查看：開出機率熱力圖 (縱軸 N、橫軸 M)"):
+                hit_rate_surface, _ = surface_rates(surface)
+                heat_df = pd.DataFrame(
+                    np.where(surface['totals'] >= 5, hit_rate_surface, np.nan),
+                    index=pd.Index(surface['windows'], name="近 N 期"),
+                    columns=[f"{m} 次" for m in range(surface['totals'].shape[1])]
+                ).dropna(axis=1, how='all')
+                st.dataframe(heat_df.style.background_gradient(cmap="RdYlGn", axis=None).format(precision=1, na_rep=""), use_container_width=True)
+            
+            st.markdown("---")
+            st.markdown(f"### 🎯 明日實戰指南：以 {test_window} 期頻率精準打擊")
+            
+            latest_freq = count_series(store.window_counts(selected_idx + 1, test_window))
+            
+            valid_probs = prob_df[prob_df["歷史樣本總數"] >= 5]
+            if not valid_probs.empty:
+                best_kill_row = valid_probs.loc[valid_probs["Raw_Miss_Rate"].idxmax()]
+                best_kill_freq = int(best_kill_row["近 N 期出現次數 (M)"].replace(" 次", ""))
+                best_kill_prob = best_kill_row["🛡️ 不出機率 (殺牌)"]
+                kill_nums = [n for n in range(1, 40) if latest_freq[n] == best_kill_freq]
+                
+                best_hit_row = valid_probs.loc[valid_probs["Raw_Hit_Rate"].idxmax()]
+                best_hit_freq = int(best_hit_row["近 N 期出現次數 (M)"].replace(" 次", ""))
+                best_hit_prob = best_hit_row["✨ 開出機率 (做多)"]
+                hit_nums = [n for n in range(1, 40) if latest_freq[n] == best_hit_freq]
+                
+                col_guide1, col_guide2 = st.columns(2)
+                with col_guide1:
+                    st.error(f"""
+                    🛑 **最強殺牌區 (建議剔除)**
+                    歷史回測顯示，主期數出現「**{best_kill_freq} 次**」的號碼，下期不開機率高達 **{best_kill_prob}**。
+                    明日建議優先剔除：
+                    ## `{kill_nums}`
+                    """)
+                with col_guide2:
+                    st.success(f"""
+                    🚀 **最強主支區 (建議買進)**
+                    歷史回測顯示，主期數出現「**{best_hit_freq} 次**」的號碼，下期開出機率高達 **{best_hit_prob}**。
+                    明日建議優先考慮：
+                    ## `{hit_nums}`
+                    """)
+            
+            with st.expander("🔍 詳細查看：39碼目前各頻率狀態 (視覺標籤升級版)"):
+                
+                st.markdown("""
+                💡 **圖例說明**： 
+                <span style='color: #d9534f; background-color: #fff5f5; border: 1px solid #d9534f; padding: 2px 6px; border-radius: 4px; font-weight: bold;'>紅底框號碼</span> 代表為**基準日當天**開出之號碼。
+                <span style='color: #3c763d; background-color: #dff0d8; border: 1px solid #4cae4c; padding: 2px 6px; border-radius: 4px; font-weight: bold;'>綠底框號碼</span> 代表成功命中**下一期**實際開獎！(僅限歷史期數回測可見)
+                """, unsafe_allow_html=True)
+                
+                latest_freq_2 = count_series(store.window_counts(selected_idx + 1, test_window_2))
+                
+                freq_dict = {}
+                for n in range(1, 40):
+                    f = latest_freq[n]
+                    if f not in freq_dict: freq_dict[f] = []
+                    freq_dict[f].append(n)
+                
+                avg_f = test_window * 5 / 39
+                
+                html_freq_table = f"""
+<table style="width:100%; border-collapse: collapse; text-align: left; font-size: 16px; line-height: 2.2;">
+<tr style="background-color: #f0f2f6;">
+<th style="padding: 12px; border: 1px solid #ddd; width: 20%;">短線熱度 ({test_window}期)</th>
+<th style="padding: 12px; border: 1px solid #ddd; width: 80%;">號碼分佈 <span style='font-size:13px; font-weight:normal; color:#666;'>&nbsp;*(灰色括號內為 {test_window_2} 期之長線基期次數)*</span></th>
+</tr>
+"""
+                for f in sorted(freq_dict.keys(), reverse=True):
+                    if f >= avg_f * 1.5: icon, color = "🔥", "#d9534f"
+                    elif f >= avg_f: icon, color = "⭐", "#f0ad4e"
+                    elif f > 1: icon, color = "⚖️", "#333333"
+                    elif f == 1: icon, color = "❄️", "#5bc0de"
+                    else: icon, color = "💀", "#999999"
+                        
+                    nums_html = []
+                    for n in sorted(freq_dict[f]):
+                        long_f = latest_freq_2[n]
+                        is_target = n in target_draw
+                        is_next = n in next_draw
+                        
+                        if is_target and is_next:
+                            nums_html.append(f"<span style='display:inline-block; margin-right:15px;'><span style='color: #fff; background-color: #8a6d3b; padding: 2px 6px; border-radius: 4px; font-weight:bold; font-size:18px;'>{n:02d}</span> <span style='color:#888; font-size:13px;'>(長: {long_f}次)</span></span>")
+                        elif is_next:
+                            nums_html.append(f"<span style='display:inline-block; margin-right:15px;'><span style='color: #3c763d; background-color: #dff0d8; border: 1px solid #4cae4c; padding: 2px 6px; border-radius: 4px; font-weight:bold; font-size:18px;'>{n:02d}</span> <span style='color:#888; font-size:13px;'>(長: {long_f}次)</span></span>")
+                        elif is_target:
+                            nums_html.append(f"<span style='display:inline-block; margin-right:15px;'><span style='color: #d9534f; background-color: #fff5f5; border: 1px solid #d9534f; padding: 2px 6px; border-radius: 4px; font-weight:bold; font-size:18px;'>{n:02d}</span> <span style='color:#d9534f; font-size:13px;'>(長: {long_f}次)</span></span>")
+                        else:
+                            nums_html.append(f"<span style='display:inline-block; margin-right:15px;'><b style='font-size:18px;'>{n:02d}</b> <span style='color:#888; font-size:13px;'>(長: {long_f}次)</span></span>")
+                    
+                    nums_str = "".join(nums_html)
+                    
+                    html_freq_table += f"""
+<tr>
+<td style="padding: 12px; border: 1px solid #ddd; color: {color};"><b>{icon} 出現 {f} 次</b></td>
+<td style="padding: 12px; border: 1px solid #ddd;">{nums_str}</td>
+</tr>
+"""
+                html_freq_table += "</table>"
+                
+                st.markdown(html_freq_table, unsafe_allow_html=True)
+
+    else:
+        st.warning(f"⚠️ 資料庫數據不足！需要至少 {test_window + test_periods} 期資料才能進行此回測。")
+
+# ==========================================
+# 🖥️ 頁面 5：🧊 遺漏值實驗室
+# ==========================================
+elif page == "🧊 遺漏值實驗室":
+    st.title(f"🧊 {game_choice} 遺漏值實驗室")
+    st.markdown("""
+    **遺漏值**是一個號碼連續沒開出的期數 (基準日剛開出為 0)。每個號碼冷熱節奏不同，
+    同樣遺漏 15 期，對常客是罕見的長冷、對冷門號可能只是家常便飯；
+    所以這裡把目前的遺漏值放回**該號碼自己的歷史遺漏分布**裡看百分位：
+    落在**回補區**視為買進訊號，超過自身極限的**深度冰凍**號碼則列為殺牌。
+    """)
+    st.markdown("---")
+    
+    drought_index = load_drought_index(game_choice, data_source, len(store), int(store.issues[-1]), store)
+    
+    col_dr1, col_dr2, col_dr3 = st.columns(3)
+    with col_dr1:
+        drought_kill_pct = st.slider("💀 殺牌門檻 (遺漏超過自身百分位)", min_value=80, max_value=99, value=int(KILL_PERCENTILE), step=1)
+    with col_dr2:
+        drought_buy_band = st.slider("🚀 回補區 (自身百分位區間)", min_value=0, max_value=100, value=(int(BUY_BAND[0]), int(BUY_BAND[1])), step=5)
+    with col_dr3:
+        drought_min_samples = st.number_input("最少歷史遺漏樣本數", min_value=1, max_value=50, value=MIN_SAMPLES, step=1)
+    
+    drought_now = drought_index.report(selected_idx + 1)
+    drought_now_signals = drought_signals(drought_now, drought_kill_pct, drought_buy_band, drought_min_samples)
+    drought_kill_nums = bits_to_numbers(drought_now_signals['kill'])
+    drought_buy_nums = bits_to_numbers(drought_now_signals['buy'])
+    
+    col_sig1, col_sig2 = st.columns(2)
+    with col_sig1:
+        st.success(f"""
+        🚀 **回補訊號 (遺漏落在自身 {drought_buy_band[0]}% ~ {drought_buy_band[1]}% 百分位)**
+        ## `{drought_buy_nums}`
+        """)
+        buy_consensus = sorted(set(drought_buy_nums) & set(consensus_picks))
+        if buy_consensus:
+            st.write(f"⭐️ 與今日雙重共識牌重疊： `{buy_consensus}`")
+    with col_sig2:
+        st.error(f"""
+        💀 **深度冰凍 (遺漏超過自身 {drought_kill_pct}% 百分位，建議剔除)**
+        ## `{drought_kill_nums}`
+        """)
+        kill_overlap = sorted(set(drought_kill_nums) & set(worst_10_picks))
+        if kill_overlap:
+            st.write(f"🛡️ 與十大殺牌重疊： `{kill_overlap}`")
+    
+    if next_draw:
+        buy_hit = sorted(set(drought_buy_nums) & set(next_draw))
+        kill_fail = sorted(set(drought_kill_nums) & set(next_draw))
+        st.info(f"🔮 下一期實際開出 `{next_draw}`：回補訊號命中 {len(buy_hit)} 顆 `{buy_hit}`，深度冰凍誤殺 {len(kill_fail)} 顆 `{kill_fail}`")
+    
+    st.markdown("---")
+    st.header("📋 39 碼遺漏值總表")
+    st.caption(f"統計至第 {target_issue} 期 (共 {selected_idx + 1} 期)；百分位 = 歷史遺漏中比目前短的比例 (相同者算一半)。")
+    drought_df = pd.DataFrame({
+        "號碼": np.arange(1, 40),
+        "目前遺漏": drought_now['drought'],
+        "自身百分位": np.round(drought_now['percentile'], 1),
+        "歷史遺漏樣本": drought_now['samples'],
+        "中位數": drought_now['median'],
+        "P90": drought_now['p90'],
+        "最長遺漏": drought_now['max'],
+    })
+    drought_df["訊號"] = np.where(
+        np.isin(drought_df["號碼"], drought_kill_nums), "💀 冰凍",
+        np.where(np.isin(drought_df["號碼"], drought_buy_nums), "🚀 回補", "")
+    )
+    col_table, col_chart = st.columns([3, 2])
+    with col_table:
+        st.dataframe(drought_df.sort_values("自身百分位", ascending=False, kind="stable"), use_container_width=True, hide_index=True)
+    with col_chart:
+        st.markdown("#### 目前遺漏 vs 自身中位數")
+        st.bar_chart(drought_df.set_index("號碼")[["目前遺漏", "中位數"]])
+    
+    st.markdown("---")
+    st.header("📈 遺漏訊號回測")
+    drought_test_periods = st.number_input("回測最近 N 期", min_value=50, max_value=3000, value=300, step=50, key="drought_test_periods")
+    drought_start = max(selected_idx - drought_test_periods, 0)
+    drought_bt = drought_backtest(drought_index, drought_start, selected_idx, drought_kill_pct, drought_buy_band, drought_min_samples)
+    drought_summary = summarize_drought(drought_bt)
+    if drought_summary['draws']:
+        st.caption(f"基準期第 {int(store.issues[drought_start])} 期 ~ 第 {int(store.issues[selected_idx - 1])} 期，逐期以當時的遺漏分布出訊號、對下一期開獎。")
+        col_bt1, col_bt2, col_bt3 = st.columns(3)
+        col_bt1.metric("🚀 回補訊號命中率", f"{drought_summary['buy_hit_rate']:.1f} %", f"{drought_summary['buy_hit_rate'] - drought_summary['random_hit_rate']:+.1f} % vs 隨機")
+        col_bt2.metric("🛡️ 冰凍殺牌防守率", f"{drought_summary['kill_defense_rate']:.1f} %", f"{drought_summary['kill_defense_rate'] - (100 - drought_summary['random_hit_rate']):+.1f} % vs 隨機")
+        col_bt3.metric("平均每期訊號數", f"買 {drought_summary['buy_suggested'] / drought_summary['draws']:.1f} / 殺 {drought_summary['kill_suggested'] / drought_summary['draws']:.1f}")
+        with st.expander("📜 展開查看：逐期明細 (最近 20 期)"):
+            tail = slice(-20, None)
+            st.dataframe(pd.DataFrame({
+                "基準期數": store.issues[drought_bt['positions'][tail]],
+                "🚀 回補訊號": [str(bits_to_numbers(m)) for m in drought_bt['buy'][tail]],
+                "命中": drought_bt['buy_hits'][tail],
+                "💀 冰凍殺牌": [str(bits_to_numbers(m)) for m in drought_bt['kill'][tail]],
+                "誤殺": drought_bt['kill_fails'][tail],
+            }).iloc[::-1], use_container_width=True, hide_index=True)
+    else:
+        st.warning("⚠️ 基準日之前沒有可回測的期數，請在時光機選擇較新的期數。")
+
+# ==========================================
+# 🖥️ 頁面 6：🧬 關聯矩陣(拖牌)實驗室 (✨ 殺牌絕緣體大升級版)
+# ==========================================
+elif page == "🧬 關聯矩陣(拖牌)實驗室":
+    st.title(f"🧬 {game_choice} 關聯矩陣 (拖牌與絕緣) 實驗室")
+    st.markdown("""
+    利用**「馬可夫鏈（Markov Chain）」**概念打造的條件機率尋標器。
+    系統會掃描歷史數據庫：**「當某個號碼開出時，下一期哪顆號碼最常跟著開出？又有哪顆號碼『絕對不跟著開』？」** 幫您找出號碼間的最強量子糾纏（買進）與絕對絕緣體（殺牌）！
+    """)
+    st.markdown("---")
+    
+    st.header(f"🎯 明日戰略：今日開出號碼的「最強拖牌與絕緣矩陣」")
+    st.markdown(f"**今日（基準日）開出號碼：** `{target_draw}`")
+    
+    lookback = st.slider("歷史追溯期數 (分析過去 N 期內的拖牌關聯)", min_value=50, max_value=500, value=200, step=50)
+    
+    if len(df) > lookback:
+        with st.spinner("正在進行矩陣交叉運算..."):
+            # 轉移矩陣與出現次數都由累積陣列相減取得，不再逐期掃描
+            transition_index = load_transition_index(game_choice, data_source, len(store), int(store.issues[-1]), store)
+            transition_matrix, lead_counts = window_matrix(transition_index, store.prefix, selected_idx + 1, lookback)
+            # 同次數的拖牌依第一次跟著開出的先後排 (與原本 value_counts 相同)
+            first_follow = window_first_follow(transition_index, selected_idx + 1, lookback)
+            
+            matrix_data = []
+            follower_rows = follower_report(transition_matrix, lead_counts, target_draw, first_follow)
+            
+            # 針對今天開出的每一顆號碼，列出它的歷史拖牌與絕緣牌
+            for row in follower_rows:
+                top_3_str = ", ".join([f"{k:02d} ({v}次)" for k, v in row['top_3']])
+                
+                if row['never']:
+                    # 如果有從未開出的號碼，直接列出
+                    never_drawn_str = ", ".join([f"{n:02d}" for n in row['never']])
+                else:
+                    # 如果全部39碼都至少開過一次，就列出頻率最低的墊底牌
+                    never_drawn_str = "無 0次 (墊底冷牌: " + ", ".join([f"{k:02d} ({v}次)" for k, v in row['bottom_3']]) + ")"
+                    
+                matrix_data.append({
+                    "今日開出號碼": f"{row['number']:02d}",
+                    "歷史樣本(次)": row['appearances'],
+                    "🏆 下期最常跟著開 (最強拖牌)": top_3_str,
+                    "🛑 下期從未跟著開 (絕對絕緣)": never_drawn_str
+                })
+            
+            if matrix_data:
+                matrix_df = pd.DataFrame(matrix_data)
+                st.dataframe(matrix_df, use_container_width=True)
+                
+                col_res1, col_res2 = st.columns(2)
+                resonances = resonance_picks(follower_rows)
+                
+                with col_res1:
+                    # 尋找「共振主支」：被多顆號碼同時拖出的牌
+                    strong_resonances = resonances['buy']
+                    
+                    if strong_resonances:
+                        st.success(f"""
+                        ### 🔥 終極共振主支 (建議買進)
+                        ## `{sorted(strong_resonances)}`
+                        *(這些號碼同時被今日「多顆」號碼強烈拖出，爆發機率極高！)*
+                        """)
+                    else:
+                        st.info("### 🔥 終極共振主支\n*(今日號碼拖牌較為分散，無強烈共振現象，請直接參考上方表格的首選拖牌)*")
+
+                with col_res2:
+                    # 尋找「共振殺牌」：被多顆號碼同時排斥 (0次拖出) 的牌
+                    # 只要被今天開出的其中 3 顆以上號碼給「聯合排斥」，就是神級殺牌
+                    strong_kills = resonances['kill']
+                    
+                    if strong_kills:
+                        st.error(f"""
+                        ### 🛡️ 終極共振絕緣牌 (強力殺牌)
+                        ## `{sorted(strong_kills)}`
+                        *(這些號碼被今日高達 3 顆以上的號碼「聯合排斥(0次紀錄)」，下期極難開出，建議大膽剔除！)*
+                        """)
+                    else:
+                        # 退一步看有沒有被 2 顆號碼排斥的
+                        strong_kills_2 = resonances['kill_2']
+                        if strong_kills_2:
+                            st.error(f"""
+                            ### 🛡️ 次級共振絕緣牌 (建議殺牌)
+                            ## `{sorted(strong_kills_2)}`
+                            *(這些號碼被今日 2 顆號碼聯合排斥，建議優先避開)*
+                            """)
+                        else:
+                            st.info("### 🛡️ 終極共振絕緣牌\n*(今日無明顯的聯合排斥現象，請參考表格中各號碼的絕緣牌)*")
+            else:
+                st.warning("歷史數據不足以分析這些號碼的拖牌。")
+
+        st.markdown("---")
+        
+        # ==========================================
+        # 🔍 手動拖牌查詢器
+        # ==========================================
+        st.header("🔍 手動拖牌與殺牌查詢器")
+        target_num = st.selectbox("選擇要分析的『母體號碼』", range(1, 40), index=0)
+        
+        # 直接查同一張轉移矩陣的一列，不必重新掃描歷史
+        appearances = int(lead_counts[target_num - 1])
+                
+        if appearances > 0:
+            st.write(f"過去 **{lookback} 期** 中，號碼 **{target_num:02d}** 共開出 **{appearances} 次**。")
+            freq = pd.DataFrame(ranked_followers(transition_matrix[target_num - 1], first_follow[target_num - 1]), columns=['下期開出號碼', '開出次數'])
+            freq['拖牌機率'] = (freq['開出次數'] / appearances * 100).round(1).astype(str) + " %"
+            
+            # ✨ 抓出絕對不會跟著這顆號碼開的「絕緣體」
+            never_drawn_manual = never_followed(transition_matrix[target_num - 1])
+            if never_drawn_manual:
+                st.error(f"🛑 **絕對絕緣體 (0次開出)**：在過去 {lookback} 期中，只要 **{target_num:02d}** 開出，**從未**跟著開出的號碼有： `{never_drawn_manual}`")
+            
+            col_chart1, col_chart2 = st.columns([1, 2])
+            with col_chart1:
+                st.dataframe(freq.head(10), hide_index=True)
+            with col_chart2:
+                chart_data = freq.head(10).set_index('下期開出號碼')['開出次數']
+                st.bar_chart(chart_data, color="#f0ad4e")
+        else:
+            st.write(f"在過去 {lookback} 期內，沒有找到號碼 {target_num} 的開出紀錄。")
+            
+        st.markdown("---")
+        
+        # ==========================================
+        # 🔭 進階關聯查詢：延遲 k 期 / 雙碼同開 / 長期絕緣
+        # ==========================================
+        st.header("🔭 進階關聯查詢：延遲 k 期、雙碼同開、長期絕緣")
+        st.markdown("條件號碼選 2~3 顆時，代表它們**在同一期一起開出**；延遲 k 期看的是 **t → t+k** 的拖牌，絕緣觀察期則是**之後連續 h 期都沒開**的號碼。")
+        
+        # 每個號碼的開出位置存成位元集合，條件查詢只是 AND + 數 1，全歷史也能即時回應
+        assoc_index = load_association_index(game_choice, data_source, len(store), int(store.issues[-1]), store)
+        col_a, col_b, col_c = st.columns(3)
+        cond_nums = col_a.multiselect("條件號碼 (同一期開出)", list(range(1, 40)), default=target_draw[:2], max_selections=3)
+        assoc_lag = col_b.slider("延遲期數 k (t → t+k)", min_value=1, max_value=10, value=1)
+        assoc_horizon = col_c.slider("絕緣觀察期 h (之後連續 h 期)", min_value=2, max_value=20, value=5)
+        assoc_full = st.checkbox("使用全歷史 (不受上方追溯期數限制)", value=False)
+        assoc_start = 0 if assoc_full else max(selected_idx + 1 - lookback, 0)
+        assoc_end = selected_idx + 1
+        
+        if cond_nums:
+            cond_label = " + ".join(f"{n:02d}" for n in sorted(cond_nums))
+            lead_total, lag_counts = assoc_index.followers(cond_nums, assoc_start, assoc_end, assoc_lag)
+            if lead_total > 0:
+                st.write(f"查詢區間內 **{cond_label}** 同期開出共 **{lead_total} 次**。")
+                lag_df = pd.DataFrame(association_table(lead_total, lag_counts), columns=[f'{assoc_lag} 期後開出號碼', '開出次數', '機率'])
+                lag_df['機率'] = lag_df['機率'].round(1).astype(str) + " %"
+                
+                horizon_total, horizon_counts = assoc_index.within_horizon(cond_nums, assoc_horizon, assoc_start, assoc_end)
+                insulated = [int(k) + 1 for k in np.flatnonzero(horizon_counts == 0)]
+                
+                col_lag, col_horizon = st.columns(2)
+                with col_lag:
+                    st.markdown(f"#### 🏆 {assoc_lag} 期後最常開出 (前 10)")
+                    st.dataframe(lag_df.head(10), hide_index=True)
+                with col_horizon:
+                    st.markdown(f"#### 🛑 之後 {assoc_horizon} 期內從未開出")
+                    if horizon_total == 0:
+                        st.info(f"條件成立後都還不滿 {assoc_horizon} 期，無法判斷長期絕緣。")
+                    elif insulated:
+                        st.error(f"在 {horizon_total} 次樣本中，{cond_label} 開出後連續 {assoc_horizon} 期都沒開的號碼： `{insulated}`")
+                    else:
+                        rarest = association_table(horizon_total, horizon_counts)[-3:]
+                        st.info("無完全絕緣號碼 (最少出現: " + ", ".join(f"{k:02d} ({v}/{horizon_total}次)" for k, v, _ in rarest) + ")")
+            else:
+                st.info(f"查詢區間內 {cond_label} 從未同期開出 (或之後不足 {assoc_lag} 期)。")
+            
+    else:
+        st.warning(f"⚠️ 資料庫數據不足！需要至少 {lookback} 期資料才能進行拖牌分析。")
+
+# ==========================================
+# 🖥️ 頁面 7：🧩 組合實驗室
+# ==========================================
+elif page == "🧩 組合實驗室":
+    st.title(f"🧩 {game_choice} 同期組合實驗室")
+    st.markdown("""
+    拖牌看的是**「今天開 A、明天開 B」**；這裡看的是**「A 和 B 在同一期一起開出」**。
+    每期 5 個號碼固定組成 10 組兩碼、10 組三碼，系統把 741 組兩碼與 9,139 組三碼的累積次數預先算好，
+    任何區間的同開次數都是兩個前綴相減，用來檢查共識牌裡**哪些號碼習慣一起出現**。
+    """)
+    st.markdown("---")
+    
+    combo_lookback = st.slider("統計最近 N 期 (以基準日往回算)", min_value=50, max_value=1000, value=300, step=50)
+    combo_full = st.checkbox("使用全歷史 (不受追溯期數限制)", value=False, key="combo_full")
+    combo_end = selected_idx + 1
+    combo_start = 0 if combo_full else max(combo_end - combo_lookback, 0)
+    combo_draws = combo_end - combo_start
+    st.caption(f"統計區間：第 {int(store.issues[combo_start])} 期 ~ 第 {target_issue} 期，共 {combo_draws} 期")
+    
+    combo_index = load_combo_index(game_choice, data_source, len(store), int(store.issues[-1]), store)
+    
+    # ==========================================
+    # ⭐️ 候選號碼的同開體檢
+    # ==========================================
+    st.header("⭐️ 候選號碼同開體檢")
+    default_picks = consensus_picks if len(consensus_picks) >= 2 else sorted(set(short_picks) | set(long_picks))[:6]
+    combo_picks = st.multiselect("候選號碼 (預設為今日雙重共識牌；不足 2 顆時改用短線 + 長線名單)", list(range(1, 40)), default=default_picks, max_selections=8)
+    
+    if len(combo_picks) >= 2:
+        report = combo_report(combo_index, combo_picks, combo_start, combo_end)
+        combo_rows = []
+        for row in report:
+            positions = combo_index.positions(row['combo'], combo_start, combo_end)
+            combo_rows.append({
+                "組合": " + ".join(f"{n:02d}" for n in row['combo']),
+                "同開次數": row['hits'],
+                "隨機期望": round(row['expected'], 2),
+                "倍數 (實際 / 期望)": round(row['lift'], 2),
+                "最近一次同開": f"{int(store.issues[positions[-1]])}" if len(positions) else "—",
+            })
+        combo_df = pd.DataFrame(combo_rows).sort_values(["同開次數", "倍數 (實際 / 期望)"], ascending=False, kind="stable")
+        st.dataframe(combo_df, use_container_width=True, hide_index=True)
+        
+        strong = [r for r in report if len(r['combo']) == 2 and r['lift'] >= 1.5 and r['hits'] >= 2]
+        if strong:
+            st.success("🔗 **習慣同開的搭檔**：" + "、".join(" + ".join(f"{n:02d}" for n in r['combo']) for r in strong) + f"  *(同開次數達隨機期望 1.5 倍以上)*")
+        else:
+            st.info("候選號碼之間沒有明顯高於隨機期望的同開搭檔。")
+    else:
+        st.info("請至少選擇 2 顆候選號碼。")
+    
+    st.markdown("---")
+    
+    # ==========================================
+    # 🤝 單一號碼的最佳搭檔
+    # ==========================================
+    st.header("🤝 單一號碼的同期搭檔")
+    partner_num = st.selectbox("選擇號碼", range(1, 40), index=target_draw[0] - 1, key="combo_partner")
+    appearances = int(store.prefix[combo_end, partner_num - 1] - store.prefix[combo_start, partner_num - 1])
+    if appearances > 0:
+        st.write(f"統計區間內號碼 **{partner_num:02d}** 共開出 **{appearances} 次**。")
+        partners = pd.DataFrame(combo_index.top_partners(partner_num, combo_start, combo_end), columns=['同期號碼', '同開次數'])
+        partners['同開機率'] = (partners['同開次數'] / appearances * 100).round(1).astype(str) + " %"
+        col_partner1, col_partner2 = st.columns([1, 2])
+        with col_partner1:
+            st.dataframe(partners.head(10), hide_index=True)
+        with col_partner2:
+            st.bar_chart(partners.head(10).set_index('同期號碼')['同開次數'], color="#5bc0de")
+        never_together = partners.loc[partners['同開次數'] == 0, '同期號碼'].tolist()
+        if never_together:
+            st.error(f"🛑 統計區間內從未與 **{partner_num:02d}** 同期開出： `{never_together}`")
+    else:
+        st.write(f"統計區間內沒有號碼 {partner_num:02d} 的開出紀錄。")
+    
+    st.markdown("---")
+    
+    # ==========================================
+    # 🏆 熱門兩碼 / 三碼組合
+    # ==========================================
+    st.header("🏆 區間內最常同開的組合")
+    col_pair, col_triple = st.columns(2)
+    with col_pair:
+        st.markdown("#### 兩碼組合 (前 10)")
+        st.dataframe(pd.DataFrame(
+            [(" + ".join(f"{n:02d}" for n in combo), hits) for combo, hits in combo_index.top_pairs(combo_start, combo_end, 10)],
+            columns=['組合', '同開次數']
+        ), hide_index=True)
+    with col_triple:
+        st.markdown("#### 三碼組合 (前 10)")
+        st.dataframe(pd.DataFrame(
+            [(" + ".join(f"{n:02d}" for n in combo), hits) for combo, hits in combo_index.top_triples(combo_start, combo_end, 10)],
+            columns=['組合', '同開次數']
+        ), hide_index=True)
+
+# ==========================================
+# 🖥️ 頁面 8：🧪 參數掃描實驗室
+# ==========================================
+elif page == "🧪 參數掃描實驗室":
+    st.title(f"🧪 {game_choice} 參數掃描實驗室")
+    st.markdown("""
+    一次比較多組側邊欄參數在**完整歷史**上的回測表現，不必再一格一格拉滑桿等待重算。
+    系統會把所有組合分派到多核心平行運算，並依您選的指標排名，最後用熱力圖看出兩個參數之間的甜蜜點。
+    """)
+    st.markdown("---")
+    
+    sweep_labels = {
+        'death_sea_gap': "💀 死亡之海間距", 'include_repeat': "♻️ 包含連莊",
+        'breakout_long_period': "🔭 長線期數", 'breakout_long_thresh': "📉 長線冷門標準",
+        'breakout_short_period': "🔍 短線期數", 'breakout_short_thresh': "📈 短線爆發標準",
+        'draws': "回測期數", 'short_hits': "🔴 短線累積命中", 'long_hits': "🔵 長線累積命中",
+        'breakout_suggested': "🚀 推薦數", 'breakout_hits': "🚀 命中數",
+        'breakout_win_rate': "🚀 突破號勝率 (%)", 'kill_defense_rate': "🛡️ 殺牌防守率 (%)"
+    }
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sweep_gap = st.slider("💀 死亡之海間距範圍", min_value=4, max_value=12, value=(5, 9))
+        sweep_repeat = st.multiselect("♻️ 連莊號", [True, False], default=[True, False], format_func=lambda x: "包含" if x else "排除")
+    with col2:
+        sweep_long_period = st.slider("🔭 長線期數範圍", min_value=30, max_value=300, value=(60, 150), step=10)
+        sweep_long_thresh = st.slider("📉 長線冷門標準範圍", min_value=1, max_value=50, value=(8, 16))
+    with col3:
+        sweep_short_period = st.slider("🔍 短線期數範圍", min_value=5, max_value=50, value=(10, 30), step=5)
+        sweep_short_thresh = st.slider("📈 短線爆發標準範圍", min_value=1, max_value=15, value=(2, 4))
+    
+    sweep_choices = {
+        'death_sea_gap': range(sweep_gap[0], sweep_gap[1] + 1),
+        'include_repeat': sweep_repeat,
+        'breakout_long_period': range(sweep_long_period[0], sweep_long_period[1] + 1, 10),
+        'breakout_long_thresh': range(sweep_long_thresh[0], sweep_long_thresh[1] + 1),
+        'breakout_short_period': range(sweep_short_period[0], sweep_short_period[1] + 1, 5),
+        'breakout_short_thresh': range(sweep_short_thresh[0], sweep_short_thresh[1] + 1),
+    }
+    grid_size = int(np.prod([len(v) for v in sweep_choices.values()]))
+    
+    col_mode1, col_mode2, col_mode3 = st.columns(3)
+    with col_mode1:
+        sweep_mode = st.radio("掃描方式", ["🎲 隨機抽樣", "🔲 完整網格"], horizontal=True)
+    with col_mode2:
+        sweep_samples = st.number_input("抽樣組合數", min_value=50, max_value=5000, value=300, step=50)
+    with col_mode3:
+        rank_metric = st.selectbox("排名依據", ['kill_defense_rate', 'breakout_win_rate', 'short_hits', 'long_hits'], format_func=lambda k: sweep_labels[k])
+    st.caption(f"目前網格共 {grid_size} 組參數。")
+    
+    if len(df) <= sweep_long_period[1] + 1:
+        st.warning(f"⚠️ 資料庫數據不足！長線期數最大值為 {sweep_long_period[1]} 期，需要更多歷史資料才能掃描。")
+    elif grid_size == 0:
+        st.warning("⚠️ 請至少選擇一種連莊設定。")
+    else:
+        if st.button("🚀 開始掃描"):
+            if sweep_mode == "🔲 完整網格":
+                combos = param_grid(sweep_choices)
+            else:
+                combos = sample_params(sweep_choices, sweep_samples)
+            with st.spinner(f"正在平行回測 {len(combos)} 組參數..."):
+                st.session_state[f"sweep_{game_choice}"] = run_sweep(store, combos)
+        
+        sweep_df = st.session_state.get(f"sweep_{game_choice}")
+        if sweep_df is not None and not sweep_df.empty:
+            ranked = sweep_df.sort_values(rank_metric, ascending=False).reset_index(drop=True)
+            st.success(f"✅ 掃描完成！共 {len(ranked)} 組參數，每組回測 {ranked['draws'].iloc[0]} 期。")
+            st.dataframe(ranked.head(50).rename(columns=sweep_labels).style.format(precision=1), use_container_width=True)
+            
+            st.markdown("### 🌡️ 參數熱力圖")
+            knob_keys = list(sweep_labels)[:6]
+            col_h1, col_h2 = st.columns(2)
+            with col_h1:
+                heat_y = st.selectbox("縱軸參數", knob_keys, index=0, format_func=lambda k: sweep_labels[k])
+            with col_h2:
+                heat_x = st.selectbox("橫軸參數", knob_keys, index=2, format_func=lambda k: sweep_labels[k])
+            if heat_x == heat_y:
+                st.info("請選擇兩個不同的參數。")
+            else:
+                st.caption(f"每一格顯示該參數組合下，其他參數所能達到的最佳「{sweep_labels[rank_metric]}」。")
+                heat = ranked.pivot_table(index=heat_y, columns=heat_x, values=rank_metric, aggfunc='max')
+                st.dataframe(heat.style.background_gradient(cmap="RdYlGn", axis=None).format(precision=1), use_container_width=True)
+
+# ==========================================
+# 🖥️ 頁面 9：🆚 雙彩種對照
+# ==========================================
+elif page == "🆚 雙彩種對照":
+    st.title("🆚 539 × 天天樂 雙彩種對照")
+    st.markdown("兩個彩種套用**同一組側邊欄參數**，並排比較策略回測成績與頻率機率曲面。兩邊的資料與索引都在背景同時預載，切換彩種不必再等網路。")
+
+    col_p1, col_p2 = st.columns(2)
+    with col_p1:
+        compare_periods = st.number_input("⏳ 回測期數 (近 X 期)", min_value=50, max_value=500, value=100, step=50)
+    with col_p2:
+        compare_window = st.number_input("🔍 頻率觀察窗 (近 N 期)", min_value=5, max_value=100, value=30, step=5)
+    st.markdown("---")
+
+    best_curves = {}
+    for game_name, game_col in zip(GAMES, st.columns(len(GAMES))):
+        game_df, game_store = load_data(game_name, data_source, game_versions[game_name])
+        with game_col:
+            st.subheader(f"🎲 {game_name}")
+            if len(game_store) < compare_window + compare_periods + 1:
+                st.warning(f"⚠️ 【{game_name}】目前只有 {len(game_store)} 期資料，不足以進行對照。")
+                continue
+            game_last_issue = int(game_store.issues[-1])
+            st.caption(f"最新期數 {game_last_issue} ({game_df['Date'].iat[-1]})，共 {len(game_store)} 期")
+
+            # 與回測頁相同的帳本與口徑：近 X 期基準日、殺牌每期以 10 顆計
+            game_ledger, _ = backtest_ledger(game_store, game_name, SOURCE_KEYS[data_source], strategy_params)
+            _, game_hits, _ = ledger_rows(game_ledger, len(game_store) - compare_periods - 1)
+            summary = summarize(game_hits)
+            col_m1, col_m2 = st.columns(2)
+            col_m1.metric("🔴 短線累積命中", f"{summary['short_hits']} 顆")
+            col_m2.metric("🔵 長線累積命中", f"{summary['long_hits']} 顆")
+            col_m3, col_m4 = st.columns(2)
+            col_m3.metric("🚀 突破號狙擊勝率", f"{summary['breakout_win_rate']:.1f} %", f"共抓出 {summary['breakout_suggested']} 顆，命中 {summary['breakout_hits']} 顆")
+            col_m4.metric("🛡️ 十大殺牌防守率", f"{summary['kill_defense_rate']:.1f} %")
+
+            surface_windows = tuple(sorted(
+                {w for w in range(5, 101) if w + compare_periods <= len(game_store)} | {compare_window}
+            ))
+            surface = load_frequency_surface(game_name, data_source, len(game_store), game_last_issue, surface_windows, compare_periods, game_store)
+            st.markdown(f"##### 📊 近 {compare_window} 期出現 M 次 → 下期開 / 不開")
+            st.dataframe(pd.DataFrame([
+                {"近 N 期出現次數 (M)": f"{m} 次", "歷史樣本總數": total,
+                 "✨ 開出機率 (做多)": f"{hits / total * 100:.1f} %", "🛡️ 不出機率 (殺牌)": f"{(total - hits) / total * 100:.1f} %"}
+                for m, total, hits in window_row(surface, compare_window)
+            ]), hide_index=True, use_container_width=True)
+            best_curves[game_name] = pd.DataFrame(best_per_window(surface)).set_index('window')
+
+    if best_curves:
+        st.markdown("---")
+        st.markdown("### 🧭 觀察窗全景對照：每個 N 的最強殺牌 / 最強主支")
+        st.caption(f"兩邊都用近 {compare_periods} 期當樣本；每個 N 只採計樣本數 ≥ 5 的 M。")
+        col_kill, col_hit = st.columns(2)
+        with col_kill:
+            st.markdown("#### 🛡️ 最強殺牌不出率 (%)")
+            st.line_chart(pd.DataFrame({game_name: curve['kill_rate'] for game_name, curve in best_curves.items()}))
+        with col_hit:
+            st.markdown("#### ✨ 最強主支開出率 (%)")
+            st.line_chart(pd.DataFrame({game_name: curve['hit_rate'] for game_name, curve in best_curves.items()}))
+
+# ==========================================
+# 🖥️ 頁面 10：📖 核心理論白皮書
+# ==========================================
+elif page == "📖 核心理論白皮書":
+    st.title("📖 核心理論與策略解析 (Whitepaper)")
+    st.markdown("""
+    ### 🎯 系統開發核心理念
+    本系統採用了量化金融中經典的**均值回歸**與**動能突破**理論，並將其轉化為彩券分析模型。系統具備雙核心判斷邏輯，並內建動態參數微調面板，允許操作者針對不同的市場週期，隨時改變演算法的嚴格程度。
+
+    ### 🚀 突破號 (冷轉熱) 策略
+    此策略源自於股市中的「底部爆量起漲」。透過比對大週期（長線基期）的冷門號碼，在小週期（短線基期）內是否出現異常的資金動能（頻繁開出），來精準捕捉即將發動的強勢主支。
+
+    ### 🛑 十大殺牌防禦機制
+    在所有投資市場中，學會「不買什麼」比「買什麼」更能保護本金。系統結合了空間斷層理論（死亡之海）與歷史開出機率，為您自動剃除動能陷入冰凍的十顆地雷，大幅提升投資組合的勝率與期望值。
+    
+    ### 📊 頻率機率回測 (條件機率)
+    利用過去數百期的真實數據，嚴格計算出特定頻率號碼的「真實開出機率」與「不出機率(殺牌機率)」，打破憑感覺選號的盲點，用科學證據尋找莊家破綻。
+    
+    ### 🧬 馬可夫鏈關聯矩陣 (拖牌與絕緣)
+    不看單一號碼，而是計算號碼間的「量子糾纏」。透過海量歷史數據比對出「A 開出後最容易開出 B (拖牌)」以及「A 開出後絕對不開 C (絕緣)」的規律。透過多顆號碼的交叉共振，能找出極高勝率的主支與殺牌。
+    """)
+
+# ==========================================
+# 🩺 隱藏診斷面板 (網址加上 ?diag=1 才會出現)
+# ==========================================
+rerun_span.stop()
+if os.environ.get("RADAR_METRICS_FILE"):
+    # 給 node_exporter textfile collector 之類的抓取端讀
+    metrics.write_prometheus(os.environ["RADAR_METRICS_FILE"])
+
+if st.query_params.get("diag"):
+    snap = metrics.snapshot()
+    st.markdown("---")
+    st.header("🩺 效能診斷")
+    st.caption(f"行程 {snap['pid']}，已運行 {snap['uptime_s'] / 60:.1f} 分鐘；數字為本行程內所有使用者的累計")
+
+    def label_text(labels):
+        return ", ".join(f"{k}={v}" for k, v in labels.items())
+
+    if snap['spans']:
+        st.markdown("#### ⏱️ 耗時區段")
+        st.dataframe(pd.DataFrame([
+            {'區段': s['name'], '標籤': label_text(s['labels']), '次數': s['count'], '累計(秒)': round(s['total_s'], 3),
+             '平均(ms)': round(s['mean_ms'], 2), 'p50(ms)': round(s['p50_ms'], 2), 'p95(ms)': round(s['p95_ms'], 2), '最大(ms)': round(s['max_ms'], 2)}
+            for s in snap['spans']
+        ]), hide_index=True, use_container_width=True)
+    if snap['caches']:
+        st.markdown("#### 💾 快取命中")
+        st.dataframe(pd.DataFrame([
+            {'函式': c['fn'], '呼叫': c['calls'], '命中': c['hits'], '未命中': c['misses'], '命中率(%)': round(c['hit_rate'], 1)}
+            for c in snap['caches']
+        ]), hide_index=True, use_container_width=True)
+    if snap['counters'] or snap['gauges']:
+        st.markdown("#### 🔢 計數器與量表")
+        st.dataframe(pd.DataFrame(
+            [{'名稱': c['name'], '標籤': label_text(c['labels']), '數值': c['value']} for c in snap['counters'] + snap['gauges']]
+        ), hide_index=True, use_container_width=True)
+
+    col_json, col_prom = st.columns(2)
+    col_json.download_button("⬇️ 下載 JSON", metrics.to_json(), file_name="radar-metrics.json", mime="application/json")
+    col_prom.download_button("⬇️ 下載 Prometheus", metrics.to_prometheus(), file_name="radar-metrics.prom", mime="text/plain")
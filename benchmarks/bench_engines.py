@@ -0,0 +1,159 @@
+"""量化雷達運算引擎效能基準：以固定種子的合成 5/39 歷史，量測各引擎的耗時、吞吐量與記憶體高峰。
+
+用法：
+    python benchmarks/bench_engines.py                       # 1k ~ 1M 期，結果印到 stdout
+    python benchmarks/bench_engines.py --sizes 1000 10000 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from radar import DrawStore  # noqa: E402
+from radar.backtest import backtest_batch, hit_counts  # noqa: E402
+from radar.freq import frequency_surface  # noqa: E402
+from radar.markov import TransitionIndex  # noqa: E402
+from radar.spatial import batch_predictions  # noqa: E402
+from radar.sweep import param_grid, run_sweep  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_PARAMS = dict(gap_limit=7, allow_repeat=True, long_period=100, long_thresh=12, short_period=20, short_thresh=3)
+SWEEP_CHOICES = {
+    'death_sea_gap': [5, 7, 9],
+    'include_repeat': [True, False],
+    'breakout_long_period': [60, 100],
+    'breakout_long_thresh': [12],
+    'breakout_short_period': [20],
+    'breakout_short_thresh': [2, 3],
+}
+
+
+def synthetic_history(n_draws, seed=0):
+    # 每期從 1~39 均勻抽 5 個不重複號碼
+    rng = np.random.default_rng(seed)
+    nums = np.argpartition(rng.random((n_draws, 39)), 5, axis=1)[:, :5] + 1
+    issues = np.arange(1, n_draws + 1)
+    dates = np.datetime64('2000-01-01') + np.arange(n_draws)
+    return DrawStore(issues, dates, nums)
+
+
+def measure(fn, repeats):
+    # 第一次同時量記憶體高峰，其餘只量時間，取最佳值
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    timings = [time.perf_counter() - start]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), peak
+
+
+def engine_cases(store, args):
+    n = len(store)
+    p = DEFAULT_PARAMS
+    surface_samples = min(args.surface_samples, n - 100)
+    cases = {
+        'store_build': (lambda: DrawStore(store.issues, store.dates, store.nums), n),
+        'single_prediction': (lambda: batch_predictions(
+            store.nums[-1:], p['gap_limit'], p['allow_repeat'],
+            store.window_counts([n], p['long_period']), store.window_counts([n], p['short_period']),
+            p['long_thresh'], p['short_thresh'],
+        ), 1),
+        'backtest': (lambda: hit_counts(*backtest_batch(
+            store, p['gap_limit'], p['allow_repeat'], p['long_period'], p['long_thresh'],
+            p['short_period'], p['short_thresh'], start=p['long_period'] - 1,
+        )[1:]), n - p['long_period']),
+        'frequency_surface': (lambda: frequency_surface(
+            store.prefix, store.masks, range(5, 101), np.arange(n - surface_samples, n),
+        ), surface_samples * 96),
+        'transition_matrix': (lambda: TransitionIndex(store.nums).transitions(0, n - 1), n),
+    }
+    if n <= args.sweep_max:
+        combos = param_grid(SWEEP_CHOICES)
+        cases['parameter_sweep'] = (lambda: run_sweep(store, combos, workers=args.workers), len(combos) * (n - 100))
+    return cases
+
+
+def scaling_exponents(results):
+    # 以 log(耗時) 對 log(期數) 做線性回歸，斜率約 1 代表線性擴展
+    exponents = {}
+    for engine in sorted({r['engine'] for r in results}):
+        rows = [r for r in results if r['engine'] == engine and r['seconds'] > 0]
+        if len(rows) >= 2:
+            x = np.log([r['draws'] for r in rows])
+            y = np.log([r['seconds'] for r in rows])
+            exponents[engine] = float(np.polyfit(x, y, 1)[0])
+    return exponents
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='合成歷史的期數')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--surface-samples', type=int, default=5_000, help='頻率曲面的樣本期數上限')
+    parser.add_argument('--sweep-max', type=int, default=100_000, help='超過此期數就略過參數掃描')
+    parser.add_argument('--workers', type=int, default=None, help='參數掃描的行程數 (預設為 CPU 數)')
+    parser.add_argument('--engines', nargs='+', default=None, help='只跑指定的引擎')
+    parser.add_argument('--output', default=None, help='JSON 輸出路徑 (預設印到 stdout)')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        store = synthetic_history(size, args.seed)
+        for engine, (fn, units) in engine_cases(store, args).items():
+            if args.engines and engine not in args.engines:
+                continue
+            seconds, peak = measure(fn, args.repeats)
+            results.append({
+                'engine': engine,
+                'draws': size,
+                'seconds': seconds,
+                'units': units,
+                'throughput_per_s': units / seconds if seconds > 0 else None,
+                'peak_mb': peak / 2 ** 20,
+            })
+            print(f"{engine:>18} {size:>9,d} 期  {seconds * 1000:10.2f} ms  {peak / 2 ** 20:9.1f} MB", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'repeats': args.repeats,
+        },
+        'results': results,
+        'scaling_exponents': scaling_exponents(results),
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            fh.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
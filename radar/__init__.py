@@ -0,0 +1,11 @@
+from .store import (
+    BALLS, BIT_VALUES, NUM_COLS, DrawStore, bits_to_numbers, build_draw_store, build_prefix_counts, clean_draws,
+    draws_to_masks, masks_to_matrix, matrix_to_masks, numbers_to_bits, popcount, window_counts,
+)
+from .spatial import batch_predictions, first_k, get_predictions, mask_to_numbers, prediction_bits
+from .backtest import backtest_batch, hit_counts, summarize
+from .features import FeatureTable, feature_predictions, feature_table
+from .freq import frequency_surface
+from .markov import TransitionIndex
+from .combos import ComboIndex
+from .drought import DroughtIndex
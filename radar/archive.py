@@ -0,0 +1,255 @@
+import glob
+import os
+import pickle
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+from .sources import CACHE_DIR
+from .store import BALLS, DrawStore, build_prefix_counts
+
+try:
+    import fcntl
+except ImportError:  # Windows：只靠行程內的鎖，同一份封存檔請只由一個行程寫入
+    fcntl = None
+
+# ==========================================
+# 🗃️ 開獎封存檔：定長紀錄、只附加、多行程零拷貝共用
+# ==========================================
+# 每個彩種 × 資料來源一個檔：64 bytes 檔頭 (格式版本、紀錄長度、筆數、CRC32、世代) + 定長紀錄。
+# 讀取端以唯讀 memmap 對應，倉儲的 masks / issues / dates / nums 都是紀錄欄位的 view；
+# 倉儲傳給子行程 (參數掃描) 或寫進 st.cache_data 時只序列化 (路徑, 筆數, 世代)，
+# 對方自己 memmap 同一個檔，作業系統的分頁快取只有一份。
+# 新期數接在檔尾、最後才改寫檔頭的筆數，正在讀的行程只看得到自己打開時的筆數；
+# 歷史被改寫 (前面的期別不同) 時換一個新世代，舊世代保留 ARCHIVE_KEEP 份給還在用的行程
+ARCHIVE_MAGIC = b'RADARDRW'
+ARCHIVE_VERSION = 1
+ARCHIVE_KEEP = 2
+HEADER_SIZE = 64
+HEADER = np.dtype([
+    ('magic', 'S8'), ('version', '<u4'), ('record_size', '<u4'),
+    ('count', '<u8'), ('crc', '<u4'), ('generation', '<u8'), ('_reserved', 'u1', 28),
+])
+RECORD = np.dtype([
+    ('mask', '<u8'), ('date', '<M8[D]'), ('issue', '<i4'), ('nums', 'u1', 5), ('_pad', 'u1', 7),
+])
+
+# _lock 只保護下面兩張表；寫檔與打開各用該封存檔自己的鎖，兩個彩種的封存檔互不等待
+_lock = threading.Lock()
+_path_locks = {}
+# (封存檔路徑, 世代) → {'count', 'records', 'prefix'}；同一個行程重複打開時共用 memmap 與前綴和。
+# 打開最新世代時丟掉同一檔的舊世代 (還在用的倉儲自己握著 memmap，不受影響)
+_opened = {}
+
+
+def archive_path(game_name, source_key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, 'archive', f"{source_key}-{game_name}.draws")
+
+
+def _generation_path(path, generation):
+    return f"{path[:-len('.draws')]}.g{generation:016x}.draws"
+
+
+def store_records(store, start=0):
+    # 倉儲第 start 期之後 → 定長紀錄 (與檔案內的位元組排列相同)
+    records = np.zeros(len(store) - start, dtype=RECORD)
+    records['mask'] = store.masks[start:]
+    records['date'] = store.dates[start:]
+    records['issue'] = store.issues[start:]
+    records['nums'] = store.nums[start:]
+    return records
+
+
+def read_header(path):
+    """檔頭 {'version', 'record_size', 'count', 'crc', 'generation'}；不是封存檔或版本不符時丟 ValueError。"""
+    with open(path, 'rb') as fh:
+        raw = fh.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"❌ {path} 不是完整的封存檔")
+    header = np.frombuffer(raw, dtype=HEADER)[0]
+    if header['magic'] != ARCHIVE_MAGIC:
+        raise ValueError(f"❌ {path} 不是開獎封存檔")
+    if header['version'] != ARCHIVE_VERSION or header['record_size'] != RECORD.itemsize:
+        raise ValueError(f"❌ {path} 的格式版本 {int(header['version'])} 不相容 (目前為 {ARCHIVE_VERSION})")
+    return {key: int(header[key]) for key in ('version', 'record_size', 'count', 'crc', 'generation')}
+
+
+def _header_bytes(count, crc, generation):
+    header = np.zeros(1, dtype=HEADER)
+    header['magic'] = ARCHIVE_MAGIC
+    header['version'] = ARCHIVE_VERSION
+    header['record_size'] = RECORD.itemsize
+    header['count'] = count
+    header['crc'] = crc
+    header['generation'] = generation
+    return header.tobytes()
+
+
+def _map_records(path, count):
+    if count == 0:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def open_archive(path, verify=True):
+    """(檔頭, 唯讀 memmap 紀錄)；verify=True 時核對 CRC32，不符丟 ValueError。"""
+    header = read_header(path)
+    records = _map_records(path, header['count'])
+    if verify and zlib.crc32(records.view(np.uint8)) != header['crc']:
+        raise ValueError(f"❌ {path} 的檢查碼不符 (檔案可能寫到一半或已損毀)")
+    return header, records
+
+
+def _path_lock(path):
+    with _lock:
+        lock = _path_locks.get(path)
+        if lock is None:
+            lock = _path_locks[path] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def _write_lock(path):
+    # 同一個行程內的執行緒用該檔的鎖；跨行程 (app、CLI、監看行程) 用旁邊的 .lock 檔
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _path_lock(path):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{path}.lock", 'a') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _rewrite(path, records):
+    # 整份重寫成新世代；舊檔改名保留，已經對應舊世代的倉儲 (含快取裡序列化的) 仍然打得開
+    generation = time.time_ns()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        fh.write(_header_bytes(len(records), zlib.crc32(records.tobytes()), generation))
+        fh.write(records.tobytes())
+        fh.flush()
+        os.fsync(fh.fileno())
+    if os.path.exists(path):
+        try:
+            os.link(path, _generation_path(path, read_header(path)['generation']))
+        except (OSError, ValueError):
+            pass
+    os.replace(tmp_path, path)
+    for old in sorted(glob.glob(f"{path[:-len('.draws')]}.g*.draws"))[:-ARCHIVE_KEEP]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+
+def _append(path, header, records):
+    # 先把新紀錄寫在檔尾 (覆蓋上次寫到一半的殘留)，落盤後才改檔頭的筆數與檢查碼
+    crc = zlib.crc32(records.tobytes(), header['crc'])
+    with open(path, 'r+b') as fh:
+        fh.seek(HEADER_SIZE + header['count'] * RECORD.itemsize)
+        fh.write(records.tobytes())
+        fh.truncate()
+        fh.flush()
+        os.fsync(fh.fileno())
+        fh.seek(0)
+        fh.write(_header_bytes(header['count'] + len(records), crc, header['generation']))
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def sync_archive(path, store):
+    """讓封存檔與倉儲一致：回傳 'hit' (已一致)、'appended' (只附加新期數) 或 'rebuilt' (整份重寫)。"""
+    with _write_lock(path):
+        try:
+            header, existing = open_archive(path)
+        except (OSError, ValueError):
+            header, existing = None, None
+        n = 0 if header is None else header['count']
+        if header is not None and n <= len(store) and (
+            (existing['issue'] == store.issues[:n]).all() and (existing['nums'] == store.nums[:n]).all()
+        ):
+            if n == len(store):
+                return 'hit'
+            _append(path, header, store_records(store, n))
+            return 'appended'
+        _rewrite(path, store_records(store))
+        return 'rebuilt'
+
+
+def _opened_records(path, generation):
+    # 同一世代只在筆數變多時重新 memmap；前綴和只補算新列
+    header = read_header(path)
+    current = header['generation'] == generation
+    source = path if current else _generation_path(path, generation)
+    if not current:
+        header = read_header(source)
+    key = (path, generation)
+    entry = _opened.get(key)
+    if entry is None or entry['count'] < header['count']:
+        _, records = open_archive(source)
+        if entry is None:
+            prefix = build_prefix_counts(records['nums'])
+        else:
+            new_prefix = build_prefix_counts(records['nums'][entry['count']:])[1:] + entry['prefix'][-1]
+            prefix = np.concatenate([entry['prefix'], new_prefix])
+        entry = {'count': header['count'], 'records': records, 'prefix': prefix}
+    with _lock:
+        _opened[key] = entry
+        if current:
+            for old in [k for k in _opened if k[0] == path and k[1] != generation]:
+                del _opened[old]
+    return entry
+
+
+def open_store(path, count=None, generation=None):
+    """封存檔前 count 期 (預設全部) 的倉儲；各欄位都是 memmap 的 view，不複製資料。"""
+    with _path_lock(path):
+        try:
+            if generation is None:
+                generation = read_header(path)['generation']
+            entry = _opened_records(path, generation)
+        except (OSError, ValueError) as exc:
+            # 序列化的倉儲找不到對應的檔案 (世代已清掉) 時，以 pickle 載入失敗的例外回報
+            raise pickle.UnpicklingError(str(exc)) from exc
+    count = entry['count'] if count is None else count
+    if count > entry['count']:
+        raise pickle.UnpicklingError(f"❌ {path} 只有 {entry['count']} 期，少於要求的 {count} 期")
+    records = entry['records'][:count]
+    store = DrawStore.__new__(DrawStore)
+    store.masks = records['mask']
+    store.dates = records['date']
+    store.issues = records['issue']
+    store.nums = records['nums']
+    store.prefix = entry['prefix'][:count + 1]
+    store._issue_order = None
+    store.features = None
+    store.archive = (path, count, generation)
+    return store
+
+
+def archived_store(store, path):
+    # 倉儲寫進封存檔後改用 memmap 版本 (特徵表沿用原本算好的)；空倉儲不必封存
+    if not len(store):
+        return store
+    sync_archive(path, store)
+    mapped = open_store(path)
+    mapped.features = store.features
+    return mapped
+
+
+def describe_archive(path, verify=True):
+    """封存檔摘要 (CLI 用)：檔頭欄位、檔案大小與首末期數。"""
+    header, records = open_archive(path, verify)
+    return {
+        'path': path, **header, 'bytes': os.path.getsize(path), 'balls': BALLS,
+        'first_issue': int(records['issue'][0]) if len(records) else None,
+        'last_issue': int(records['issue'][-1]) if len(records) else None,
+        'verified': bool(verify),
+    }
@@ -0,0 +1,76 @@
+import numpy as np
+
+from .store import BALLS, masks_to_matrix
+
+# ==========================================
+# 🔭 多期關聯索引 (延遲 k 期 / 雙碼條件 / 長期絕緣)
+# ==========================================
+# 每個號碼一條位元集合 (Python 大整數)：第 t 個位元 = 第 t 期有開出這顆號碼。
+# 「A 在 t 期開出 → B 在 t+k 期開出」就是 bits[A] & (bits[B] >> k) 再數 1 的個數，
+# 多碼條件是先把條件號碼的位元集合 AND 起來，完全不必重掃歷史
+
+
+def _bits_from_column(column):
+    return int.from_bytes(np.packbits(column, bitorder='little').tobytes(), 'little')
+
+
+def _span(start, end):
+    # 第 [start, end) 期全部為 1 的位元集合
+    return ((1 << max(end, start)) - 1) ^ ((1 << start) - 1)
+
+
+class AssociationIndex:
+    """bits[k-1] 為號碼 k 的開出位置集合；查詢區間為歷史子集第 [start, end) 期。"""
+
+    def __init__(self, masks):
+        matrix = masks_to_matrix(masks)
+        self.n = len(matrix)
+        self.bits = [_bits_from_column(matrix[:, k]) for k in range(BALLS)]
+
+    def __len__(self):
+        return self.n
+
+    def lead_bits(self, numbers, start, end, lag=1):
+        # 條件號碼全部同期開出、且 t+lag 仍落在子集內的期別 t
+        bits = _span(start, end - lag)
+        for num in numbers:
+            bits &= self.bits[num - 1]
+        return bits
+
+    def followers(self, numbers, start=0, end=None, lag=1):
+        """回傳 (條件成立次數, 39 碼在 lag 期後的開出次數)。"""
+        end = self.n if end is None else end
+        lead = self.lead_bits(numbers, start, end, lag)
+        counts = np.array([(lead & (b >> lag)).bit_count() for b in self.bits], dtype=np.int64)
+        return lead.bit_count(), counts
+
+    def within_horizon(self, numbers, horizon, start=0, end=None):
+        """條件成立後 1~horizon 期內，39 碼「至少開出一次」的次數 (0 次 = 整段期間都絕緣)。
+
+        只計入後面還有完整 horizon 期可以對答案的條件期。
+        """
+        end = self.n if end is None else end
+        lead = self.lead_bits(numbers, start, end, horizon)
+        counts = []
+        for b in self.bits:
+            seen = 0
+            for j in range(1, horizon + 1):
+                seen |= b >> j
+            counts.append((lead & seen).bit_count())
+        return lead.bit_count(), np.array(counts, dtype=np.int64)
+
+    def append(self, masks):
+        # 新期數附加在最後：各號碼在新位置補上位元即可
+        matrix = masks_to_matrix(masks)
+        for k in range(BALLS):
+            self.bits[k] |= _bits_from_column(matrix[:, k]) << self.n
+        self.n += len(matrix)
+
+
+def association_table(total, counts, exclude=()):
+    # [(號碼, 次數, 機率%)]，依次數由高到低 (同次數號碼小者優先)
+    order = np.argsort(-counts, kind='stable')
+    return [
+        (int(i) + 1, int(counts[i]), counts[i] / total * 100 if total else 0.0)
+        for i in order if int(i) + 1 not in exclude
+    ]
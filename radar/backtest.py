@@ -0,0 +1,69 @@
+import numpy as np
+
+from .features import feature_table
+from .spatial import batch_death_sea, batch_geometry, batch_picks
+from .store import matrix_to_masks, popcount
+
+# ==========================================
+# 📈 批次回測：以第 i 期為基準，驗證第 i+1 期
+# ==========================================
+# iter_backtest 每段算幾個基準期 (每期約 2 KB 暫存陣列)
+BACKTEST_CHUNK = 4096
+# 回測結果保留的推薦類別，每期各是一個 39 位元遮罩 (uint64)
+PICK_FIELDS = ('short', 'long', 'breakout', 'worst_10')
+
+
+def backtest_batch(store, gap_limit, allow_repeat, long_period, long_thresh, short_period, short_thresh, start=0, end=None):
+    # 基準期 i ∈ [start, end)，end 預設為最後一期 (沒有下一期可以對答案)
+    end = len(store) - 1 if end is None else min(end, len(store) - 1)
+    pos = np.arange(max(start, 0), max(end, 0))
+    long_counts = store.window_counts(pos + 1, long_period)
+    short_counts = store.window_counts(pos + 1, short_period)
+    # 號碼幾何與死亡之海直接查特徵表；間距超出特徵表範圍時才當場計算
+    table = feature_table(store)
+    if table.covers(gap_limit):
+        geometry, death_sea = table.batch_geometry(pos, gap_limit)
+    else:
+        geometry = batch_geometry(store.nums[pos])
+        death_sea = batch_death_sea(geometry, gap_limit)
+    preds = batch_picks(geometry, death_sea, allow_repeat, long_counts, short_counts, long_thresh, short_thresh)
+    # 推薦與答案都壓成 39 位元遮罩，命中數 = AND 後數 1
+    return pos, {field: matrix_to_masks(preds[field]) for field in PICK_FIELDS}, store.masks[pos + 1]
+
+
+def iter_backtest(store, gap_limit, allow_repeat, long_period, long_thresh, short_period, short_thresh,
+                  start=0, end=None, chunk=BACKTEST_CHUNK):
+    # 與 backtest_batch 相同，但一次只算 chunk 個基準期，記憶體不隨回測長度成長
+    end = len(store) - 1 if end is None else min(end, len(store) - 1)
+    for lo in range(max(start, 0), end, chunk):
+        yield backtest_batch(
+            store, gap_limit, allow_repeat, long_period, long_thresh, short_period, short_thresh,
+            start=lo, end=min(lo + chunk, end),
+        )
+
+
+def hit_counts(preds, next_hit):
+    return {
+        'short_hits': popcount(preds['short'] & next_hit),
+        'long_hits': popcount(preds['long'] & next_hit),
+        'breakout_suggested': popcount(preds['breakout']),
+        'breakout_hits': popcount(preds['breakout'] & next_hit),
+        'kill_fails': popcount(preds['worst_10'] & next_hit),
+    }
+
+
+def summarize(hits):
+    # 與回測頁面相同的口徑：殺牌每期以 10 顆計算防守率
+    rows = len(hits['short_hits'])
+    suggested = int(hits['breakout_suggested'].sum())
+    breakout_hits = int(hits['breakout_hits'].sum())
+    kill_fails = int(hits['kill_fails'].sum())
+    return {
+        'draws': rows,
+        'short_hits': int(hits['short_hits'].sum()),
+        'long_hits': int(hits['long_hits'].sum()),
+        'breakout_suggested': suggested,
+        'breakout_hits': breakout_hits,
+        'breakout_win_rate': breakout_hits / suggested * 100 if suggested > 0 else 0.0,
+        'kill_defense_rate': (rows * 10 - kill_fails) / (rows * 10) * 100 if rows > 0 else 0.0,
+    }
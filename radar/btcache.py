@@ -0,0 +1,144 @@
+import glob
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .backtest import PICK_FIELDS, hit_counts, iter_backtest
+from .sources import CACHE_DIR, load_arrays, save_arrays
+from .sweep import PARAM_KEYS
+
+# ==========================================
+# 💾 回測帳本快取 (資料來源 × 彩種 × 參數 × 資料指紋)
+# ==========================================
+# 帳本從第 0 期開始逐期記錄推薦遮罩與命中數，並存一份累積和；
+# 新期數附加在後面時只補算新列，任意區間的累積命中都是兩列相減。
+# 雲端與本機快照的同一彩種長度可能不同，各佔一個帳本，互相切換時不會把對方整段重算
+HIT_FIELDS = ('short_hits', 'long_hits', 'breakout_suggested', 'breakout_hits', 'kill_fails')
+MEMORY_ENTRIES = 32
+DISK_ENTRIES = 128
+# 推薦口徑改變時加一：舊帳本 (與共用同一把鑰匙的逐期回測結果檔) 換了名字就不會再被讀到
+LEDGER_REVISION = 2
+
+# _lock 只保護記憶體裡的帳本表；補算與寫檔在各帳本自己的鎖裡做，不會擋住其他彩種 / 參數的查詢
+_lock = threading.Lock()
+_ledgers = OrderedDict()
+_key_locks = {}
+
+
+def ledger_key(game_name, params, source_key=None):
+    values = f"r{LEDGER_REVISION}:" + ','.join(str(int(params[k])) for k in PARAM_KEYS)
+    digest = hashlib.sha1(values.encode('utf-8')).hexdigest()[:12]
+    return f"{source_key}-{game_name}-{digest}" if source_key else f"{game_name}-{digest}"
+
+
+def _ledger_path(key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, 'backtest', f"bt-{key}.npz")
+
+
+def _compute_rows(store, params, start):
+    masks = {field: [] for field in PICK_FIELDS}
+    hit_rows = []
+    for _, preds, next_hit in iter_backtest(
+        store, params['death_sea_gap'], params['include_repeat'],
+        params['breakout_long_period'], params['breakout_long_thresh'],
+        params['breakout_short_period'], params['breakout_short_thresh'], start=start,
+    ):
+        hits = hit_counts(preds, next_hit)
+        for field in PICK_FIELDS:
+            masks[field].append(preds[field])
+        hit_rows.append(np.stack([hits[field] for field in HIT_FIELDS], axis=1).astype(np.int64))
+    rows = {field: np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint64) for field, parts in masks.items()}
+    rows['hits'] = np.concatenate(hit_rows) if hit_rows else np.zeros((0, len(HIT_FIELDS)), dtype=np.int64)
+    return rows
+
+
+def _extend(ledger, store, params):
+    # 基準期 i 只用到第 0 ~ i+1 期，所以舊列不受新期數影響，只補 [舊列數, 新列數) 這段
+    rows = _compute_rows(store, params, len(ledger['short']))
+    cum = np.cumsum(rows['hits'], axis=0) + ledger['cum'][-1]
+    extended = {field: np.concatenate([ledger[field], rows[field]]) for field in PICK_FIELDS}
+    extended['cum'] = np.concatenate([ledger['cum'], cum])
+    extended['n_draws'] = len(store)
+    extended['digest'] = store.fingerprint()
+    return extended
+
+
+def _empty_ledger():
+    ledger = {field: np.zeros(0, dtype=np.uint64) for field in PICK_FIELDS}
+    ledger['cum'] = np.zeros((1, len(HIT_FIELDS)), dtype=np.int64)
+    ledger['n_draws'] = 0
+    ledger['digest'] = ''
+    return ledger
+
+
+def _read_ledger(path):
+    if not os.path.exists(path):
+        return None
+    arrays = load_arrays(path)
+    os.utime(path)
+    arrays['n_draws'] = int(arrays['n_draws'])
+    arrays['digest'] = str(arrays['digest'])
+    return arrays
+
+
+def _evict(cache_dir=None):
+    # 磁碟上只留最近用過的 DISK_ENTRIES 份 (讀取時會更新檔案時間)
+    paths = glob.glob(os.path.join(cache_dir or CACHE_DIR, 'backtest', 'bt-*.npz'))
+    paths.sort(key=lambda p: os.path.getmtime(p), reverse=True)
+    for path in paths[DISK_ENTRIES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _remember(key, ledger):
+    _ledgers[key] = ledger
+    _ledgers.move_to_end(key)
+    while len(_ledgers) > MEMORY_ENTRIES:
+        _ledgers.popitem(last=False)
+
+
+def _key_lock(key):
+    with _lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def backtest_ledger(store, game_name, source_key, params, cache_dir=None):
+    """回傳 (帳本, 狀態)；狀態為 'hit' 直接命中、'extended' 只補算新期數、'miss' 整段重算。"""
+    key = ledger_key(game_name, params, source_key)
+    path = _ledger_path(key, cache_dir)
+    with _key_lock(key):
+        with _lock:
+            ledger = _ledgers.get(key)
+        if ledger is None or ledger['n_draws'] < len(store):
+            # 監看行程 (radar.watch) 可能已經把磁碟上的帳本補到較新的期數
+            on_disk = _read_ledger(path)
+            if on_disk is not None and (ledger is None or on_disk['n_draws'] > ledger['n_draws']):
+                ledger = on_disk
+        status = 'miss'
+        if ledger is not None and ledger['n_draws'] <= len(store) and ledger['digest'] == store.fingerprint(ledger['n_draws']):
+            status = 'hit' if ledger['n_draws'] == len(store) else 'extended'
+        if status == 'miss':
+            ledger = _extend(_empty_ledger(), store, params)
+        elif status == 'extended':
+            ledger = _extend(ledger, store, params)
+        with _lock:
+            _remember(key, ledger)
+        if status != 'hit':
+            save_arrays(path, ledger)
+            _evict(cache_dir)
+    return ledger, status
+
+
+def ledger_rows(ledger, start):
+    # 基準期 [start, 最後一列) 的推薦遮罩、逐期命中數，以及從 start 起算的累積命中
+    start = max(start, 0)
+    picks = {field: ledger[field][start:] for field in PICK_FIELDS}
+    cum = ledger['cum'][start + 1:] - ledger['cum'][start]
+    hits = np.diff(ledger['cum'][start:], axis=0)
+    return picks, dict(zip(HIT_FIELDS, hits.T)), dict(zip(HIT_FIELDS, cum.T))
+
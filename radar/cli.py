@@ -0,0 +1,528 @@
+"""量化雷達命令列工具 (不需啟動 Streamlit)。
+
+    python -m radar predict  --game 539
+    python -m radar backtest --game 539 --draws 100 --format csv
+    python -m radar sweep    --game 539 --gap 5 7 9 --repeat yes no --sample 200
+    python -m radar markov   --game 539 --lookback 200
+    python -m radar freq     --game 539 --window 30 --samples 150
+    python -m radar combos   --game 539 --lookback 300 --number 3 17 22
+    python -m radar drought  --game 539 --kill-pct 95 --buy-band 50 80 --backtest 300
+    python -m radar tickets  --game 539 --top 10 --backtest 100
+    python -m radar wheel    --game 539 --sources consensus hot breakout -k 3 -m 3 --backtest 100
+    python -m radar import   --game 天天樂 --source sheet history.csv --dry-run
+    python -m radar watch    --game 539 天天樂 --source sheet --interval 60
+    python -m radar archive  --game 539 --sync
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from . import archive, ingest, sources, sync, tickets, watch, wheels
+from .backtest import backtest_batch, hit_counts, summarize
+from .combos import ComboIndex, combo_report
+from .drought import BUY_BAND, KILL_PERCENTILE, MIN_SAMPLES, DroughtIndex, drought_backtest, drought_signals, summarize_drought
+from .features import feature_prediction_bits, feature_predictions
+from .freq import best_per_window, frequency_surface, window_row
+from .markov import TransitionIndex, follower_report, resonance_picks, window_first_follow, window_matrix
+from .montecarlo import compare_to_baseline, run_baseline
+from .store import bits_to_numbers, build_draw_store
+from .sweep import PARAM_KEYS, param_grid, run_sweep, sample_params
+
+DEFAULT_PARAMS = {
+    'death_sea_gap': 7, 'include_repeat': True,
+    'breakout_long_period': 100, 'breakout_long_thresh': 12,
+    'breakout_short_period': 20, 'breakout_short_thresh': 3,
+}
+
+
+# ==========================================
+# 📥 資料讀取
+# ==========================================
+def open_worksheet(args):
+    creds_json = os.environ.get('RADAR_GCP_JSON')
+    if args.creds:
+        with open(args.creds, encoding='utf-8') as fh:
+            creds_json = fh.read()
+    if not creds_json:
+        raise SystemExit("❌ 讀取雲端試算表需要 --creds 金鑰檔或 RADAR_GCP_JSON 環境變數")
+    return sync.get_worksheet(creds_json, args.sheet_url, args.game)
+
+
+def load_frame(args):
+    if args.source == 'sheet':
+        state, _ = sync.sync_sheet(open_worksheet(args), args.game)
+        return sync.state_frame(state)
+    return sources.load_local(args.game, path=args.file)
+
+
+def load_store(args):
+    # 歷史資料同步到封存檔後以 memmap 開啟，參數掃描的子行程共用同一份、不必各自複製
+    df = load_frame(args)
+    if df.empty:
+        raise SystemExit(f"❌ 【{args.game}】資料庫目前是空的")
+    return archive.archived_store(build_draw_store(df), archive.archive_path(args.game, args.source))
+
+
+def resolve_position(store, issue):
+    # 預設以最新一期為基準日
+    if issue is None:
+        return len(store) - 1
+    pos = int(store.find_issues(issue))
+    if pos < 0:
+        raise SystemExit(f"❌ 找不到期數 {issue}")
+    return pos
+
+
+def params_from_args(args):
+    return {
+        'death_sea_gap': args.gap, 'include_repeat': not args.no_repeat,
+        'breakout_long_period': args.long_period, 'breakout_long_thresh': args.long_thresh,
+        'breakout_short_period': args.short_period, 'breakout_short_thresh': args.short_thresh,
+    }
+
+
+def date_text(value):
+    return '' if np.isnat(value) else str(value)
+
+
+# ==========================================
+# 📤 輸出 (JSON / CSV)
+# ==========================================
+def emit(args, payload, rows=None):
+    # JSON 輸出完整結構；CSV 只輸出表格列 (清單欄位以空白分隔)
+    if args.format == 'csv':
+        rows = rows if rows is not None else [payload]
+        buffer = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({k: ' '.join(map(str, v)) if isinstance(v, list) else v for k, v in row.items()})
+        text = buffer.getvalue()
+    else:
+        text = json.dumps(payload, ensure_ascii=False, indent=2) + '\n'
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as fh:
+            fh.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+# ==========================================
+# 🧭 子命令
+# ==========================================
+def cmd_predict(args):
+    store = load_store(args)
+    pos = resolve_position(store, args.issue)
+    params = params_from_args(args)
+    s_long = pd.Series(store.window_counts(pos + 1, params['breakout_long_period']), index=np.arange(1, 40))
+    s_short = pd.Series(store.window_counts(pos + 1, params['breakout_short_period']), index=np.arange(1, 40))
+    (short_picks, long_picks, consensus_picks, death_seas, sandwiches, geometric_centers,
+     tail_resonances, max_gap, worst_10_picks, breakout_picks) = feature_predictions(
+        store, pos, params['death_sea_gap'], params['include_repeat'], s_long, s_short,
+        params['breakout_long_thresh'], params['breakout_short_thresh'],
+    )
+    payload = {
+        'game': args.game, 'issue': int(store.issues[pos]), 'date': date_text(store.dates[pos]),
+        'draw': store.draw(pos), 'next_draw': store.draw(pos + 1) if pos + 1 < len(store) else [],
+        'params': params,
+        'short_picks': short_picks, 'long_picks': long_picks, 'consensus_picks': consensus_picks,
+        'death_seas': [list(sea) for sea in death_seas], 'sandwiches': sandwiches,
+        'geometric_centers': geometric_centers, 'tail_resonances': tail_resonances, 'max_gap': max_gap,
+        'worst_10_picks': worst_10_picks, 'breakout_picks': breakout_picks,
+    }
+    emit(args, payload)
+
+
+def cmd_tickets(args):
+    # 全部 575,757 注評分後的前 K 注；--backtest N 另外逐期重選、對下一期開獎
+    store = load_store(args)
+    pos = resolve_position(store, args.issue)
+    params = params_from_args(args)
+    long_counts = store.window_counts(pos + 1, params['breakout_long_period'])
+    short_counts = store.window_counts(pos + 1, params['breakout_short_period'])
+    bits = feature_prediction_bits(
+        store, pos, params['death_sea_gap'], params['include_repeat'],
+        pd.Series(long_counts, index=np.arange(1, 40)), pd.Series(short_counts, index=np.arange(1, 40)),
+        params['breakout_long_thresh'], params['breakout_short_thresh'],
+    )
+    kill = 0 if args.keep_kill else bits['worst_10']
+    table = tickets.ticket_table()
+    rows = tickets.rank_tickets(
+        table, bits, long_counts, short_counts, params['breakout_long_period'], params['breakout_short_period'], args.top, kill,
+    )
+    payload = {
+        'game': args.game, 'issue': int(store.issues[pos]), 'draw': store.draw(pos), 'params': params,
+        'excluded_kill': bits_to_numbers(kill), 'tickets': rows,
+    }
+    if args.backtest:
+        result = tickets.ticket_backtest(store, params, pos - args.backtest, pos, args.top, not args.keep_kill, table=table)
+        total = result['distribution'].sum(axis=0)
+        payload['backtest'] = {
+            'draws': len(result['best_hits']),
+            'hit_distribution': [int(n) for n in total],
+            'best_hit_distribution': [int(n) for n in np.bincount(result['best_hits'], minlength=6)],
+            'mean_hits': float((total * np.arange(6)).sum() / total.sum()) if total.sum() else 0.0,
+        }
+    emit(args, payload, rows)
+
+
+def cmd_wheel(args):
+    # 包牌：號碼池預設由 --sources 組成 (與 app 相同)，也可用 --pool 直接指定
+    store = load_store(args)
+    pos = resolve_position(store, args.issue)
+    params = params_from_args(args)
+    if args.pool:
+        pool = sorted(set(args.pool))
+    else:
+        bits = feature_prediction_bits(
+            store, pos, params['death_sea_gap'], params['include_repeat'],
+            pd.Series(store.window_counts(pos + 1, params['breakout_long_period']), index=np.arange(1, 40)),
+            pd.Series(store.window_counts(pos + 1, params['breakout_short_period']), index=np.arange(1, 40)),
+            params['breakout_long_thresh'], params['breakout_short_thresh'],
+        )
+        pool = bits_to_numbers(wheels.pool_bits(bits, args.sources))
+    try:
+        wheel = wheels.wheel_tickets(pool, args.k, args.m, args.budget, improve=args.improve)
+    except ValueError as exc:
+        raise SystemExit(f"❌ {exc}")
+    rows = [{'ticket': n, 'numbers': ticket} for n, ticket in enumerate(wheel['tickets'], start=1)]
+    payload = {
+        'game': args.game, 'issue': int(store.issues[pos]), 'pool': pool, 'k': args.k, 'm': args.m,
+        'tickets': wheel['tickets'], 'cost': len(wheel['tickets']) * wheels.TICKET_PRICE,
+        'status': wheel['status'], 'searched_s': round(wheel['searched'], 3),
+    }
+    if args.backtest:
+        result = wheels.wheel_backtest(store, params, args.sources, args.k, args.m, pos - args.backtest, pos, args.budget)
+        payload['backtest'] = result['summary']
+    emit(args, payload, rows)
+
+
+def cmd_backtest(args):
+    store = load_store(args)
+    params = params_from_args(args)
+    start = 0 if args.all else max(len(store) - args.draws - 1, 0)
+    pos, preds, next_hit = backtest_batch(
+        store, params['death_sea_gap'], params['include_repeat'],
+        params['breakout_long_period'], params['breakout_long_thresh'],
+        params['breakout_short_period'], params['breakout_short_thresh'], start=start,
+    )
+    hits = hit_counts(preds, next_hit)
+    rows = []
+    for row, i in enumerate(pos):
+        rows.append({
+            'issue': int(store.issues[i + 1]), 'date': date_text(store.dates[i + 1]),
+            'actual': store.draw(i + 1),
+            'short_picks': bits_to_numbers(preds['short'][row]), 'short_hits': int(hits['short_hits'][row]),
+            'long_picks': bits_to_numbers(preds['long'][row]), 'long_hits': int(hits['long_hits'][row]),
+            'breakout_picks': bits_to_numbers(preds['breakout'][row]), 'breakout_hits': int(hits['breakout_hits'][row]),
+            'worst_10_picks': bits_to_numbers(preds['worst_10'][row]), 'kill_success': 10 - int(hits['kill_fails'][row]),
+        })
+    summary = summarize(hits)
+    payload = {'game': args.game, 'params': params, 'summary': summary, 'rows': rows}
+    if args.baseline:
+        simulated = run_baseline(params, len(pos), args.baseline, args.seed, args.workers)
+        payload['baseline'] = compare_to_baseline(summary, simulated)
+    emit(args, payload, rows)
+
+
+def cmd_sweep(args):
+    store = load_store(args)
+    choices = {
+        'death_sea_gap': args.gap, 'include_repeat': [r == 'yes' for r in args.repeat],
+        'breakout_long_period': args.long_period, 'breakout_long_thresh': args.long_thresh,
+        'breakout_short_period': args.short_period, 'breakout_short_thresh': args.short_thresh,
+    }
+    combos = sample_params(choices, args.sample, args.seed) if args.sample else param_grid(choices)
+    ranked = run_sweep(store, combos, workers=args.workers).sort_values(args.sort, ascending=False)
+    if args.top:
+        ranked = ranked.head(args.top)
+    rows = [{k: (bool(v) if k == 'include_repeat' else v.item() if hasattr(v, 'item') else v) for k, v in row.items()}
+            for row in ranked.to_dict('records')]
+    emit(args, {'game': args.game, 'combinations': len(combos), 'sort': args.sort, 'rows': rows}, rows)
+
+
+def cmd_markov(args):
+    store = load_store(args)
+    pos = resolve_position(store, args.issue)
+    index = TransitionIndex(store.nums)
+    matrix, lead_counts = window_matrix(index, store.prefix, pos + 1, args.lookback)
+    numbers = args.number or store.draw(pos)
+    report = follower_report(matrix, lead_counts, numbers, window_first_follow(index, pos + 1, args.lookback))
+    rows = [{
+        'number': r['number'], 'appearances': r['appearances'],
+        'top_3': [k for k, _ in r['top_3']], 'top_3_counts': [v for _, v in r['top_3']],
+        'never': r['never'],
+    } for r in report]
+    payload = {
+        'game': args.game, 'issue': int(store.issues[pos]), 'lookback': args.lookback, 'numbers': numbers,
+        'followers': rows, 'resonance': resonance_picks(report),
+    }
+    emit(args, payload, rows)
+
+
+def cmd_combos(args):
+    store = load_store(args)
+    pos = resolve_position(store, args.issue)
+    index = ComboIndex(store.nums)
+    end = pos + 1
+    start = max(end - args.lookback, 0)
+    numbers = args.number or store.draw(pos)
+    rows = [{
+        'combo': list(r['combo']), 'hits': r['hits'], 'expected': round(r['expected'], 4), 'lift': round(r['lift'], 4),
+    } for r in combo_report(index, numbers, start, end)]
+    payload = {
+        'game': args.game, 'issue': int(store.issues[pos]), 'lookback': end - start, 'numbers': sorted(numbers),
+        'combos': rows,
+        'partners': {n: index.top_partners(n, start, end, args.top) for n in sorted(numbers)},
+        'top_pairs': [(list(c), k) for c, k in index.top_pairs(start, end, args.top)],
+        'top_triples': [(list(c), k) for c, k in index.top_triples(start, end, args.top)],
+    }
+    emit(args, payload, rows)
+
+
+def cmd_drought(args):
+    # 各號碼目前遺漏值與自身歷史百分位；--backtest N 另外逐期出訊號、對下一期開獎
+    store = load_store(args)
+    pos = resolve_position(store, args.issue)
+    index = DroughtIndex(store.masks)
+    report = index.report(pos + 1)
+    signals = drought_signals(report, args.kill_pct, tuple(args.buy_band), args.min_samples)
+    rows = [{
+        'number': k + 1, 'drought': int(report['drought'][k]),
+        'percentile': None if np.isnan(report['percentile'][k]) else round(float(report['percentile'][k]), 2),
+        'samples': int(report['samples'][k]), 'median': int(report['median'][k]),
+        'p90': int(report['p90'][k]), 'max': int(report['max'][k]),
+    } for k in range(len(report['drought']))]
+    payload = {
+        'game': args.game, 'issue': int(store.issues[pos]), 'draw': store.draw(pos),
+        'kill': bits_to_numbers(signals['kill']), 'buy': bits_to_numbers(signals['buy']), 'numbers': rows,
+    }
+    if args.backtest:
+        result = drought_backtest(index, pos - args.backtest, pos, args.kill_pct, tuple(args.buy_band), args.min_samples)
+        payload['backtest'] = summarize_drought(result)
+    emit(args, payload, rows)
+
+
+def cmd_freq(args):
+    store = load_store(args)
+    windows = sorted(set(range(args.min_window, args.max_window + 1)) | {args.window})
+    windows = [w for w in windows if w + args.samples <= len(store)]
+    if args.window not in windows:
+        raise SystemExit(f"❌ 資料庫數據不足！需要至少 {args.window + args.samples} 期資料")
+    surface = frequency_surface(store.prefix, store.masks, windows, np.arange(len(store) - args.samples, len(store)))
+    rows = [{'appearances': m, 'samples': total, 'hits': hits, 'misses': total - hits,
+             'hit_rate': hits / total * 100, 'miss_rate': (total - hits) / total * 100}
+            for m, total, hits in window_row(surface, args.window)]
+    payload = {'game': args.game, 'window': args.window, 'samples': args.samples,
+               'table': rows, 'best_per_window': best_per_window(surface)}
+    emit(args, payload, rows)
+
+
+def cmd_import(args):
+    # 驗證通過才一次 append_rows 寫入試算表；--dry-run 只輸出驗證結果 (空的工作表也可以整批匯入歷史)
+    if args.source != 'sheet' and not args.dry_run:
+        raise SystemExit("❌ 本機快照為唯讀，寫入請加上 --source sheet (或用 --dry-run 只做驗證)")
+    with open(args.batch, 'rb') as fh:
+        batch = ingest.read_batch(fh.read(), args.game)
+    store = build_draw_store(load_frame(args))
+    report = ingest.validate_batch(batch, store)
+    written = 0
+    if not args.dry_run and not report['errors'] and not report['rows'].empty:
+        sync.append_draws(open_worksheet(args), args.game, ingest.batch_values(report['rows']))
+        written = len(report['rows'])
+    rows = report['rows'].to_dict('records')
+    payload = {
+        'game': args.game, 'existing_draws': len(store), 'written': written,
+        'skipped': report['skipped'], 'errors': report['errors'], 'warnings': report['warnings'], 'rows': rows,
+    }
+    emit(args, payload, rows)
+    if report['errors']:
+        raise SystemExit(1)
+
+
+def cmd_watch(args):
+    # 常駐輪詢：每個彩種一個 Watcher，新期數只補算新列並發佈快照給 app 讀取
+    param_sets = [DEFAULT_PARAMS]
+    if args.params:
+        with open(args.params, encoding='utf-8') as fh:
+            param_sets = json.load(fh)
+        missing = [k for params in param_sets for k in PARAM_KEYS if k not in params]
+        if missing:
+            raise SystemExit(f"❌ 參數檔缺少欄位：{', '.join(sorted(set(missing)))}")
+    watchers = []
+    for game in args.game:
+        game_args = argparse.Namespace(**{**vars(args), 'game': game})
+        watchers.append(watch.Watcher(game, args.source, lambda a=game_args: load_frame(a), param_sets, args.interval))
+    watch.run_forever(watchers, args.interval, once=args.once)
+
+
+def cmd_archive(args):
+    # 封存檔的檔頭與檢查碼；--sync 先從資料來源同步 (只附加新期數)
+    path = archive.archive_path(args.game, args.source)
+    status = None
+    if args.sync:
+        df = load_frame(args)
+        if df.empty:
+            raise SystemExit(f"❌ 【{args.game}】資料庫目前是空的")
+        status = archive.sync_archive(path, build_draw_store(df))
+    if not os.path.exists(path):
+        raise SystemExit(f"❌ 找不到封存檔 {path} (請加上 --sync 建立)")
+    try:
+        payload = archive.describe_archive(path)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    payload['status'] = status
+    emit(args, {'game': args.game, **payload})
+
+
+# ==========================================
+# 🔧 參數解析
+# ==========================================
+def add_common(parser, many_games=False):
+    if many_games:
+        parser.add_argument('--game', nargs='+', default=['539'], help='彩種 (可指定多個)')
+    else:
+        parser.add_argument('--game', default='539', help='彩種 (試算表工作表名稱)')
+    parser.add_argument('--source', choices=['local', 'sheet'], default='local')
+    parser.add_argument('--file', default=None, help='本機快照檔 (預設為專案內的 539.xlsx)')
+    parser.add_argument('--creds', default=None, help='Google 服務帳戶金鑰 JSON 檔')
+    parser.add_argument('--sheet-url', default=sync.DEFAULT_SHEET_URL)
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('--output', '-o', default=None, help='輸出檔 (預設為 stdout)')
+
+
+def add_params(parser):
+    d = DEFAULT_PARAMS
+    parser.add_argument('--gap', type=int, default=d['death_sea_gap'], help='死亡之海斷層間距')
+    parser.add_argument('--no-repeat', action='store_true', help='排除連莊號')
+    parser.add_argument('--long-period', type=int, default=d['breakout_long_period'])
+    parser.add_argument('--long-thresh', type=int, default=d['breakout_long_thresh'])
+    parser.add_argument('--short-period', type=int, default=d['breakout_short_period'])
+    parser.add_argument('--short-thresh', type=int, default=d['breakout_short_thresh'])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='radar', description='量化雷達命令列工具')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('predict', help='單一基準日的雙引擎推薦、殺牌與突破號')
+    add_common(p)
+    add_params(p)
+    p.add_argument('--issue', type=int, default=None, help='基準期數 (預設最新一期)')
+    p.set_defaults(func=cmd_predict)
+
+    p = sub.add_parser('backtest', help='逐期回測命中與殺牌防守')
+    add_common(p)
+    add_params(p)
+    p.add_argument('--draws', type=int, default=100, help='回測最近幾期')
+    p.add_argument('--all', action='store_true', help='回測全部歷史')
+    p.add_argument('--baseline', type=int, default=0, help='附上 N 次 Monte Carlo 隨機基準 (p 值與 95%% 區間)')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--workers', type=int, default=None)
+    p.set_defaults(func=cmd_backtest)
+
+    p = sub.add_parser('tickets', help='全部 C(39,5) 注評分，列出前 K 注')
+    add_common(p)
+    add_params(p)
+    p.add_argument('--issue', type=int, default=None, help='基準期數 (預設最新一期)')
+    p.add_argument('--top', type=int, default=10, help='列出前 K 注')
+    p.add_argument('--keep-kill', action='store_true', help='不剔除含殺牌的注')
+    p.add_argument('--backtest', type=int, default=0, help='另外回測最近 N 期 (每期重新評分全部注)')
+    p.set_defaults(func=cmd_tickets)
+
+    p = sub.add_parser('wheel', help='包牌：號碼池開出 m 顆時保證至少一注中 k 顆的最少注數')
+    add_common(p)
+    add_params(p)
+    p.add_argument('--issue', type=int, default=None, help='基準期數 (預設最新一期)')
+    p.add_argument('--pool', type=int, nargs='+', default=None, help='直接指定號碼池 (預設由 --sources 組成)')
+    p.add_argument('--sources', nargs='+', choices=wheels.POOL_SOURCES, default=['consensus', 'hot', 'breakout'])
+    p.add_argument('-k', type=int, default=3, help='保證至少一注中 k 顆')
+    p.add_argument('-m', type=int, default=3, help='池中開出 m 顆')
+    p.add_argument('--budget', type=float, default=wheels.WHEEL_BUDGET, help='局部搜尋時間上限 (秒)')
+    p.add_argument('--improve', action='store_true', help='已存檔的設計再搜尋一輪')
+    p.add_argument('--backtest', type=int, default=0, help='另外回測最近 N 期 (539 獎金表)')
+    p.set_defaults(func=cmd_wheel)
+
+    p = sub.add_parser('sweep', help='多組參數平行回測並排名')
+    add_common(p)
+    d = DEFAULT_PARAMS
+    p.add_argument('--gap', type=int, nargs='+', default=[d['death_sea_gap']])
+    p.add_argument('--repeat', choices=['yes', 'no'], nargs='+', default=['yes'])
+    p.add_argument('--long-period', type=int, nargs='+', default=[d['breakout_long_period']])
+    p.add_argument('--long-thresh', type=int, nargs='+', default=[d['breakout_long_thresh']])
+    p.add_argument('--short-period', type=int, nargs='+', default=[d['breakout_short_period']])
+    p.add_argument('--short-thresh', type=int, nargs='+', default=[d['breakout_short_thresh']])
+    p.add_argument('--sample', type=int, default=None, help='從網格隨機抽樣的組合數')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--sort', default='kill_defense_rate',
+                   choices=['kill_defense_rate', 'breakout_win_rate', 'short_hits', 'long_hits'])
+    p.add_argument('--top', type=int, default=None)
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser('markov', help='拖牌與絕緣矩陣')
+    add_common(p)
+    p.add_argument('--issue', type=int, default=None)
+    p.add_argument('--lookback', type=int, default=200)
+    p.add_argument('--number', type=int, nargs='+', default=None, help='指定母體號碼 (預設為基準日開出號碼)')
+    p.set_defaults(func=cmd_markov)
+
+    p = sub.add_parser('combos', help='同期兩碼 / 三碼組合次數與搭檔')
+    add_common(p)
+    p.add_argument('--issue', type=int, default=None)
+    p.add_argument('--lookback', type=int, default=300)
+    p.add_argument('--number', type=int, nargs='+', default=None, help='候選號碼 (預設為基準日開出號碼)')
+    p.add_argument('--top', type=int, default=10)
+    p.set_defaults(func=cmd_combos)
+
+    p = sub.add_parser('drought', help='遺漏值、自身歷史百分位與回補 / 冰凍訊號')
+    add_common(p)
+    p.add_argument('--issue', type=int, default=None, help='基準期數 (預設最新一期)')
+    p.add_argument('--kill-pct', type=float, default=KILL_PERCENTILE, help='遺漏超過自身此百分位列為殺牌')
+    p.add_argument('--buy-band', type=float, nargs=2, default=list(BUY_BAND), metavar=('LOW', 'HIGH'), help='回補區百分位')
+    p.add_argument('--min-samples', type=int, default=MIN_SAMPLES, help='歷史遺漏樣本不足的號碼不給訊號')
+    p.add_argument('--backtest', type=int, default=0, help='另外回測最近 N 期')
+    p.set_defaults(func=cmd_drought)
+
+    p = sub.add_parser('freq', help='頻率條件機率表與最佳觀察窗')
+    add_common(p)
+    p.add_argument('--window', type=int, default=30)
+    p.add_argument('--samples', type=int, default=150)
+    p.add_argument('--min-window', type=int, default=5)
+    p.add_argument('--max-window', type=int, default=100)
+    p.set_defaults(func=cmd_freq)
+
+    p = sub.add_parser('import', help='批次匯入 CSV / xlsx (驗證後一次寫入試算表)')
+    add_common(p)
+    p.add_argument('batch', help='要匯入的 CSV / xlsx 檔 (欄位 Date、Issue、N1~N5)')
+    p.add_argument('--dry-run', action='store_true', help='只驗證、不寫入')
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser('watch', help='常駐監看新期數，預先更新衍生狀態並發佈快照')
+    add_common(p, many_games=True)
+    p.add_argument('--interval', type=float, default=60, help='輪詢間隔秒數')
+    p.add_argument('--params', default=None, help='要預先補算回測帳本的參數組 JSON 檔 (清單；預設只有預設參數)')
+    p.add_argument('--once', action='store_true', help='只輪詢一次就結束 (給 cron 用)')
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser('archive', help='開獎封存檔 (memmap 共用) 的檔頭與檢查碼')
+    add_common(p)
+    p.add_argument('--sync', action='store_true', help='先從資料來源同步 (只附加新期數)')
+    p.set_defaults(func=cmd_archive)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
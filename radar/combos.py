@@ -0,0 +1,166 @@
+from itertools import combinations
+
+import numpy as np
+
+from .assoc import _bits_from_column, _span
+from .store import BALLS, draws_to_masks, masks_to_matrix
+
+# ==========================================
+# 🧩 同期組合索引 (兩碼 741 組 / 三碼 9,139 組)
+# ==========================================
+# 每期 5 個號碼固定產生 10 組兩碼、10 組三碼，逐期記下組合編號 (n×10)；
+# 每 COMBO_STRIDE 期存一份累積次數，任意區間 [start, end) 的次數 = 兩個前綴相減，
+# 前綴 = checkpoint + 零頭 (< stride 期) 的 bincount。
+# 另外每個號碼一條位元集合 (倒排索引)，用來列出某個組合實際同開的期別
+COMBO_STRIDE = 32
+PAIRS = list(combinations(range(1, BALLS + 1), 2))
+TRIPLES = list(combinations(range(1, BALLS + 1), 3))
+# 單期 5 碼中某一組兩碼 / 三碼同開的機率 (隨機基準)
+PAIR_PROB = (5 * 4) / (BALLS * (BALLS - 1))
+TRIPLE_PROB = (5 * 4 * 3) / (BALLS * (BALLS - 1) * (BALLS - 2))
+
+# 號碼 → 組合編號的查表 (號碼由小到大；其餘位置為 -1)
+PAIR_ID = np.full((BALLS + 1, BALLS + 1), -1, dtype=np.int16)
+for _i, (_a, _b) in enumerate(PAIRS):
+    PAIR_ID[_a, _b] = _i
+TRIPLE_ID = np.full((BALLS + 1, BALLS + 1, BALLS + 1), -1, dtype=np.int16)
+for _i, (_a, _b, _c) in enumerate(TRIPLES):
+    TRIPLE_ID[_a, _b, _c] = _i
+PAIR_NUMBERS = np.array(PAIRS, dtype=np.uint8)
+TRIPLE_NUMBERS = np.array(TRIPLES, dtype=np.uint8)
+
+_PAIR_COLS = np.array(list(combinations(range(5), 2))).T
+_TRIPLE_COLS = np.array(list(combinations(range(5), 3))).T
+
+
+def draw_combo_ids(nums):
+    # (n×5 由小到大) → 每期 10 組兩碼編號、10 組三碼編號
+    nums = np.asarray(nums, dtype=np.intp).reshape(-1, 5)
+    pairs = PAIR_ID[nums[:, _PAIR_COLS[0]], nums[:, _PAIR_COLS[1]]].astype(np.uint16)
+    triples = TRIPLE_ID[nums[:, _TRIPLE_COLS[0]], nums[:, _TRIPLE_COLS[1]], nums[:, _TRIPLE_COLS[2]]].astype(np.uint16)
+    return pairs, triples
+
+
+class ComboIndex:
+    """第 i 列為第 i 期的組合編號；pair_counts / triple_counts 回傳第 [start, end) 期的同開次數。"""
+
+    def __init__(self, nums, stride=COMBO_STRIDE):
+        self.stride = stride
+        self.pairs = np.zeros((0, 10), dtype=np.uint16)
+        self.triples = np.zeros((0, 10), dtype=np.uint16)
+        self.pair_checkpoints = np.zeros((1, len(PAIRS)), dtype=np.int32)
+        self.triple_checkpoints = np.zeros((1, len(TRIPLES)), dtype=np.int32)
+        self.bits = [0] * BALLS
+        self.append(nums)
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def append(self, nums):
+        # 新期數附加在最後：組合編號、位元集合與完整區塊的 checkpoint 只補新的部分
+        nums = np.sort(np.asarray(nums).reshape(-1, 5), axis=1)
+        n = len(self)
+        pairs, triples = draw_combo_ids(nums)
+        self.pairs = np.concatenate([self.pairs, pairs])
+        self.triples = np.concatenate([self.triples, triples])
+        matrix = masks_to_matrix(draws_to_masks(nums))
+        for k in range(BALLS):
+            self.bits[k] |= _bits_from_column(matrix[:, k]) << n
+        self.pair_checkpoints = self._extend(self.pair_checkpoints, self.pairs, len(PAIRS))
+        self.triple_checkpoints = self._extend(self.triple_checkpoints, self.triples, len(TRIPLES))
+        return self
+
+    def _extend(self, checkpoints, ids, size):
+        done = len(checkpoints) - 1
+        blocks = len(ids) // self.stride
+        if blocks <= done:
+            return checkpoints
+        block_ids = ids[done * self.stride:blocks * self.stride].reshape(blocks - done, -1).astype(np.intp)
+        offsets = np.arange(blocks - done)[:, None] * size
+        block_sums = np.bincount((block_ids + offsets).ravel(), minlength=(blocks - done) * size).reshape(blocks - done, size)
+        return np.concatenate([checkpoints, np.cumsum(block_sums, axis=0, dtype=np.int32) + checkpoints[-1]])
+
+    def _prefix(self, checkpoints, ids, k, size):
+        k = min(max(k, 0), len(self))
+        base = k // self.stride * self.stride
+        return checkpoints[k // self.stride] + np.bincount(ids[base:k].ravel(), minlength=size)
+
+    def _prefix_one(self, checkpoints, ids, k, combo_id):
+        k = min(max(k, 0), len(self))
+        base = k // self.stride * self.stride
+        return int(checkpoints[k // self.stride, combo_id]) + int((ids[base:k] == combo_id).sum())
+
+    def pair_counts(self, start=0, end=None):
+        end = len(self) if end is None else end
+        size = len(PAIRS)
+        return self._prefix(self.pair_checkpoints, self.pairs, end, size) - self._prefix(self.pair_checkpoints, self.pairs, start, size)
+
+    def triple_counts(self, start=0, end=None):
+        end = len(self) if end is None else end
+        size = len(TRIPLES)
+        return self._prefix(self.triple_checkpoints, self.triples, end, size) - self._prefix(self.triple_checkpoints, self.triples, start, size)
+
+    def pair_matrix(self, start=0, end=None):
+        # 39×39 對稱矩陣 (對角線為 0)
+        matrix = np.zeros((BALLS, BALLS), dtype=np.int64)
+        counts = self.pair_counts(start, end)
+        matrix[PAIR_NUMBERS[:, 0] - 1, PAIR_NUMBERS[:, 1] - 1] = counts
+        return matrix + matrix.T
+
+    def count(self, numbers, start=0, end=None):
+        """{a, b} 或 {a, b, c} (任意個數皆可) 在第 [start, end) 期同期開出的次數。"""
+        end = len(self) if end is None else end
+        numbers = sorted(set(int(n) for n in numbers))
+        if len(numbers) == 2:
+            combo_id = int(PAIR_ID[numbers[0], numbers[1]])
+            return self._prefix_one(self.pair_checkpoints, self.pairs, end, combo_id) - self._prefix_one(self.pair_checkpoints, self.pairs, start, combo_id)
+        if len(numbers) == 3:
+            combo_id = int(TRIPLE_ID[numbers[0], numbers[1], numbers[2]])
+            return self._prefix_one(self.triple_checkpoints, self.triples, end, combo_id) - self._prefix_one(self.triple_checkpoints, self.triples, start, combo_id)
+        return self.together(numbers, start, end).bit_count()
+
+    def together(self, numbers, start=0, end=None):
+        # 組合內號碼全部同期開出的期別 (位元集合，第 t 個位元 = 第 t 期)
+        end = len(self) if end is None else end
+        bits = _span(int(start), int(end))
+        for num in numbers:
+            bits &= self.bits[int(num) - 1]
+        return bits
+
+    def positions(self, numbers, start=0, end=None):
+        # 同開期別的列位置 (由舊到新)
+        bits = self.together(numbers, start, end)
+        if not bits:
+            return np.zeros(0, dtype=np.intp)
+        raw = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(raw, bitorder='little'))
+
+    def top_partners(self, number, start=0, end=None, k=None):
+        # 與 number 同期開出次數最多的號碼 [(號碼, 次數)] (同次數號碼小者優先)
+        row = self.pair_matrix(start, end)[int(number) - 1]
+        order = [int(i) for i in np.argsort(-row, kind='stable') if i != int(number) - 1]
+        return [(i + 1, int(row[i])) for i in order[:k]]
+
+    def top_pairs(self, start=0, end=None, k=10):
+        counts = self.pair_counts(start, end)
+        order = np.argsort(-counts, kind='stable')[:k]
+        return [(PAIRS[i], int(counts[i])) for i in order]
+
+    def top_triples(self, start=0, end=None, k=10):
+        counts = self.triple_counts(start, end)
+        order = np.argsort(-counts, kind='stable')[:k]
+        return [(TRIPLES[i], int(counts[i])) for i in order]
+
+
+def combo_report(index, numbers, start=0, end=None):
+    """一組候選號碼內所有兩碼 / 三碼組合的同開次數，與隨機基準期望值的比值 (lift)。"""
+    end = len(index) if end is None else end
+    draws = max(end - start, 0)
+    numbers = sorted(set(int(n) for n in numbers))
+    rows = []
+    for size, prob in ((2, PAIR_PROB), (3, TRIPLE_PROB)):
+        for combo in combinations(numbers, size):
+            hits = index.count(combo, start, end)
+            expected = draws * prob
+            rows.append({'combo': combo, 'hits': hits, 'expected': expected, 'lift': hits / expected if expected else 0.0})
+    return rows
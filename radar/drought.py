@@ -0,0 +1,162 @@
+import numpy as np
+
+from .store import BALLS, BIT_VALUES, masks_to_matrix, matrix_to_masks, popcount
+
+# ==========================================
+# 🧊 遺漏值 (連續未開期數) 與各號碼自己的遺漏分布
+# ==========================================
+# 遺漏值 = 最新一期往回數、連續沒開出的期數 (上一期剛開出為 0)。
+# 每個號碼記住最後開出的位置，以及歷史上每一段「兩次開出之間的遺漏」次數直方圖；
+# 新期數只更新開出的 5 顆號碼 (O(1))。每 DROUGHT_STRIDE 期存一份狀態，
+# 時光機切到任何一期都從最近的 checkpoint 補跑不到 stride 期即可
+DROUGHT_STRIDE = 64
+# 遺漏 ≥ DROUGHT_CAP 的都併入最後一格 (539 平均遺漏約 7 期，歷史最長也很少超過 60)
+DROUGHT_CAP = 127
+# 遺漏超過自身歷史 KILL_PERCENTILE 百分位 → 仍在冰凍 (殺)；落在 BUY_BAND 之間 → 回補區 (買)
+KILL_PERCENTILE = 95.0
+BUY_BAND = (50.0, 80.0)
+# 歷史遺漏樣本太少的號碼不給訊號
+MIN_SAMPLES = 5
+
+
+def _completed_gaps(matrix):
+    # 全歷史向量化：每個號碼相鄰兩次開出的 (號碼, 完成位置, 遺漏值)
+    nums, pos = np.nonzero(matrix.T)
+    same = nums[1:] == nums[:-1]
+    return nums[1:][same], pos[1:][same], np.minimum(np.diff(pos)[same] - 1, DROUGHT_CAP)
+
+
+class DroughtIndex:
+    """last_seen[k-1] 為號碼 k 最後開出的位置 (未開過為 -1)；hist[k-1, g] 為遺漏 g 期的次數。"""
+
+    def __init__(self, masks, stride=DROUGHT_STRIDE):
+        self.stride = stride
+        self.masks = np.asarray(masks, dtype=np.uint64)
+        matrix = masks_to_matrix(self.masks)
+        n = len(matrix)
+        self.n = n
+        # 各 checkpoint (第 c*stride 期之前) 的最後開出位置與遺漏直方圖
+        blocks = n // stride
+        seen = np.maximum.accumulate(np.where(matrix, np.arange(n)[:, None], -1), axis=0) if n else np.zeros((0, BALLS), dtype=np.intp)
+        cp_last = np.full((blocks + 1, BALLS), -1, dtype=np.int64)
+        if blocks:
+            cp_last[1:] = seen[np.arange(1, blocks + 1) * stride - 1]
+        nums, done_at, gaps = _completed_gaps(matrix)
+        block = done_at // stride + 1
+        keep = block <= blocks
+        size = BALLS * (DROUGHT_CAP + 1)
+        cp_hist = np.bincount(
+            block[keep] * size + nums[keep] * (DROUGHT_CAP + 1) + gaps[keep], minlength=(blocks + 1) * size
+        ).reshape(blocks + 1, BALLS, DROUGHT_CAP + 1)
+        self.cp_last = cp_last
+        self.cp_hist = np.cumsum(cp_hist, axis=0, dtype=np.int32)
+        # 最新狀態
+        self.last_seen = seen[-1].astype(np.int64) if n else np.full(BALLS, -1, dtype=np.int64)
+        self.hist = np.bincount(nums * (DROUGHT_CAP + 1) + gaps, minlength=size).reshape(BALLS, DROUGHT_CAP + 1).astype(np.int32)
+
+    def __len__(self):
+        return self.n
+
+    @staticmethod
+    def _step(last_seen, hist, pos, mask):
+        # 第 pos 期開出 mask：開出號碼的遺漏段結束 (記一筆)，最後開出位置更新
+        drawn = np.flatnonzero((np.uint64(mask) & BIT_VALUES) != 0)
+        prev = last_seen[drawn]
+        seen_before = prev >= 0
+        np.add.at(hist, (drawn[seen_before], np.minimum(pos - prev[seen_before] - 1, DROUGHT_CAP)), 1)
+        last_seen[drawn] = pos
+
+    def append(self, masks):
+        # 新期數附加在最後：每期只動開出的 5 顆號碼；跨過 stride 邊界時多存一份 checkpoint
+        masks = np.asarray(masks, dtype=np.uint64)
+        self.masks = np.concatenate([self.masks, masks])
+        for mask in masks:
+            self._step(self.last_seen, self.hist, self.n, mask)
+            self.n += 1
+            if self.n % self.stride == 0:
+                self.cp_last = np.concatenate([self.cp_last, self.last_seen[None]])
+                self.cp_hist = np.concatenate([self.cp_hist, self.hist[None]])
+        return self
+
+    def state(self, end=None):
+        """第 [0, end) 期之後的 (最後開出位置, 遺漏直方圖)；預設為最新狀態。"""
+        end = self.n if end is None else min(max(end, 0), self.n)
+        if end == self.n:
+            return self.last_seen.copy(), self.hist.copy()
+        block = end // self.stride
+        last_seen, hist = self.cp_last[block].copy(), self.cp_hist[block].copy()
+        for pos in range(block * self.stride, end):
+            self._step(last_seen, hist, pos, self.masks[pos])
+        return last_seen, hist
+
+    def report(self, end=None):
+        """第 [0, end) 期之後每個號碼的遺漏值、百分位與歷史分布摘要 (各為長度 39 的陣列)。"""
+        end = self.n if end is None else min(max(end, 0), self.n)
+        return drought_report(*self.state(end), end)
+
+
+def drought_report(last_seen, hist, end):
+    # 目前遺漏 d 在自身歷史遺漏中的百分位 (中位秩：比 d 短的 + 一半等於 d 的)
+    drought = np.where(last_seen >= 0, end - 1 - last_seen, end)
+    cum = np.cumsum(hist, axis=1)
+    samples = cum[:, -1]
+    capped = np.minimum(drought, DROUGHT_CAP)
+    rows = np.arange(BALLS)
+    shorter = np.where(capped > 0, cum[rows, np.maximum(capped - 1, 0)], 0)
+    equal = hist[rows, capped]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percentile = np.where(samples > 0, (shorter + 0.5 * equal) / samples * 100, np.nan)
+
+    def quantile(q):
+        # 直方圖上的分位數 (第一個累積次數 ≥ q × 樣本數的遺漏值)
+        target = np.maximum(np.ceil(samples * q), 1)[:, None]
+        return np.where(samples > 0, np.argmax(cum >= target, axis=1), -1)
+
+    return {
+        'drought': drought, 'percentile': percentile, 'samples': samples,
+        'median': quantile(0.5), 'p90': quantile(0.9),
+        'max': np.where(samples > 0, DROUGHT_CAP - np.argmax(hist[:, ::-1] > 0, axis=1), -1),
+    }
+
+
+def drought_signals(report, kill_percentile=KILL_PERCENTILE, buy_band=BUY_BAND, min_samples=MIN_SAMPLES):
+    """遺漏訊號 (39 位元遮罩)：kill = 遺漏超過自身 kill_percentile 百分位，buy = 百分位落在 buy_band 之間。"""
+    enough = report['samples'] >= min_samples
+    pct = np.nan_to_num(report['percentile'], nan=-1.0)
+    kill = enough & (pct >= kill_percentile)
+    buy = enough & (pct >= buy_band[0]) & (pct < buy_band[1])
+    return {'kill': int(matrix_to_masks(kill[None])[0]), 'buy': int(matrix_to_masks(buy[None])[0])}
+
+
+def drought_backtest(index, start, end=None, kill_percentile=KILL_PERCENTILE, buy_band=BUY_BAND, min_samples=MIN_SAMPLES):
+    """以第 i 期 (含) 之前的遺漏狀態出訊號，對第 i+1 期開獎；回傳逐期遮罩與命中數。"""
+    end = len(index) - 1 if end is None else min(end, len(index) - 1)
+    start = max(start, 0)
+    positions = np.arange(start, max(end, start))
+    last_seen, hist = index.state(start)
+    kill = np.zeros(len(positions), dtype=np.uint64)
+    buy = np.zeros(len(positions), dtype=np.uint64)
+    for row, pos in enumerate(positions):
+        DroughtIndex._step(last_seen, hist, pos, index.masks[pos])
+        signals = drought_signals(drought_report(last_seen, hist, pos + 1), kill_percentile, buy_band, min_samples)
+        kill[row], buy[row] = signals['kill'], signals['buy']
+    next_hit = index.masks[positions + 1]
+    return {
+        'positions': positions, 'kill': kill, 'buy': buy,
+        'kill_size': popcount(kill), 'kill_fails': popcount(kill & next_hit),
+        'buy_size': popcount(buy), 'buy_hits': popcount(buy & next_hit),
+    }
+
+
+def summarize_drought(result):
+    # 與隨機基準 (每顆號碼每期開出機率 5/39) 對照
+    kill_size, buy_size = int(result['kill_size'].sum()), int(result['buy_size'].sum())
+    kill_fails, buy_hits = int(result['kill_fails'].sum()), int(result['buy_hits'].sum())
+    return {
+        'draws': len(result['positions']),
+        'kill_suggested': kill_size, 'kill_fails': kill_fails,
+        'kill_defense_rate': (kill_size - kill_fails) / kill_size * 100 if kill_size else 0.0,
+        'buy_suggested': buy_size, 'buy_hits': buy_hits,
+        'buy_hit_rate': buy_hits / buy_size * 100 if buy_size else 0.0,
+        'random_hit_rate': 5 / BALLS * 100,
+    }
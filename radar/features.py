@@ -0,0 +1,98 @@
+import numpy as np
+
+from .spatial import batch_geometry, draw_bits, picks_from_bits, predictions_tuple, sea_ranges
+from .store import masks_to_matrix, matrix_to_masks
+
+# ==========================================
+# 🧾 每期特徵表 (只跟開獎號碼與死亡之海間距有關的部分)
+# ==========================================
+# 鄰號、夾心、幾何中心、同尾數與最大斷層每期一個值；死亡之海每期 × 每個間距 (4~12) 一個遮罩。
+# 全部是 39 位元遮罩 (uint64)，一期約 100 bytes；新期數附加時只補算新列。
+# 長短線次數另由前綴和 O(1) 查得，所以任何基準期的推薦都只剩查表 + 幾個位元運算
+FEATURE_GAPS = tuple(range(4, 13))
+MASK_FIELDS = ('drawn', 'neighbors', 'sandwich', 'center', 'tail')
+
+
+class FeatureTable:
+    """第 i 列為第 i 期的特徵；death_sea[:, j] 對應間距 FEATURE_GAPS[j]。"""
+
+    def __init__(self, nums=()):
+        self.columns = {field: np.zeros(0, dtype=np.uint64) for field in MASK_FIELDS}
+        self.max_gap = np.zeros(0, dtype=np.uint8)
+        self.death_sea = np.zeros((0, len(FEATURE_GAPS)), dtype=np.uint64)
+        self.append(nums)
+
+    def __len__(self):
+        return len(self.max_gap)
+
+    def append(self, nums):
+        nums = np.asarray(nums).reshape(-1, 5)
+        if len(nums) == 0:
+            return self
+        geometry = batch_geometry(nums)
+        for field in MASK_FIELDS:
+            self.columns[field] = np.concatenate([self.columns[field], matrix_to_masks(geometry[field])])
+        self.max_gap = np.concatenate([self.max_gap, geometry['max_gap'].astype(np.uint8)])
+        seas = np.stack([matrix_to_masks(~geometry['drawn'] & (geometry['gap_len'] >= gap)) for gap in FEATURE_GAPS], axis=1)
+        self.death_sea = np.concatenate([self.death_sea, seas])
+        return self
+
+    def to_arrays(self, prefix='feature_'):
+        arrays = {f"{prefix}{field}": column for field, column in self.columns.items()}
+        arrays[f"{prefix}max_gap"] = self.max_gap
+        arrays[f"{prefix}death_sea"] = self.death_sea
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix='feature_'):
+        table = cls()
+        table.columns = {field: arrays[f"{prefix}{field}"] for field in MASK_FIELDS}
+        table.max_gap = arrays[f"{prefix}max_gap"]
+        table.death_sea = arrays[f"{prefix}death_sea"]
+        return table
+
+    def covers(self, gap_limit):
+        return int(gap_limit) in FEATURE_GAPS
+
+    def draw_bits(self, pos, gap_limit, draw):
+        # 與 spatial.draw_bits 相同的欄位，全部查表 (draw 為第 pos 期由小到大的號碼)
+        sea = int(self.death_sea[pos, FEATURE_GAPS.index(int(gap_limit))])
+        geometry = {field: int(self.columns[field][pos]) for field in MASK_FIELDS}
+        geometry['draw'] = draw
+        geometry['death_sea'] = sea
+        geometry['death_seas'] = sea_ranges(sea)
+        geometry['max_gap'] = int(self.max_gap[pos])
+        return geometry
+
+    def batch_geometry(self, pos, gap_limit):
+        # 與 spatial.batch_geometry 相同的 (N×39) 遮罩，外加該間距的死亡之海
+        geometry = {field: masks_to_matrix(self.columns[field][pos]) for field in MASK_FIELDS}
+        geometry['max_gap'] = self.max_gap[pos].astype(np.intp)
+        return geometry, masks_to_matrix(self.death_sea[pos, FEATURE_GAPS.index(int(gap_limit))])
+
+
+def feature_table(store):
+    """倉儲附帶的特徵表：第一次用到時整段算好，之後倉儲附加新期數只補算新列。"""
+    table = store.features
+    if table is None:
+        table = store.features = FeatureTable(store.nums)
+    elif len(table) < len(store):
+        table.append(store.nums[len(table):])
+    return table
+
+
+def feature_prediction_bits(store, pos, gap_limit, allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh):
+    # 間距超出特徵表範圍 (例如命令列指定 --gap 3) 時退回逐期計算
+    table = feature_table(store)
+    if table.covers(gap_limit):
+        geometry = table.draw_bits(pos, gap_limit, store.draw(pos))
+    else:
+        geometry = draw_bits(store.draw(pos), gap_limit)
+    return picks_from_bits(geometry, allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh)
+
+
+def feature_predictions(store, pos, gap_limit, allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh):
+    """與 get_predictions(store.draw(pos), ...) 相同的 10 個回傳值，但號碼幾何部分全部查表。"""
+    return predictions_tuple(feature_prediction_bits(
+        store, pos, gap_limit, allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh
+    ))
@@ -0,0 +1,67 @@
+import numpy as np
+
+from .store import masks_to_matrix
+
+# ==========================================
+# 📊 條件機率曲面：近 N 期出現 M 次 → 下一期開 / 不開
+# ==========================================
+MIN_SAMPLES = 5
+
+
+def frequency_surface(prefix, masks, windows, sample_ends, chunk=16):
+    """一次算完所有觀察窗 N；第 e 個樣本的窗口為第 [e-N, e) 期，答案為第 e 期。"""
+    windows = np.asarray(windows, dtype=np.intp)
+    sample_ends = np.asarray(sample_ends, dtype=np.intp)
+    next_hit = masks_to_matrix(masks[sample_ends])
+    end_counts = prefix[sample_ends]
+    max_m = int(windows.max()) * 5 if len(windows) else 0
+
+    totals = np.zeros((len(windows), max_m + 1), dtype=np.int64)
+    hits = np.zeros((len(windows), max_m + 1), dtype=np.int64)
+    # 觀察窗分批處理，避免 (窗數 × 樣本 × 39) 一次佔滿記憶體
+    for lo in range(0, len(windows), chunk):
+        ws = windows[lo:lo + chunk]
+        counts = end_counts[None] - prefix[np.maximum(sample_ends[None] - ws[:, None], 0)]
+        flat = (np.arange(len(ws))[:, None, None] * (max_m + 1) + counts).ravel()
+        size = len(ws) * (max_m + 1)
+        totals[lo:lo + chunk] = np.bincount(flat, minlength=size).reshape(len(ws), -1)
+        hits[lo:lo + chunk] = np.bincount(
+            flat, weights=np.broadcast_to(next_hit, counts.shape).ravel(), minlength=size
+        ).reshape(len(ws), -1)
+
+    # 裁掉所有觀察窗都沒出現過的高次數欄
+    used = np.flatnonzero(totals.any(axis=0))
+    width = used[-1] + 1 if len(used) else 1
+    return {'windows': windows, 'totals': totals[:, :width], 'hits': hits[:, :width]}
+
+
+def surface_rates(surface):
+    totals = surface['totals']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hit_rate = np.where(totals > 0, surface['hits'] / totals * 100, np.nan)
+    return hit_rate, 100 - hit_rate
+
+
+def window_row(surface, window):
+    # 回傳 [(M, 樣本數, 開出數)]，只含出現過的 M
+    i = int(np.flatnonzero(surface['windows'] == window)[0])
+    totals, hits = surface['totals'][i], surface['hits'][i]
+    return [(int(m), int(totals[m]), int(hits[m])) for m in np.flatnonzero(totals)]
+
+
+def best_per_window(surface, min_samples=MIN_SAMPLES):
+    # 每個觀察窗在樣本數足夠的 M 裡，最強殺牌 (不出率最高) 與最強主支 (開出率最高)
+    hit_rate, miss_rate = surface_rates(surface)
+    valid = surface['totals'] >= min_samples
+    best = []
+    for i, window in enumerate(surface['windows']):
+        if not valid[i].any():
+            continue
+        kill_m = int(np.nanargmax(np.where(valid[i], miss_rate[i], -np.inf)))
+        hit_m = int(np.nanargmax(np.where(valid[i], hit_rate[i], -np.inf)))
+        best.append({
+            'window': int(window),
+            'kill_m': kill_m, 'kill_rate': float(miss_rate[i, kill_m]),
+            'hit_m': hit_m, 'hit_rate': float(hit_rate[i, hit_m]),
+        })
+    return best
@@ -0,0 +1,134 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from .sources import FRAME_COLUMNS, RENAME_COLUMNS
+from .store import BALLS, NUM_COLS
+
+# ==========================================
+# 📦 批次匯入：CSV / xlsx / 期數區間 → 驗證 → 一次寫入
+# ==========================================
+# 期數為「民國年 + 三碼流水號」(例如 115049)，跨年時流水號從 001 重新開始；
+# 相鄰兩期的日期間隔超過 MAX_DATE_GAP 天只提出警告 (春節等長假休市)，不擋寫入
+MAX_DATE_GAP = 4
+
+
+def read_batch(raw, game_name=None):
+    # 上傳檔的位元組 → 原始表格；xlsx 有同名工作表就取該表，否則取第一張
+    if raw[:2] == b'PK':
+        sheets = pd.read_excel(io.BytesIO(raw), sheet_name=None, engine='openpyxl')
+        frame = sheets.get(game_name, next(iter(sheets.values())))
+    else:
+        frame = pd.read_csv(io.BytesIO(raw), dtype=str)
+    return frame.rename(columns=RENAME_COLUMNS)
+
+
+def next_issue(issue, date=None):
+    # 日期的民國年比上一期新 → 新年度第 001 期，否則流水號 +1
+    issue = int(issue)
+    if date is not None:
+        roc_year = pd.Timestamp(date).year - 1911
+        if roc_year > issue // 1000:
+            return roc_year * 1000 + 1
+    return issue + 1
+
+
+def issue_range_frame(first_issue, count, first_date):
+    # 補登用的空白表：期數依 next_issue 連號、日期逐日遞增 (週日休市的彩種可在表格內直接改)
+    dates = pd.date_range(pd.Timestamp(first_date), periods=count, freq='D')
+    issues = [int(first_issue)]
+    for date in dates[1:]:
+        issues.append(next_issue(issues[-1], date))
+    frame = pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Issue': issues})
+    for col in NUM_COLS:
+        frame[col] = pd.Series([None] * count, dtype='Int64')
+    return frame
+
+
+def _as_int(value):
+    if pd.isna(value) or float(value) != int(value):
+        return None
+    return int(value)
+
+
+def validate_batch(frame, store):
+    """檢查批次並對照現有期數索引。
+
+    回傳 {'rows': 可寫入的新期數 (依期數排序、號碼由小到大), 'skipped': 已存在且號碼相同的期數,
+    'errors': 擋下寫入的問題, 'warnings': 僅供提醒的問題}；errors 不為空時 rows 不可寫入。
+    """
+    errors, warnings = [], []
+    frame = frame.rename(columns=RENAME_COLUMNS)
+    missing = [col for col in FRAME_COLUMNS if col not in frame.columns]
+    if missing:
+        return {'rows': pd.DataFrame(columns=FRAME_COLUMNS), 'skipped': [], 'errors': [f"缺少欄位：{', '.join(missing)}"], 'warnings': []}
+
+    # 資料編輯器留下的整列空白直接略過
+    frame = frame[FRAME_COLUMNS].replace('', np.nan).dropna(how='all')
+    issues = pd.to_numeric(frame['Issue'], errors='coerce')
+    dates = pd.to_datetime(frame['Date'], errors='coerce')
+    numbers = frame[NUM_COLS].apply(pd.to_numeric, errors='coerce')
+
+    records = []
+    for row, (issue, date, nums) in enumerate(zip(issues, dates, numbers.itertuples(index=False)), start=1):
+        issue = _as_int(issue)
+        nums = [_as_int(n) for n in nums]
+        if issue is None:
+            errors.append(f"第 {row} 筆：期數不是整數")
+            continue
+        if pd.isna(date):
+            errors.append(f"期數 {issue}：日期無法解析")
+            continue
+        if None in nums:
+            errors.append(f"期數 {issue}：號碼必須是五個整數")
+            continue
+        if not all(1 <= n <= BALLS for n in nums):
+            errors.append(f"期數 {issue}：號碼必須介於 1 ~ {BALLS}")
+            continue
+        if len(set(nums)) != 5:
+            errors.append(f"期數 {issue}：五個號碼不可重複")
+            continue
+        records.append((issue, date.normalize(), sorted(nums)))
+
+    records.sort(key=lambda record: record[0])
+    batch_issues = np.array([issue for issue, _, _ in records], dtype=np.int64)
+    repeated = sorted({int(i) for i in batch_issues[1:][np.diff(batch_issues) == 0]})
+    if repeated:
+        errors.append(f"批次內期數重複：{', '.join(map(str, repeated))}")
+
+    # 已存在的期數：號碼相同就略過 (重複上傳同一份檔案無害)，不同則擋下
+    skipped, fresh = [], []
+    for (issue, date, nums), pos in zip(records, store.find_issues(batch_issues)):
+        if pos < 0:
+            fresh.append((issue, date, nums))
+        elif store.draw(pos) == nums:
+            skipped.append(issue)
+        else:
+            errors.append(f"期數 {issue} 已存在且號碼不同 (資料庫為 {store.draw(pos)})")
+
+    # 新期數只能接在最後，且期數連號、日期遞增
+    prev_issue = int(store.issues[-1]) if len(store) else None
+    prev_date = pd.Timestamp(store.dates[-1]) if len(store) and not np.isnat(store.dates[-1]) else None
+    for issue, date, _ in fresh:
+        if prev_issue is not None:
+            expected = {prev_issue + 1, next_issue(prev_issue, date)}
+            if issue not in expected:
+                errors.append(f"期數不連號：{prev_issue} 之後應為 {' 或 '.join(map(str, sorted(expected)))}，收到 {issue}")
+        if prev_date is not None:
+            gap = (date - prev_date).days
+            if gap <= 0:
+                errors.append(f"期數 {issue}：日期 {date:%Y-%m-%d} 未晚於上一期 {prev_date:%Y-%m-%d}")
+            elif gap > MAX_DATE_GAP:
+                warnings.append(f"期數 {issue}：距上一期 {gap} 天，請確認中間沒有漏登")
+        prev_issue, prev_date = issue, date
+
+    rows = pd.DataFrame(
+        [[f"{date:%Y-%m-%d}", issue] + nums for issue, date, nums in fresh], columns=FRAME_COLUMNS
+    )
+    return {'rows': rows, 'skipped': skipped, 'errors': errors, 'warnings': warnings}
+
+
+def batch_values(rows):
+    # 給 worksheet.append_rows 的二維清單 (純 Python 型別)
+    return [[str(date), int(issue)] + [int(n) for n in nums] for date, issue, *nums in rows[FRAME_COLUMNS].itertuples(index=False)]
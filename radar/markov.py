@@ -0,0 +1,137 @@
+from collections import Counter
+
+import numpy as np
+
+from .store import BALLS, draws_to_masks, masks_to_matrix
+
+# ==========================================
+# 🧬 拖牌轉移矩陣 (A 在第 t 期開出 → B 在第 t+1 期開出)
+# ==========================================
+# 每 TRANSITION_STRIDE 組相鄰期存一份累積 39×39 矩陣，其餘零頭在查詢時補算，
+# 全歷史的記憶體只要 (n / stride) 份矩陣
+TRANSITION_STRIDE = 16
+NEVER_FOLLOWED = np.iinfo(np.int32).max
+
+
+def _pair_sum(curr, nxt):
+    return np.einsum('ti,tj->ij', curr.astype(np.int32), nxt.astype(np.int32))
+
+
+class TransitionIndex:
+    """第 i 組相鄰期 = (第 i 期, 第 i+1 期)，transitions(a, b) 回傳第 [a, b) 組的 39×39 次數。"""
+
+    def __init__(self, nums, stride=TRANSITION_STRIDE):
+        self.stride = stride
+        self.onehot = masks_to_matrix(draws_to_masks(nums)).astype(np.uint8)
+        self.checkpoints = np.zeros((1, BALLS, BALLS), dtype=np.int32)
+        self._extend_checkpoints()
+
+    def to_arrays(self, prefix='transition_'):
+        return {f"{prefix}onehot": self.onehot, f"{prefix}checkpoints": self.checkpoints, f"{prefix}stride": np.array(self.stride)}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix='transition_'):
+        index = cls(np.zeros((0, 5), dtype=np.uint8), stride=int(arrays[f"{prefix}stride"]))
+        index.onehot = arrays[f"{prefix}onehot"]
+        index.checkpoints = arrays[f"{prefix}checkpoints"]
+        return index
+
+    @property
+    def curr(self):
+        return self.onehot[:-1]
+
+    @property
+    def next(self):
+        return self.onehot[1:]
+
+    def _extend_checkpoints(self):
+        # 只補算還沒有累積矩陣的完整區塊，既有的 checkpoint 不動
+        done = len(self.checkpoints) - 1
+        blocks = len(self.curr) // self.stride
+        if blocks <= done:
+            return
+        lo, hi = done * self.stride, blocks * self.stride
+        block_sums = np.einsum(
+            'bti,btj->bij',
+            self.curr[lo:hi].reshape(blocks - done, self.stride, BALLS).astype(np.int32),
+            self.next[lo:hi].reshape(blocks - done, self.stride, BALLS).astype(np.int32),
+        )
+        self.checkpoints = np.concatenate([self.checkpoints, np.cumsum(block_sums, axis=0) + self.checkpoints[-1]])
+
+    def append(self, nums):
+        # 新期數附加在最後 (與上一個最後一期也多出一組相鄰期)
+        self.onehot = np.concatenate([self.onehot, masks_to_matrix(draws_to_masks(nums)).astype(np.uint8)])
+        self._extend_checkpoints()
+
+    def __len__(self):
+        return len(self.curr)
+
+    def prefix(self, k):
+        k = min(max(k, 0), len(self))
+        block = k // self.stride
+        base = block * self.stride
+        return self.checkpoints[block] + _pair_sum(self.curr[base:k], self.next[base:k])
+
+    def transitions(self, start, end):
+        return self.prefix(end) - self.prefix(start)
+
+
+def draw_window_transitions(index, start, end):
+    # 歷史子集為第 [start, end) 期時，可用的相鄰期是第 [start, end-1) 組
+    return index.transitions(start, end - 1)
+
+
+def window_matrix(index, prefix, end, lookback):
+    # 歷史子集 = 第 [end-lookback, end) 期；回傳轉移矩陣與每碼在「有下一期」的期別中開出次數
+    start = max(end - lookback, 0)
+    matrix = draw_window_transitions(index, start, end)
+    lead_counts = prefix[max(end - 1, start)] - prefix[start]
+    return matrix, lead_counts
+
+
+def window_first_follow(index, end, lookback):
+    # 與 window_matrix 同一段歷史：first[a-1, b-1] = a 開出後 b 第一次跟著開出的是窗口內第幾組相鄰期
+    # (沒跟著開過為 NEVER_FOLLOWED)；原本用 value_counts 排拖牌，同次數時是依第一次出現的先後
+    start = max(end - lookback, 0)
+    stop = max(end - 1, start)
+    both = index.curr[start:stop, :, None].astype(bool) & index.next[start:stop, None, :].astype(bool)
+    return np.where(both.any(axis=0), both.argmax(axis=0), NEVER_FOLLOWED)
+
+
+def ranked_followers(row, first=None):
+    # 依次數由高到低排序，回傳 [(號碼, 次數)]，只含開出過的號碼。同次數時依 first (window_first_follow
+    # 的對應列) 的先後、同一期內號碼小者優先，與原本逐期掃描後 value_counts 的順序相同；未給 first 時號碼小者優先
+    first = np.zeros(BALLS, dtype=np.int64) if first is None else np.asarray(first)
+    order = np.lexsort((np.arange(BALLS), first, -np.asarray(row)))
+    return [(int(i) + 1, int(row[i])) for i in order if row[i] > 0]
+
+
+def never_followed(row):
+    return [int(i) + 1 for i in np.flatnonzero(row == 0)]
+
+
+def follower_report(matrix, lead_counts, draw, first=None):
+    # 今日每顆號碼的拖牌前 3 名、0 次絕緣牌與墊底冷牌 (歷史上沒開過的號碼略過)；
+    # first 為 window_first_follow 的結果時，同次數的排序與原本相同
+    rows = []
+    for num in draw:
+        appearances = int(lead_counts[num - 1])
+        if appearances == 0:
+            continue
+        freq = ranked_followers(matrix[num - 1], None if first is None else first[num - 1])
+        rows.append({
+            'number': int(num), 'appearances': appearances,
+            'top_3': freq[:3], 'never': never_followed(matrix[num - 1]), 'bottom_3': freq[-3:],
+        })
+    return rows
+
+
+def resonance_picks(rows):
+    # 被 2 顆以上今日號碼同時拖出 → 共振主支；被 3 顆 (次級：2 顆) 以上聯合排斥 → 共振絕緣牌
+    recommended = Counter(k for row in rows for k, _ in row['top_3'])
+    rejected = Counter(n for row in rows for n in row['never'])
+    return {
+        'buy': sorted(k for k, c in recommended.items() if c >= 2),
+        'kill': sorted(n for n, c in rejected.items() if c >= 3),
+        'kill_2': sorted(n for n, c in rejected.items() if c >= 2),
+    }
@@ -0,0 +1,195 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# ==========================================
+# ⏱️ 效能量測：耗時區段、計數器與量表 (同一行程內所有使用者共用)
+# ==========================================
+# 不依賴 Streamlit，app、CLI 與背景行程都能用；輸出 JSON 或 Prometheus 文字格式
+SPAN_WINDOW = 256
+PROMETHEUS_PREFIX = 'radar'
+
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_gauges = {}
+_started = time.time()
+
+
+def _key(name, labels):
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        span = _spans.get(key)
+        if span is None:
+            span = _spans[key] = {'count': 0, 'total': 0.0, 'max': 0.0, 'recent': deque(maxlen=SPAN_WINDOW)}
+        span['count'] += 1
+        span['total'] += seconds
+        span['max'] = max(span['max'], seconds)
+        span['recent'].append(seconds)
+
+
+def incr(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+class span:
+    """with span('sheet_fetch', sheet='539'): ...，或 start()/stop() 包住跨越多段程式碼的區間。"""
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+        self.began = None
+
+    def start(self):
+        self.began = time.perf_counter()
+        return self
+
+    def stop(self):
+        if self.began is None:
+            return 0.0
+        seconds = time.perf_counter() - self.began
+        self.began = None
+        observe(self.name, seconds, **self.labels)
+        return seconds
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def timed(name, **labels):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            with span(name, **labels):
+                return fn(*args, **kwargs)
+        return call
+    return wrap
+
+
+def cached(cache_decorator, name):
+    """包住 st.cache_data / st.cache_resource：外層每次呼叫記一次查詢，內層真的執行才記 miss。
+
+    用法：@cached(st.cache_data(ttl=600), 'load_data')；.clear() 照常可用。
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            incr('cache_misses', fn=name)
+            with span('cache_compute', fn=name):
+                return fn(*args, **kwargs)
+
+        cached_fn = cache_decorator(compute)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            incr('cache_calls', fn=name)
+            return cached_fn(*args, **kwargs)
+
+        call.clear = cached_fn.clear
+        return call
+    return wrap
+
+
+def snapshot():
+    """目前所有量測的 JSON 友善版本；快取命中數 = 呼叫數 - miss 數。"""
+    with _lock:
+        spans = [
+            {
+                'name': name, 'labels': dict(labels), 'count': s['count'],
+                'total_s': s['total'], 'mean_ms': s['total'] / s['count'] * 1000, 'max_ms': s['max'] * 1000,
+                'p50_ms': float(np.percentile(s['recent'], 50)) * 1000,
+                'p95_ms': float(np.percentile(s['recent'], 95)) * 1000,
+            }
+            for (name, labels), s in _spans.items()
+        ]
+        counters = [{'name': name, 'labels': dict(labels), 'value': v} for (name, labels), v in _counters.items()]
+        gauges = [{'name': name, 'labels': dict(labels), 'value': v} for (name, labels), v in _gauges.items()]
+
+    calls = {c['labels']['fn']: c['value'] for c in counters if c['name'] == 'cache_calls'}
+    misses = {c['labels']['fn']: c['value'] for c in counters if c['name'] == 'cache_misses'}
+    caches = [
+        {'fn': fn, 'calls': n, 'misses': misses.get(fn, 0), 'hits': n - misses.get(fn, 0),
+         'hit_rate': (n - misses.get(fn, 0)) / n * 100 if n else 0.0}
+        for fn, n in sorted(calls.items())
+    ]
+    return {
+        'pid': os.getpid(), 'uptime_s': time.time() - _started,
+        'spans': sorted(spans, key=lambda s: -s['total_s']),
+        'counters': counters, 'gauges': gauges, 'caches': caches,
+    }
+
+
+def to_json(indent=2):
+    return json.dumps(snapshot(), ensure_ascii=False, indent=indent)
+
+
+def _prom_escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_prom_escape(v)}"' for k, v in sorted(labels.items())) + '}'
+
+
+def to_prometheus():
+    """Prometheus 文字格式 (可給 node_exporter 的 textfile collector 讀)。"""
+    snap = snapshot()
+    p = PROMETHEUS_PREFIX
+    lines = [
+        f"# HELP {p}_span_seconds Time spent in instrumented spans.",
+        f"# TYPE {p}_span_seconds summary",
+    ]
+    for s in snap['spans']:
+        labels = {'span': s['name'], **s['labels']}
+        lines.append(f"{p}_span_seconds{_prom_labels({**labels, 'quantile': '0.5'})} {s['p50_ms'] / 1000:.6f}")
+        lines.append(f"{p}_span_seconds{_prom_labels({**labels, 'quantile': '0.95'})} {s['p95_ms'] / 1000:.6f}")
+        lines.append(f"{p}_span_seconds_sum{_prom_labels(labels)} {s['total_s']:.6f}")
+        lines.append(f"{p}_span_seconds_count{_prom_labels(labels)} {s['count']}")
+    for name in sorted({c['name'] for c in snap['counters']}):
+        lines.append(f"# TYPE {p}_{name}_total counter")
+        for c in snap['counters']:
+            if c['name'] == name:
+                lines.append(f"{p}_{name}_total{_prom_labels(c['labels'])} {c['value']}")
+    for name in sorted({g['name'] for g in snap['gauges']}):
+        lines.append(f"# TYPE {p}_{name} gauge")
+        for g in snap['gauges']:
+            if g['name'] == name:
+                lines.append(f"{p}_{name}{_prom_labels(g['labels'])} {g['value']}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path):
+    # 先寫暫存檔再換名，抓取端不會讀到一半
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        fh.write(to_prometheus())
+    os.replace(tmp_path, path)
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _gauges.clear()
@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .backtest import PICK_FIELDS
+from .spatial import batch_predictions
+from .store import BALLS, draws_to_masks, matrix_to_masks, popcount
+
+# ==========================================
+# 🎲 隨機基準：同一套策略跑在「均勻隨機 5/39」的模擬歷史上
+# ==========================================
+# 每次模擬都是一段獨立的假歷史，指標分佈就是「策略毫無預測力」時的表現；
+# 實際回測落在分佈的哪裡 (p 值、信賴區間) 才看得出是否真的優於隨機
+METRICS = ('short_hits', 'long_hits', 'breakout_win_rate', 'kill_defense_rate')
+SIM_BATCH = 128
+
+
+def simulate_draws(rng, n_sims, n_draws):
+    # (n_sims × n_draws × 5)，每期從 1~39 均勻抽 5 個不重複號碼
+    return np.argpartition(rng.random((n_sims, n_draws, BALLS)), 5, axis=2)[:, :, :5] + 1
+
+
+def simulate_metrics(params, n_sims, rows, seed):
+    """模擬 n_sims 段歷史，每段回測 rows 期；回傳 {指標: (n_sims,) 陣列}。"""
+    rng = np.random.default_rng(seed)
+    long_period, short_period = params['breakout_long_period'], params['breakout_short_period']
+    # 前面先墊滿長短線窗口，讓第一個基準期就有完整的次數
+    start = max(long_period, short_period) - 1
+    n_draws = start + rows + 1
+    base = np.arange(start, start + rows)
+
+    nums = simulate_draws(rng, n_sims, n_draws)
+    onehot = np.zeros((n_sims, n_draws, BALLS), dtype=np.int32)
+    np.put_along_axis(onehot, nums - 1, 1, axis=2)
+    prefix = np.zeros((n_sims, n_draws + 1, BALLS), dtype=np.int32)
+    np.cumsum(onehot, axis=1, out=prefix[:, 1:])
+
+    # 所有模擬的所有基準期攤平成一批，整批交給空間引擎
+    long_counts = prefix[:, base + 1] - prefix[:, np.maximum(base + 1 - long_period, 0)]
+    short_counts = prefix[:, base + 1] - prefix[:, np.maximum(base + 1 - short_period, 0)]
+    preds = batch_predictions(
+        nums[:, base].reshape(-1, 5), params['death_sea_gap'], params['include_repeat'],
+        long_counts.reshape(-1, BALLS), short_counts.reshape(-1, BALLS),
+        params['breakout_long_thresh'], params['breakout_short_thresh'],
+    )
+    next_hit = draws_to_masks(nums[:, base + 1])
+    picks = {field: matrix_to_masks(preds[field]) for field in PICK_FIELDS}
+
+    def per_sim(counts):
+        return counts.reshape(n_sims, rows).sum(axis=1)
+
+    suggested = per_sim(popcount(picks['breakout']))
+    breakout_hits = per_sim(popcount(picks['breakout'] & next_hit))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        win_rate = np.where(suggested > 0, breakout_hits / suggested * 100, 0.0)
+    return {
+        'short_hits': per_sim(popcount(picks['short'] & next_hit)),
+        'long_hits': per_sim(popcount(picks['long'] & next_hit)),
+        'breakout_win_rate': win_rate,
+        'kill_defense_rate': (rows * 10 - per_sim(popcount(picks['worst_10'] & next_hit))) / (rows * 10) * 100,
+    }
+
+
+def _simulate_task(args):
+    params, n_sims, rows, seed = args
+    return simulate_metrics(params, n_sims, rows, seed)
+
+
+def run_baseline(params, rows, n_sims=2000, seed=0, workers=None, batch=SIM_BATCH):
+    # 每批模擬用 SeedSequence 派生獨立種子，結果只由 seed 決定，與行程數無關
+    sizes = [min(batch, n_sims - lo) for lo in range(0, n_sims, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(params, size, rows, child) for size, child in zip(sizes, seeds)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or len(tasks) <= 1:
+        parts = [_simulate_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            parts = list(pool.map(_simulate_task, tasks))
+    return {m: np.concatenate([part[m] for part in parts]) if parts else np.zeros(0) for m in METRICS}
+
+
+def compare_to_baseline(observed, simulated, band=95):
+    """observed 為 backtest.summarize 的結果；回傳每個指標的隨機平均、信賴區間與單尾 p 值。"""
+    tail = (100 - band) / 2
+    report = {}
+    for metric in METRICS:
+        values = simulated[metric]
+        actual = float(observed[metric])
+        # p 值 = 隨機策略表現不輸實際的機率 (加一平滑，避免模擬次數有限時回報 0)
+        report[metric] = {
+            'observed': actual,
+            'mean': float(values.mean()) if len(values) else float('nan'),
+            'low': float(np.percentile(values, tail)) if len(values) else float('nan'),
+            'high': float(np.percentile(values, 100 - tail)) if len(values) else float('nan'),
+            'p_value': (int((values >= actual).sum()) + 1) / (len(values) + 1),
+        }
+    return report
@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import metrics
+
+# ==========================================
+# 🚚 背景預載：兩個彩種的資料與衍生索引同時準備
+# ==========================================
+# 背景執行緒只跑純 radar 的函式 (不碰 Streamlit)；前景的快取函式 miss 時用 take()
+# 接手同一個 key 的結果 (還在跑就等它)，所以切換彩種時不必再等一次網路往返
+PREFETCH_WORKERS = 4
+MAX_AGE = 600
+
+_lock = threading.Lock()
+_pool = None
+_jobs = {}
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix='radar-prefetch')
+    return _pool
+
+
+def _prune(now):
+    # 過期且已跑完的結果丟掉，避免資料長度變動後舊 key 一直留在記憶體
+    for key in [k for k, (at, future) in _jobs.items() if now - at >= MAX_AGE and future.done()]:
+        del _jobs[key]
+
+
+def _run(key, fn, args):
+    with metrics.span('prefetch', job=key[0]):
+        return fn(*args)
+
+
+def submit(key, fn, *args, max_age=MAX_AGE):
+    """同一個 key 在 max_age 秒內已排過 (不論是否跑完) 就不重排；回傳對應的 Future。"""
+    with _lock:
+        now = time.time()
+        _prune(now)
+        job = _jobs.get(key)
+        if job is not None and now - job[0] < max_age:
+            return job[1]
+        future = _executor().submit(_run, key, fn, args)
+        _jobs[key] = (now, future)
+        metrics.incr('prefetch_submitted', job=key[0])
+        return future
+
+
+def take(key, fn, *args, max_age=MAX_AGE):
+    """有未過期的預載結果就用 (還在跑就等)，否則當場計算；失敗的預載也改成當場重算。"""
+    with _lock:
+        job = _jobs.get(key)
+    if job is not None and time.time() - job[0] < max_age:
+        try:
+            result = job[1].result()
+            metrics.incr('prefetch_taken', job=key[0])
+            return result
+        except Exception:
+            metrics.incr('prefetch_failed', job=key[0])
+    result = fn(*args)
+    # 當場算好的也記下來，max_age 內不會再被背景重排一次
+    put(key, result)
+    return result
+
+
+def put(key, value):
+    # 前景已經有的結果 (例如寫入新期數後就地更新的倉儲) 直接登記，下一次 take() 就拿得到
+    done = Future()
+    done.set_result(value)
+    with _lock:
+        _jobs[key] = (time.time(), done)
+
+
+def forget(match=None):
+    # match 為 None 清掉全部；否則清掉 match(key) 為真的工作 (還在跑的讓它跑完，只是不再被取用)
+    with _lock:
+        for key in [k for k in _jobs if match is None or match(k)]:
+            del _jobs[key]
+
+
+def pending():
+    with _lock:
+        return [key for key, (_, future) in _jobs.items() if not future.done()]
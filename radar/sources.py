@@ -0,0 +1,110 @@
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from .store import NUM_COLS, clean_draws
+
+# ==========================================
+# 🔌 資料來源層：雲端試算表 / 本機快照檔
+# ==========================================
+FRAME_COLUMNS = ['Date', 'Issue'] + NUM_COLS
+RENAME_COLUMNS = {
+    'Date (開獎日期)': 'Date', 'Issue (期數)': 'Issue',
+    'N1 (號碼1)': 'N1', 'N2 (號碼2)': 'N2', 'N3 (號碼3)': 'N3',
+    'N4 (號碼4)': 'N4', 'N5 (號碼5)': 'N5'
+}
+LOCAL_SNAPSHOTS = ('539.xlsx', '539_history.csv')
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.environ.get('RADAR_CACHE_DIR', os.path.join(PROJECT_DIR, '.radar_cache'))
+
+
+def normalize_frame(df):
+    # 試算表原始欄位 → Date / Issue / N1~N5，並剔除期數或號碼殘缺的列
+    if df.empty:
+        return pd.DataFrame(columns=FRAME_COLUMNS)
+    df = df.rename(columns=RENAME_COLUMNS)
+    df['Issue'] = pd.to_numeric(df['Issue'], errors='coerce')
+    df = df.dropna(subset=['Issue'])
+    df['Issue'] = df['Issue'].astype(int)
+    if pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+    return clean_draws(df[FRAME_COLUMNS])
+
+
+def local_snapshot_path():
+    # 環境變數 RADAR_DATA_FILE 優先，否則取專案內第一個存在的快照檔
+    path = os.environ.get('RADAR_DATA_FILE')
+    if path:
+        return path
+    for name in LOCAL_SNAPSHOTS:
+        candidate = os.path.join(PROJECT_DIR, name)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def file_digest(path):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def read_workbook(path, game_name):
+    # 539_history.csv 其實是 xlsx，所以看檔頭 (PK 壓縮檔) 而不是看副檔名
+    with open(path, 'rb') as fh:
+        raw = fh.read()
+    if raw[:2] == b'PK':
+        sheets = pd.read_excel(io.BytesIO(raw), sheet_name=None, engine='openpyxl')
+        if game_name not in sheets:
+            return pd.DataFrame(columns=FRAME_COLUMNS)
+        return sheets[game_name]
+    return pd.read_csv(io.BytesIO(raw))
+
+
+def frame_to_arrays(df):
+    return {
+        'dates': df['Date'].astype(str).values.astype(np.str_),
+        'issues': df['Issue'].values.astype(np.int32),
+        'nums': df[NUM_COLS].values.astype(np.uint8),
+    }
+
+
+def arrays_to_frame(arrays):
+    df = pd.DataFrame(arrays['nums'].astype(int), columns=NUM_COLS)
+    df.insert(0, 'Issue', arrays['issues'].astype(int))
+    df.insert(0, 'Date', arrays['dates'].astype(str))
+    return df
+
+
+def save_arrays(path, arrays):
+    # 先寫暫存檔再換名，避免其他行程讀到寫一半的快取
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        np.savez(fh, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_arrays(path):
+    with np.load(path, allow_pickle=False) as data:
+        return {k: data[k] for k in data.files}
+
+
+def load_local(game_name, path=None, cache_dir=None):
+    # 同一份快照檔 (以內容雜湊為鍵) 只解析一次，之後直接讀 npz 二進位快取
+    path = path or local_snapshot_path()
+    if path is None:
+        return pd.DataFrame(columns=FRAME_COLUMNS)
+    digest = file_digest(path)
+    cache_path = os.path.join(cache_dir or CACHE_DIR, f"local-{game_name}-{digest[:16]}.npz")
+    if os.path.exists(cache_path):
+        return arrays_to_frame(load_arrays(cache_path))
+
+    df = normalize_frame(read_workbook(path, game_name))
+    save_arrays(cache_path, frame_to_arrays(df))
+    return df
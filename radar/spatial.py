@@ -0,0 +1,299 @@
+import functools
+
+import numpy as np
+
+from .store import BALLS, bits_to_numbers, masks_to_matrix, matrix_to_masks, numbers_to_bits
+
+# ==========================================
+# 🧠 空間演算法核心引擎 (每個類別是一個 39 位元整數)
+# ==========================================
+ALL_BITS = (1 << BALLS) - 1
+NUMBERS = np.arange(1, BALLS + 1)
+# 尾數 t 的所有號碼 (同尾數共鳴用)
+TAIL_BITS = [numbers_to_bits(n for n in range(1, BALLS + 1) if n % 10 == t) for t in range(10)]
+
+
+def _gap_bits(start, end):
+    # start < p < end 的所有號碼
+    return ((1 << (end - 1)) - 1) ^ ((1 << start) - 1)
+
+
+def _lowest_bits(bits, k):
+    # 只保留最低的 k 個位元 (等同排序後清單的 [:k])
+    kept = 0
+    while bits and k:
+        low = bits & -bits
+        kept |= low
+        bits ^= low
+        k -= 1
+    return kept
+
+
+def _count_list(counts):
+    # pd.Series (以號碼為索引，缺號視為 0) 或長度 39 的陣列 → 第 k-1 格是號碼 k 的次數
+    if hasattr(counts, 'reindex'):
+        # 已經是 1~39 依序排好的 (app 的 count_series) 就不必 reindex
+        if len(counts) == BALLS and (counts.index == NUMBERS).all():
+            return counts.tolist()
+        return counts.reindex(range(1, BALLS + 1), fill_value=0).tolist()
+    return [int(c) for c in counts]
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def kill_excluded(draw, sea, allow_repeat):
+    """殺牌前要排除的短線/長線「前 10 個」：照原本 list(set(...))[:10] 的順序，不一定是最小的 10 個。"""
+    # CPython 集合依雜湊槽位迭代，號碼超過表格大小會繞回前面 (例如 33 排在 2 之前)，
+    # 所以照原本的插入順序重建一次清單，讓殺牌結果與舊版逐位元相同
+    drawn = set(draw)
+    short_picks = [c for n in draw for c in (n - 1, n + 1) if 1 <= c <= BALLS and not sea >> (c - 1) & 1]
+    if allow_repeat:
+        short_picks.extend(draw)
+    short_picks = list(set(short_picks))
+
+    extended_draw = (0,) + draw + (BALLS + 1,)
+    max_gap, centers = 0, []
+    for start, end in zip(extended_draw, extended_draw[1:]):
+        gap = end - start - 1
+        if gap > 0 and gap >= max_gap:
+            if gap > max_gap:
+                max_gap, centers = gap, []
+            centers.extend(dict.fromkeys(((start + end) // 2, (start + end + 1) // 2)))
+    sandwiches = [draw[i] + 1 for i in range(len(draw) - 1) if draw[i + 1] - draw[i] == 2]
+    tails = [n % 10 for n in draw]
+    tail_resonances = [n for t in set(tails) if tails.count(t) >= 2 for n in range(1, BALLS + 1) if n % 10 == t]
+
+    if not allow_repeat:
+        short_picks = [p for p in short_picks if p not in drawn]
+        centers = [p for p in centers if p not in drawn]
+        tail_resonances = [p for p in tail_resonances if p not in drawn]
+    long_picks = list(set(centers + sandwiches + tail_resonances))
+    return numbers_to_bits(short_picks[:10] + long_picks[:10])
+
+
+def draw_bits(target_draw, gap_limit):
+    """只跟當期號碼與 gap_limit 有關的部分：死亡之海、鄰號、夾心、幾何中心、同尾數。"""
+    target_draw = sorted(target_draw)
+    extended_draw = [0] + target_draw + [40]
+    drawn = numbers_to_bits(target_draw)
+
+    death_seas = []
+    sea = 0
+    max_gap = 0
+    center = 0
+    for start, end in zip(extended_draw, extended_draw[1:]):
+        gap = end - start - 1
+        if gap >= gap_limit:
+            death_seas.append((start, end))
+            sea |= _gap_bits(start, end)
+        # 🎯 幾何中心：所有等於最大斷層的區段取中點 (非整數時取上下兩碼)
+        if gap > 0 and gap >= max_gap:
+            if gap > max_gap:
+                max_gap, center = gap, 0
+            center |= (1 << ((start + end) // 2 - 1)) | (1 << ((start + end + 1) // 2 - 1))
+
+    tails = [n % 10 for n in target_draw]
+    tail = 0
+    for t in set(tails):
+        if tails.count(t) >= 2:
+            tail |= TAIL_BITS[t]
+
+    return {
+        'draw': target_draw, 'drawn': drawn, 'death_sea': sea, 'death_seas': death_seas, 'max_gap': max_gap,
+        'neighbors': ((drawn << 1) | (drawn >> 1)) & ALL_BITS,
+        'sandwich': (drawn << 1) & (drawn >> 1) & ~drawn,
+        'center': center, 'tail': tail,
+    }
+
+
+def sea_ranges(sea):
+    # 死亡之海遮罩 → [(左邊界, 右邊界)]；每段連續的 1 兩側就是夾住它的開出號 (或邊界 0 / 40)
+    ranges = []
+    while sea:
+        low = sea & -sea
+        # sea + low 會把最低的一段連續 1 進位清掉，與原值 XOR 後只剩這一段
+        run = (sea ^ (sea + low)) & sea
+        ranges.append((low.bit_length() - 1, run.bit_length() + 1))
+        sea ^= run
+    return ranges
+
+
+def picks_from_bits(geometry, allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh):
+    """draw_bits (或特徵表查到的同樣欄位) → 各推薦類別；長短線次數只影響殺牌與突破號。"""
+    target_draw = geometry['draw']
+    drawn, sea = geometry['drawn'], geometry['death_sea']
+    center, sandwich, tail = geometry['center'], geometry['sandwich'], geometry['tail']
+
+    short = geometry['neighbors'] & ~sea
+    short = short | drawn if allow_repeat else short & ~drawn
+
+    if not allow_repeat:
+        center &= ~drawn
+        tail &= ~drawn
+
+    long = center | sandwich | tail
+    consensus = short & long
+
+    worst_10 = 0
+    breakout = 0
+
+    long_counts = _count_list(s_long_series) if s_long_series is not None else None
+    short_counts = _count_list(s_short_series) if s_short_series is not None else None
+
+    if long_counts is not None:
+        excluded = drawn | kill_excluded(tuple(int(n) for n in target_draw), sea, allow_repeat)
+        cold = sea & ~excluded
+        neutral = ALL_BITS & ~excluded & ~cold
+
+        def by_long(bits):
+            return sorted(bits_to_numbers(bits), key=lambda x: long_counts[x - 1])
+
+        dead_pool = target_draw if not allow_repeat else []
+        worst_10 = numbers_to_bits((dead_pool + by_long(cold) + by_long(neutral))[:10])
+
+    if long_counts is not None and short_counts is not None:
+        for k in range(BALLS):
+            if not worst_10 >> k & 1 and long_counts[k] <= long_thresh and short_counts[k] >= short_thresh:
+                breakout |= 1 << k
+
+    return {
+        'short': short, 'long': long, 'consensus': consensus, 'death_sea': sea,
+        'sandwich': sandwich, 'center': center, 'tail': tail, 'max_gap': geometry['max_gap'],
+        'worst_10': worst_10, 'breakout': breakout, 'death_seas': geometry['death_seas'],
+    }
+
+
+def prediction_bits(target_draw, gap_limit, allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh):
+    """get_predictions 的位元版：交集/聯集/排除都是一次位元運算，鍵名與 batch_predictions 相同。"""
+    return picks_from_bits(draw_bits(target_draw, gap_limit), allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh)
+
+
+def predictions_tuple(bits):
+    # prediction_bits 的結果 → get_predictions 一直以來的 10 個回傳值
+    short_picks, long_picks, consensus_picks, sandwiches, geometric_centers, tail_resonances, worst_10_picks, breakout_picks = (
+        bits_to_numbers(bits[k]) for k in ('short', 'long', 'consensus', 'sandwich', 'center', 'tail', 'worst_10', 'breakout')
+    )
+    return (short_picks, long_picks, consensus_picks, bits['death_seas'], sandwiches, geometric_centers,
+            tail_resonances, bits['max_gap'], worst_10_picks, breakout_picks)
+
+
+def get_predictions(target_draw, gap_limit, allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh):
+    return predictions_tuple(prediction_bits(target_draw, gap_limit, allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh))
+
+
+# ==========================================
+# 🧠 空間演算法批次引擎 (一次算 N 期)
+# ==========================================
+COLUMNS = np.arange(BALLS + 2)
+
+
+def _per_row(x):
+    # 參數可以是單一數值，也可以是每期各自一組 (長度 N 的陣列)
+    x = np.asarray(x)
+    return x.reshape(-1, 1) if x.ndim else x
+
+
+def first_k(mask, k):
+    # 每列只保留由小到大的前 k 個 True (等同排序後清單的 [:k])
+    return mask & (np.cumsum(mask, axis=1) <= k)
+
+
+def mask_to_numbers(row):
+    return (np.flatnonzero(row) + 1).tolist()
+
+
+def batch_geometry(draws):
+    """batch_predictions 裡只跟開獎號碼有關的部分 (與參數無關)，各為 (N×39) 布林遮罩。"""
+    draws = np.sort(np.asarray(draws, dtype=np.intp).reshape(-1, 5), axis=1)
+    n = len(draws)
+    rows = np.arange(n)[:, None]
+
+    # 第 0 欄與第 40 欄是 extended_draw 的邊界 0 / 40
+    drawn_ext = np.zeros((n, BALLS + 2), dtype=bool)
+    drawn_ext[rows, draws] = True
+    drawn = drawn_ext[:, 1:-1]
+    left, right = drawn_ext[:, :-2], drawn_ext[:, 2:]
+
+    # 💀 死亡之海要用的空白長度：每個號碼左右最近的開出號 (或邊界) 之間夾了幾格
+    prev_drawn = np.maximum.accumulate(np.where(drawn_ext, COLUMNS, 0), axis=1)
+    next_drawn = np.minimum.accumulate(np.where(drawn_ext, COLUMNS, BALLS + 1)[:, ::-1], axis=1)[:, ::-1]
+    gap_len = (next_drawn - prev_drawn - 1)[:, 1:-1]
+
+    # 🎯 幾何中心：所有等於最大斷層的區段，取中點 (非整數時取上下兩碼)
+    ext = np.concatenate([np.zeros((n, 1), dtype=np.intp), draws, np.full((n, 1), BALLS + 1)], axis=1)
+    gaps = np.diff(ext, axis=1) - 1
+    max_gap = gaps.max(axis=1) if n else np.zeros(0, dtype=np.intp)
+    seg_r, seg_c = np.nonzero((gaps == max_gap[:, None]) & (gaps > 0))
+    mid_sum = ext[seg_r, seg_c] + ext[seg_r, seg_c + 1]
+    center_ext = np.zeros((n, BALLS + 2), dtype=bool)
+    center_ext[seg_r, mid_sum // 2] = True
+    center_ext[seg_r, (mid_sum + 1) // 2] = True
+
+    # 🧲 同尾數共鳴：同一尾數出現 2 顆以上，召喚 1~39 所有該尾數
+    tail_counts = (draws[:, :, None] % 10 == np.arange(10)).sum(axis=1)
+
+    return {
+        'drawn': drawn, 'neighbors': left | right, 'sandwich': left & right & ~drawn,
+        'center': center_ext[:, 1:-1], 'tail': (tail_counts >= 2)[:, NUMBERS % 10],
+        'max_gap': max_gap, 'gap_len': gap_len,
+    }
+
+
+def batch_death_sea(geometry, gap_limit):
+    return ~geometry['drawn'] & (geometry['gap_len'] >= _per_row(gap_limit))
+
+
+def batch_picks(geometry, death_sea, allow_repeat, long_counts=None, short_counts=None, long_thresh=0, short_thresh=0):
+    """batch_geometry (或特徵表展開的同樣欄位) 加上死亡之海 → 各推薦類別的 (N×39) 布林遮罩。"""
+    drawn = geometry['drawn']
+    n = len(drawn)
+    rows = np.arange(n)[:, None]
+
+    short = geometry['neighbors'] & ~death_sea
+    short = short | drawn if allow_repeat else short & ~drawn
+
+    sandwich = geometry['sandwich']
+    center, tail = geometry['center'], geometry['tail']
+    if not allow_repeat:
+        center = center & ~drawn
+        tail = tail & ~drawn
+
+    long = center | sandwich | tail
+    consensus = short & long
+
+    worst_10 = np.zeros((n, BALLS), dtype=bool)
+    breakout = np.zeros((n, BALLS), dtype=bool)
+
+    if long_counts is not None:
+        long_counts = np.asarray(long_counts, dtype=np.int64).reshape(n, BALLS)
+        excluded = drawn | first_k(short, 10) | first_k(long, 10)
+        # 短線或長線不超過 10 個時「前 10 個」就是全部；超過的列照原本的集合順序逐列補算
+        crowded = np.flatnonzero((short.sum(axis=1) > 10) | (long.sum(axis=1) > 10))
+        if len(crowded):
+            heads = [
+                kill_excluded(tuple(bits_to_numbers(int(d))), int(s), allow_repeat)
+                for d, s in zip(matrix_to_masks(drawn[crowded]), matrix_to_masks(death_sea[crowded]))
+            ]
+            excluded[crowded] = drawn[crowded] | masks_to_matrix(np.array(heads, dtype=np.uint64))
+        # 排序鍵：(死號池 → 深海冷號 → 中性號) → 長線次數 → 號碼本身；3 代表不入選
+        group = np.where(~excluded & death_sea, 1, np.where(~excluded, 2, 3))
+        if not allow_repeat:
+            group = np.where(drawn, 0, group)
+        key = (group << 40) | (long_counts << 8) | NUMBERS
+        order = np.argsort(key, axis=1)[:, :10]
+        worst_10[rows, order] = np.take_along_axis(group, order, axis=1) < 3
+
+    if long_counts is not None and short_counts is not None:
+        short_counts = np.asarray(short_counts, dtype=np.int64).reshape(n, BALLS)
+        breakout = (long_counts <= _per_row(long_thresh)) & (short_counts >= _per_row(short_thresh)) & ~worst_10
+
+    return {
+        'short': short, 'long': long, 'consensus': consensus, 'death_sea': death_sea,
+        'sandwich': sandwich, 'center': center, 'tail': tail, 'max_gap': geometry['max_gap'],
+        'worst_10': worst_10, 'breakout': breakout,
+    }
+
+
+def batch_predictions(draws, gap_limit, allow_repeat, long_counts=None, short_counts=None, long_thresh=0, short_thresh=0):
+    """get_predictions 的批次版：draws 為 (N×5)，counts 為 (N×39)，回傳各類別的 (N×39) 布林遮罩。"""
+    geometry = batch_geometry(draws)
+    return batch_picks(geometry, batch_death_sea(geometry, gap_limit), allow_repeat, long_counts, short_counts, long_thresh, short_thresh)
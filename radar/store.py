@@ -0,0 +1,183 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 🗄️ 開獎資料倉儲 (每個彩種一份)
+# ==========================================
+NUM_COLS = ['N1', 'N2', 'N3', 'N4', 'N5']
+BALLS = 39
+
+# 號碼 k 對應第 (k-1) 個位元，39 碼剛好塞進一個 uint64
+BIT_VALUES = np.left_shift(np.uint64(1), np.arange(BALLS, dtype=np.uint64))
+
+
+def draws_to_masks(nums):
+    nums = np.asarray(nums, dtype=np.intp).reshape(-1, 5)
+    if len(nums) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    return np.bitwise_or.reduce(BIT_VALUES[nums - 1], axis=1)
+
+
+def masks_to_matrix(masks):
+    # 39 位元遮罩展開成 (n×39) 布林矩陣，第 k-1 欄代表號碼 k
+    return (np.asarray(masks, dtype=np.uint64)[..., None] & BIT_VALUES) != 0
+
+
+def matrix_to_masks(matrix):
+    # masks_to_matrix 的反向：(n×39) 布林矩陣壓回 39 位元遮罩
+    matrix = np.asarray(matrix, dtype=bool)
+    if len(matrix) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    return np.bitwise_or.reduce(np.where(matrix, BIT_VALUES, np.uint64(0)), axis=1)
+
+
+# 每個位元組有幾個 1，給沒有 np.bitwise_count (numpy < 2.0) 的環境查表用
+_BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(masks):
+    # 每個 39 位元遮罩裡有幾顆號碼
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.int64)
+    return _BYTE_COUNTS[masks.view(np.uint8)].reshape(masks.shape + (8,)).sum(axis=-1, dtype=np.int64)
+
+
+def numbers_to_bits(numbers):
+    # 單期版本 (Python 整數)：號碼清單 → 39 位元整數
+    bits = 0
+    for n in numbers:
+        bits |= 1 << (int(n) - 1)
+    return bits
+
+
+def bits_to_numbers(bits):
+    # 39 位元整數 (或 uint64 遮罩) → 由小到大的號碼清單
+    bits = int(bits)
+    return [k + 1 for k in range(BALLS) if bits >> k & 1]
+
+
+def build_prefix_counts(nums):
+    # prefix[t, k-1] = 前 t 期 (第 0 ~ t-1 期) 號碼 k 的累積開出次數
+    nums = np.asarray(nums, dtype=np.intp).reshape(-1, 5)
+    onehot = np.zeros((len(nums), BALLS), dtype=np.int32)
+    onehot[np.repeat(np.arange(len(nums)), 5), nums.ravel() - 1] = 1
+    prefix = np.zeros((len(nums) + 1, BALLS), dtype=np.int32)
+    np.cumsum(onehot, axis=0, out=prefix[1:])
+    return prefix
+
+
+def window_counts(prefix, end, length):
+    # 第 [end-length, end) 期內 39 碼的開出次數，end 可為陣列 (一次查多個窗)
+    end = np.asarray(end, dtype=np.intp)
+    start = np.maximum(end - np.asarray(length, dtype=np.intp), 0)
+    return prefix[end] - prefix[start]
+
+
+def _sorted_draws(nums):
+    return np.ascontiguousarray(np.sort(np.asarray(nums).reshape(-1, 5), axis=1), dtype=np.uint8)
+
+
+def _draw_days(dates):
+    return np.asarray(pd.to_datetime(pd.Series(dates), errors='coerce').values, dtype='datetime64[D]')
+
+
+class DrawStore:
+    """連續記憶體版的開獎歷史：nums (n×5 uint8)、masks (39 位元)、Issue 與 Date 欄位。"""
+
+    def __init__(self, issues, dates, nums):
+        self.nums = _sorted_draws(nums)
+        self.masks = draws_to_masks(self.nums)
+        self.prefix = build_prefix_counts(self.nums)
+        self.issues = np.asarray(issues, dtype=np.int32)
+        self.dates = _draw_days(dates)
+        self._issue_order = None
+        # radar.features.feature_table 第一次用到時填入，之後隨 append 補算
+        self.features = None
+        # 由 radar.archive.open_store 對應出來時為 (路徑, 期數, 世代)
+        self.archive = None
+
+    def __len__(self):
+        return len(self.nums)
+
+    def __reduce_ex__(self, protocol):
+        # 封存檔版本只序列化檔案位置 (特徵表另外帶上)，子行程 / 快取讀回時自己 memmap 同一個檔
+        if self.archive is not None:
+            from .archive import open_store
+            return open_store, self.archive, {'features': self.features}
+        return super().__reduce_ex__(protocol)
+
+    def to_arrays(self):
+        # 快照用：連同遮罩與前綴和一起存，讀回時不必重算
+        return {'issues': self.issues, 'dates': self.dates, 'nums': self.nums, 'masks': self.masks, 'prefix': self.prefix}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        store = cls.__new__(cls)
+        store.issues = arrays['issues']
+        store.dates = arrays['dates'].astype('datetime64[D]')
+        store.nums = arrays['nums']
+        store.masks = arrays['masks']
+        store.prefix = arrays['prefix']
+        store._issue_order = None
+        store.features = None
+        store.archive = None
+        return store
+
+    def draw(self, i):
+        return [int(x) for x in self.nums[i]]
+
+    def window_counts(self, end, length):
+        return window_counts(self.prefix, end, length)
+
+    def find_issues(self, issues):
+        """期數 → 列位置 (找不到為 -1)；依期數排序的索引只在第一次查詢或附加新期數後建一次。"""
+        if self._issue_order is None:
+            self._issue_order = np.argsort(self.issues, kind='stable')
+        issues = np.asarray(issues, dtype=np.int64)
+        if len(self) == 0:
+            return np.full(issues.shape, -1, dtype=np.intp)
+        sorted_issues = self.issues[self._issue_order]
+        slots = np.minimum(np.searchsorted(sorted_issues, issues), len(sorted_issues) - 1)
+        return np.where(sorted_issues[slots] == issues, self._issue_order[slots], -1)
+
+    def append(self, issues, dates, nums):
+        # 新期數附加在最後：遮罩與前綴和只補算新列，舊列不動 (fingerprint 的舊前綴也不變)
+        nums = _sorted_draws(nums)
+        self.nums = np.concatenate([self.nums, nums])
+        self.masks = np.concatenate([self.masks, draws_to_masks(nums)])
+        self.prefix = np.concatenate([self.prefix, build_prefix_counts(nums)[1:] + self.prefix[-1]])
+        self.issues = np.concatenate([self.issues, np.asarray(issues, dtype=np.int32)])
+        self.dates = np.concatenate([self.dates, _draw_days(dates)])
+        self._issue_order = None
+        # 新期數只在記憶體裡，與封存檔脫鉤 (要共用請再 radar.archive.archived_store)
+        self.archive = None
+        return self
+
+    def fingerprint(self, n=None):
+        # 前 n 期 (預設全部) 的期數與號碼雜湊；新期數附加在後面時，舊的前綴雜湊不變
+        n = len(self) if n is None else n
+        sha = hashlib.sha1()
+        sha.update(self.issues[:n].tobytes())
+        sha.update(self.nums[:n].tobytes())
+        return sha.hexdigest()
+
+
+def clean_draws(df):
+    # 號碼欄位轉成整數並剔除空白/超出 1~39 的殘缺列，索引重新編號讓 df 與倉儲逐列對齊
+    df = df.copy()
+    for col in NUM_COLS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df.dropna(subset=NUM_COLS)
+    in_range = ((df[NUM_COLS] >= 1) & (df[NUM_COLS] <= BALLS)).all(axis=1)
+    df = df[in_range]
+    df[NUM_COLS] = df[NUM_COLS].astype(int)
+    return df.reset_index(drop=True)
+
+
+def build_draw_store(df):
+    if df.empty:
+        return DrawStore([], [], np.zeros((0, 5), dtype=np.uint8))
+    return DrawStore(df['Issue'].values, df['Date'].values, df[NUM_COLS].values)
@@ -0,0 +1,72 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .backtest import backtest_batch, hit_counts, summarize
+
+# ==========================================
+# 🧪 參數掃描：側邊欄六個旋鈕的網格 / 隨機抽樣回測
+# ==========================================
+PARAM_KEYS = (
+    'death_sea_gap', 'include_repeat',
+    'breakout_long_period', 'breakout_long_thresh',
+    'breakout_short_period', 'breakout_short_thresh',
+)
+
+_worker_store = None
+
+
+def param_grid(choices):
+    # choices: {參數名: 候選值清單}，回傳所有組合
+    values = [list(choices[k]) for k in PARAM_KEYS]
+    return [dict(zip(PARAM_KEYS, combo)) for combo in itertools.product(*values)]
+
+
+def sample_params(choices, n, seed=0):
+    grid = param_grid(choices)
+    if n >= len(grid):
+        return grid
+    rng = np.random.default_rng(seed)
+    return [grid[i] for i in sorted(rng.choice(len(grid), size=n, replace=False))]
+
+
+def evaluate(store, params, start=0, end=None):
+    _, preds, next_hit = backtest_batch(
+        store, params['death_sea_gap'], params['include_repeat'],
+        params['breakout_long_period'], params['breakout_long_thresh'],
+        params['breakout_short_period'], params['breakout_short_thresh'],
+        start=start, end=end,
+    )
+    return {**params, **summarize(hit_counts(preds, next_hit))}
+
+
+def _init_worker(store):
+    # 每個子行程只在啟動時接收一次歷史資料 (封存檔版本的倉儲只傳檔案位置，子行程自己 memmap)
+    global _worker_store
+    _worker_store = store
+
+
+def _evaluate_chunk(args):
+    combos, start, end = args
+    return [evaluate(_worker_store, params, start, end) for params in combos]
+
+
+def run_sweep(store, combos, start=None, end=None, workers=None, chunk_size=8):
+    # start 預設取最長的長線期數，確保每個組合都在同一批、窗口完整的期數上比較
+    if start is None:
+        start = max(p['breakout_long_period'] for p in combos) - 1 if combos else 0
+    workers = workers or os.cpu_count() or 1
+    chunks = [(combos[i:i + chunk_size], start, end) for i in range(0, len(combos), chunk_size)]
+
+    if workers <= 1 or len(chunks) <= 1:
+        rows = [evaluate(store, params, start, end) for params in combos]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker, initargs=(store,)) as pool:
+            rows = [row for chunk in pool.map(_evaluate_chunk, chunks) for row in chunk]
+    return pd.DataFrame(rows, columns=list(PARAM_KEYS) + [
+        'draws', 'short_hits', 'long_hits', 'breakout_suggested', 'breakout_hits',
+        'breakout_win_rate', 'kill_defense_rate',
+    ])
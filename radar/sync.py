@@ -0,0 +1,237 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from .sources import CACHE_DIR, RENAME_COLUMNS, load_arrays, normalize_frame, save_arrays
+from .store import NUM_COLS
+
+# ==========================================
+# 🔄 Google Sheets 增量同步 (只抓新期數)
+# ==========================================
+DEFAULT_SHEET_URL = "https://docs.google.com/spreadsheets/d/1PrG36Oebngqhm7DrhEUNpfTtSk8k50jdAo2069aBJw8/edit?gid=978302798#gid=978302798"
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+# 增量同步只讀最後 SYNC_OVERLAP 列 (逐格比對，對不上代表尾端被改過) 與之後的新列；
+# 每個行程第一次同步、之後每 SYNC_VERIFY_EVERY 次，同一趟 batch_get 再把已同步範圍的期數與號碼欄
+# 整段讀回來算檢查碼，與本機狀態不同代表中間的歷史被修改過，改為整張重抓。結束欄依表頭寬度決定
+SYNC_OVERLAP = 3
+SYNC_VERIFY_EVERY = 6
+CHECK_COLUMNS = ('Issue',) + tuple(NUM_COLS)
+
+# _lock 只保護下面幾張表；授權、開工作表與同步各自用 _key_lock 的鎖，網路往返時不佔任何鎖，
+# 所以兩個彩種 (兩張工作表) 可以同時同步
+_lock = threading.Lock()
+_key_locks = {}
+_clients = {}
+_worksheets = {}
+_states = {}
+_sync_counts = {}
+
+
+def _creds_key(creds_json):
+    return hashlib.sha1(creds_json.encode('utf-8')).hexdigest()
+
+
+def _key_lock(key):
+    with _lock:
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = threading.Lock()
+        return lock
+
+
+def get_client(creds_json):
+    # 每個行程、每組金鑰只授權一次，之後共用同一個 gspread client
+    key = _creds_key(creds_json)
+    with _key_lock(('client', key)):
+        if key not in _clients:
+            import gspread
+            from google.oauth2.service_account import Credentials
+            with metrics.span('sheet_auth'):
+                creds = Credentials.from_service_account_info(json.loads(creds_json), scopes=SCOPES)
+                _clients[key] = gspread.authorize(creds)
+        return _clients[key]
+
+
+def get_worksheet(creds_json, sheet_url, sheet_name):
+    key = (_creds_key(creds_json), sheet_url, sheet_name)
+    # 同一張工作表只開一次 (兩個執行緒同時要時，後到的等先到的開好)；不同工作表互不等待
+    with _key_lock(('worksheet',) + key):
+        if key not in _worksheets:
+            client = get_client(creds_json)
+            with metrics.span('sheet_open', sheet=sheet_name):
+                _worksheets[key] = client.open_by_url(sheet_url).worksheet(sheet_name)
+        return _worksheets[key]
+
+
+def _rows_digest(rows):
+    return hashlib.sha1(json.dumps(rows, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _pad(rows, width):
+    return [[str(v) for v in row[:width]] + [''] * (width - len(row)) for row in rows]
+
+
+def _state_path(sheet_name, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, f"sheet-{sheet_name}.npz")
+
+
+def _load_state(sheet_name):
+    if sheet_name in _states:
+        return _states[sheet_name]
+    path = _state_path(sheet_name)
+    if not os.path.exists(path):
+        return None
+    arrays = load_arrays(path)
+    header = arrays['header'].tolist()
+    if not header:
+        # 空白工作表沒有欄位可以對齊，直接當作沒有同步狀態
+        return None
+    rows = arrays['values'].reshape(-1, len(header)).tolist()
+    state = {'header': header, 'rows': rows, 'digest': str(arrays['digest'])}
+    if state['digest'] != _rows_digest(rows):
+        return None
+    _states[sheet_name] = state
+    return state
+
+
+def _save_state(sheet_name, state):
+    _states[sheet_name] = state
+    width = len(state['header'])
+    values = np.array(state['rows'], dtype=np.str_).reshape(-1, width) if state['rows'] else np.zeros((0, width), dtype=np.str_)
+    save_arrays(_state_path(sheet_name), {
+        'header': np.array(state['header'], dtype=np.str_),
+        'values': values,
+        'digest': np.array(state['digest']),
+    })
+
+
+def _full_fetch(worksheet):
+    with metrics.span('sheet_fetch', mode='full'):
+        values = worksheet.get_all_values()
+    metrics.incr('sheet_rows_fetched', len(values), mode='full')
+    if not values:
+        return {'header': [], 'rows': [], 'digest': _rows_digest([])}
+    header = [str(v) for v in values[0]]
+    rows = _pad(values[1:], len(header))
+    return {'header': header, 'rows': rows, 'digest': _rows_digest(rows)}
+
+
+def _column_letter(index):
+    # 1 起算的欄位編號 → 試算表欄名 (1 → A、27 → AA)
+    letters = ''
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def _check_span(header):
+    # 期數與號碼欄所在的連續欄位區間 [lo, hi) (0 起算)；表頭對不上時整列都納入檢查碼
+    cols = [i for i, name in enumerate(header) if RENAME_COLUMNS.get(name, name) in CHECK_COLUMNS]
+    if not cols:
+        return 0, len(header)
+    return min(cols), max(cols) + 1
+
+
+def _check_digest(rows, span):
+    lo, hi = span
+    return _rows_digest([row[lo:hi] for row in rows])
+
+
+def _tail_fetch(worksheet, state, verify=False):
+    # 資料列第 j 列 (0 起算) 位於試算表第 j+2 列；從重疊區開頭讀到最後。
+    # verify=True 時同一趟再讀回已同步的 n 列期數 / 號碼欄；任一項對不上就回傳 None (改為整張重抓)
+    n = len(state['rows'])
+    width = len(state['header'])
+    overlap = min(SYNC_OVERLAP, n)
+    span = _check_span(state['header'])
+    ranges = [f"A{n - overlap + 2}:{_column_letter(width)}"]
+    verify = verify and n > 0
+    if verify:
+        ranges.append(f"{_column_letter(span[0] + 1)}2:{_column_letter(span[1])}{n + 1}")
+    with metrics.span('sheet_fetch', mode='verify' if verify else 'tail'):
+        fetched = worksheet.batch_get(ranges)
+    tail = _pad(fetched[0], width)
+    metrics.incr('sheet_rows_fetched', len(tail), mode='tail')
+    if verify:
+        metrics.incr('sheet_rows_verified', n)
+        # 試算表不回傳尾端的空白列，補滿 n 列再比
+        synced = list(fetched[1]) + [[]] * (n - len(fetched[1]))
+        if _rows_digest(_pad(synced, span[1] - span[0])) != _check_digest(state['rows'], span):
+            return None
+    if tail[:overlap] != state['rows'][n - overlap:]:
+        return None
+    new_rows = tail[overlap:]
+    if not new_rows:
+        return state
+    rows = state['rows'] + new_rows
+    return {'header': state['header'], 'rows': rows, 'digest': _rows_digest(rows)}
+
+
+def sync_sheet(worksheet, sheet_name, full=False):
+    """回傳 (原始列狀態, 是否整張重抓)；平常只讀上次同步位置之後的新列。"""
+    # 讀寫同步狀態時才拿這張工作表的鎖，網路往返期間放開
+    with _key_lock(('sheet', sheet_name)):
+        state = None if full else _load_state(sheet_name)
+        base = _states.get(sheet_name)
+        count = _sync_counts.get(sheet_name, 0)
+        _sync_counts[sheet_name] = count + 1
+    synced = None
+    if state is not None and state['header']:
+        synced = _tail_fetch(worksheet, state, verify=count % SYNC_VERIFY_EVERY == 0)
+    refetched = synced is None
+    if refetched:
+        synced = _full_fetch(worksheet)
+    with _key_lock(('sheet', sheet_name)):
+        current = _states.get(sheet_name)
+        if refetched or current is base:
+            if synced is not current:
+                _save_state(sheet_name, synced)
+        else:
+            # 同時有另一個同步先存了較新的狀態 (例如背景預載與前景同一張表)，以先存的為準
+            synced = current
+    metrics.incr('sheet_syncs', sheet=sheet_name, refetched=refetched)
+    metrics.set_gauge('sheet_rows', len(synced['rows']), sheet=sheet_name)
+    return synced, refetched
+
+
+def append_draws(worksheet, sheet_name, values):
+    # 整批新期數一次 append_rows (一趟 API 往返)；同步狀態不動，下次增量同步會讀到這幾列
+    if not values:
+        return
+    with metrics.span('sheet_append', sheet=sheet_name):
+        worksheet.append_rows(values, value_input_option="USER_ENTERED")
+    metrics.incr('sheet_rows_appended', len(values), sheet=sheet_name)
+
+
+def state_frame(state):
+    if not state['header']:
+        return normalize_frame(pd.DataFrame())
+    return normalize_frame(pd.DataFrame(state['rows'], columns=state['header']))
+
+
+def last_synced_issue(sheet_name):
+    state = _states.get(sheet_name)
+    if not state or not state['rows']:
+        return None
+    df = state_frame(state)
+    return int(df['Issue'].iloc[-1]) if not df.empty else None
+
+
+def invalidate(sheet_name=None):
+    # 強制同步：丟掉記憶體與磁碟上的同步狀態，下次讀取會整張重抓
+    names = [sheet_name] if sheet_name else list(_states)
+    paths = [_state_path(sheet_name)] if sheet_name else glob.glob(_state_path('*'))
+    for name in names:
+        with _key_lock(('sheet', name)):
+            _states.pop(name, None)
+            _sync_counts.pop(name, None)
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,157 @@
+import os
+import threading
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+from .backtest import backtest_batch
+from .sources import CACHE_DIR
+from .store import BALLS, draws_to_masks, masks_to_matrix, popcount
+
+# ==========================================
+# 🎫 全組合選號：C(39,5) = 575,757 注一次評分
+# ==========================================
+# 所有注的號碼 (575,757×5 uint8) 與 39 位元遮罩 (uint64) 第一次用到時寫成 .npy，
+# 之後以唯讀 memmap 開啟，同一台機器上的 app、CLI 與背景行程共用同一份分頁快取。
+# 評分 = 各推薦名單的命中顆數與長短線頻率的加權和，整個空間一次向量化算完
+TICKET_COUNT = comb(BALLS, 5)
+PICK_FEATURES = ('consensus', 'short', 'long', 'breakout')
+FREQ_FEATURES = ('short_freq', 'long_freq')
+TICKET_FEATURES = PICK_FEATURES + FREQ_FEATURES
+# 預設權重：共識牌最重，突破號次之；頻率項是「相對期望值的偏離」加總，只用來分出同分的注
+TICKET_WEIGHTS = {
+    'consensus': 3.0, 'short': 1.0, 'long': 1.0, 'breakout': 2.0,
+    'short_freq': 0.5, 'long_freq': 0.5,
+}
+
+_lock = threading.Lock()
+_tables = {}
+
+
+def _table_paths(cache_dir=None):
+    base = os.path.join(cache_dir or CACHE_DIR, f"tickets-{BALLS}c5")
+    return {'nums': f"{base}-nums.npy", 'masks': f"{base}-masks.npy"}
+
+
+def enumerate_tickets():
+    # 依字典序列出所有注 (號碼由小到大)
+    nums = np.fromiter(combinations(range(1, BALLS + 1), 5), dtype=np.dtype((np.uint8, 5)), count=TICKET_COUNT)
+    return nums, draws_to_masks(nums)
+
+
+def _save_npy(path, array):
+    # 先寫暫存檔再換名，其他行程不會 memmap 到寫一半的檔案
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        np.save(fh, array)
+    os.replace(tmp_path, path)
+
+
+def ticket_table(cache_dir=None):
+    """{'nums': (575757×5) uint8, 'masks': (575757,) uint64}，兩者皆為唯讀 memmap。"""
+    paths = _table_paths(cache_dir)
+    with _lock:
+        table = _tables.get(paths['masks'])
+        if table is not None:
+            return table
+        try:
+            table = {key: np.load(path, mmap_mode='r') for key, path in paths.items()}
+        except (OSError, ValueError):
+            table = None
+        if table is None or len(table['masks']) != TICKET_COUNT:
+            nums, masks = enumerate_tickets()
+            _save_npy(paths['nums'], nums)
+            _save_npy(paths['masks'], masks)
+            table = {key: np.load(path, mmap_mode='r') for key, path in paths.items()}
+        _tables[paths['masks']] = table
+        return table
+
+
+def relative_frequency(counts, period):
+    # 近 period 期的開出次數 ÷ 期望次數 - 1
+    return np.asarray(counts, dtype=np.float64) / (period * 5 / BALLS) - 1.0
+
+
+def number_features(picks, long_counts, short_counts, long_period, short_period):
+    # 每個特徵對單一號碼的值 (長度 40，第 0 格不用)；一注的特徵 = 5 個號碼的值相加
+    columns = {field: np.concatenate([[0], masks_to_matrix(np.uint64(int(picks[field])))]).astype(np.float64) for field in PICK_FEATURES}
+    columns['short_freq'] = np.concatenate([[0.0], relative_frequency(short_counts, short_period)])
+    columns['long_freq'] = np.concatenate([[0.0], relative_frequency(long_counts, long_period)])
+    return columns
+
+
+def score_tickets(table, picks, long_counts, short_counts, long_period, short_period, kill=0, weights=None):
+    """每注分數；碰到殺牌遮罩 kill 的注為 -inf。picks 為 {'consensus', 'short', 'long', 'breakout'} → 39 位元遮罩。
+
+    所有特徵都是「5 個號碼各自的值相加」，所以先把權重合成每個號碼一個分數，
+    全空間只需要一次查表加總 (575,757×5)，不必逐一特徵掃過所有注。
+    """
+    weights = {**TICKET_WEIGHTS, **(weights or {})}
+    columns = number_features(picks, long_counts, short_counts, long_period, short_period)
+    per_number = sum(weights[field] * columns[field] for field in TICKET_FEATURES)
+    if kill:
+        per_number[1:][masks_to_matrix(np.uint64(int(kill)))] = -np.inf
+    nums = table['nums']
+    score = per_number[nums[:, 0]]
+    for col in range(1, 5):
+        score += per_number[nums[:, col]]
+    return score
+
+
+def top_tickets(score, k):
+    # 分數由高到低的前 k 注位置 (同分取字典序較前的注)；被排除 (-inf) 的注不列入
+    k = min(k, int(np.isfinite(score).sum()))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    candidates = np.argpartition(-score, k - 1)[:k] if k < len(score) else np.arange(len(score))
+    # argpartition 的邊界同分不穩定，把與第 k 名同分的注全部納入再排序
+    cutoff = score[candidates].min()
+    candidates = np.flatnonzero(score >= cutoff)
+    order = np.lexsort((candidates, -score[candidates]))
+    return candidates[order[:k]]
+
+
+def rank_tickets(table, picks, long_counts, short_counts, long_period, short_period, k=10, kill=0, weights=None):
+    """前 k 注與各自的特徵明細 [{'numbers', 'score', 'consensus', ..., 'long_freq'}]。"""
+    score = score_tickets(table, picks, long_counts, short_counts, long_period, short_period, kill, weights)
+    columns = number_features(picks, long_counts, short_counts, long_period, short_period)
+    rows = []
+    for i in top_tickets(score, k):
+        nums = np.asarray(table['nums'][i], dtype=np.intp)
+        row = {'numbers': [int(n) for n in nums], 'score': float(score[i])}
+        for field in TICKET_FEATURES:
+            value = columns[field][nums].sum()
+            row[field] = int(value) if field in PICK_FEATURES else float(value)
+        rows.append(row)
+    return rows
+
+
+def ticket_backtest(store, params, start, end=None, k=10, exclude_kill=True, weights=None, table=None):
+    """以第 i 期為基準選出前 k 注，對第 i+1 期開獎；回傳每期前 k 注的最佳命中數與命中分布。"""
+    table = ticket_table() if table is None else table
+    pos, preds, next_hit = backtest_batch(
+        store, params['death_sea_gap'], params['include_repeat'],
+        params['breakout_long_period'], params['breakout_long_thresh'],
+        params['breakout_short_period'], params['breakout_short_thresh'], start=start, end=end,
+    )
+    long_counts = store.window_counts(pos + 1, params['breakout_long_period'])
+    short_counts = store.window_counts(pos + 1, params['breakout_short_period'])
+    best = np.zeros(len(pos), dtype=np.int64)
+    distribution = np.zeros((len(pos), 6), dtype=np.int64)
+    for row in range(len(pos)):
+        picks = {
+            'consensus': int(preds['short'][row] & preds['long'][row]), 'short': int(preds['short'][row]),
+            'long': int(preds['long'][row]), 'breakout': int(preds['breakout'][row]),
+        }
+        kill = int(preds['worst_10'][row]) if exclude_kill else 0
+        score = score_tickets(
+            table, picks, long_counts[row], short_counts[row],
+            params['breakout_long_period'], params['breakout_short_period'], kill, weights,
+        )
+        hits = popcount(table['masks'][top_tickets(score, k)] & next_hit[row])
+        if len(hits):
+            best[row] = hits.max()
+        distribution[row] = np.bincount(hits, minlength=6)[:6]
+    return {'positions': pos, 'best_hits': best, 'distribution': distribution}
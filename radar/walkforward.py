@@ -0,0 +1,145 @@
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+
+from .backtest import PICK_FIELDS, hit_counts, iter_backtest
+from .btcache import HIT_FIELDS, ledger_key
+from .sources import CACHE_DIR
+
+# ==========================================
+# 🚶 全歷史逐期推進回測 (walk-forward)
+# ==========================================
+# 每個欄位一個 .npy 檔 (memmap)，逐段寫入；meta.json 記錄已完成列數，中斷後從斷點續跑
+WALK_CHUNK = 2000
+WALK_RUNS = 8
+COLUMNS = dict(
+    [('pos', np.int32), ('issue', np.int32)]
+    + [(field, np.uint64) for field in PICK_FIELDS]
+    + [(field, np.int8) for field in HIT_FIELDS]
+    + [(f"{field}_cum", np.int64) for field in HIT_FIELDS]
+)
+
+
+class WalkForwardRun:
+    """基準期 [start, end) 的逐期回測結果；done 為已寫入的列數。"""
+
+    def __init__(self, directory, start, end):
+        self.directory = directory
+        self.start = start
+        self.end = end
+        self.meta_path = os.path.join(directory, 'meta.json')
+        # 只算出路徑；結果檔第一次 stream() 才建立，光是開頁面或拉動區間不會留下空的回測
+        self.done = _read_done(directory)
+        if os.path.exists(directory):
+            os.utime(directory)
+
+    def _create(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for name, dtype in COLUMNS.items():
+            np.lib.format.open_memmap(self._path(name), mode='w+', dtype=dtype, shape=(self.total,)).flush()
+        self.done = 0
+        self._write_meta()
+
+    def __len__(self):
+        return self.done
+
+    @property
+    def total(self):
+        return self.end - self.start
+
+    @property
+    def finished(self):
+        return self.done >= self.total
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def _write_meta(self):
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({'start': self.start, 'end': self.end, 'done': self.done}, fh)
+        os.replace(tmp_path, self.meta_path)
+
+    def columns(self, names=None):
+        # 唯讀 memmap，只切出已完成的列，不會把整個檔案讀進記憶體
+        return {name: np.load(self._path(name), mmap_mode='r')[:self.done] for name in (names or COLUMNS)}
+
+    def totals(self):
+        if self.done == 0:
+            return {field: 0 for field in HIT_FIELDS}
+        cols = self.columns([f"{field}_cum" for field in HIT_FIELDS])
+        return {field: int(cols[f"{field}_cum"][-1]) for field in HIT_FIELDS}
+
+    def summary(self):
+        # 與 backtest.summarize 同樣的口徑
+        totals = self.totals()
+        suggested = totals['breakout_suggested']
+        return {
+            'draws': self.done,
+            'short_hits': totals['short_hits'],
+            'long_hits': totals['long_hits'],
+            'breakout_suggested': suggested,
+            'breakout_hits': totals['breakout_hits'],
+            'breakout_win_rate': totals['breakout_hits'] / suggested * 100 if suggested > 0 else 0.0,
+            'kill_defense_rate': (self.done * 10 - totals['kill_fails']) / (self.done * 10) * 100 if self.done else 0.0,
+        }
+
+    def stream(self, store, params, chunk=WALK_CHUNK):
+        """從斷點往後逐段回測並寫檔，每寫完一段就 yield 一次 (呼叫端可隨時停止迭代)。"""
+        if not os.path.exists(self.meta_path):
+            self._create()
+        cols = {name: np.lib.format.open_memmap(self._path(name), mode='r+') for name in COLUMNS}
+        running = self.totals()
+        for pos, preds, next_hit in iter_backtest(
+            store, params['death_sea_gap'], params['include_repeat'],
+            params['breakout_long_period'], params['breakout_long_thresh'],
+            params['breakout_short_period'], params['breakout_short_thresh'],
+            start=self.start + self.done, end=self.end, chunk=chunk,
+        ):
+            rows = slice(self.done, self.done + len(pos))
+            hits = hit_counts(preds, next_hit)
+            cols['pos'][rows] = pos
+            cols['issue'][rows] = store.issues[pos + 1]
+            for field in PICK_FIELDS:
+                cols[field][rows] = preds[field]
+            for field in HIT_FIELDS:
+                cols[field][rows] = hits[field]
+                cols[f"{field}_cum"][rows] = np.cumsum(hits[field]) + running[field]
+                running[field] += int(hits[field].sum())
+            for col in cols.values():
+                col.flush()
+            first = self.done == 0
+            self.done = rows.stop
+            self._write_meta()
+            if first:
+                # 第一次寫入列之後才算一份有進度的回測，這時再淘汰最久沒用的
+                _evict(os.path.dirname(self.directory))
+            yield self
+
+
+def _read_done(directory):
+    try:
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as fh:
+            return json.load(fh)['done']
+    except (OSError, ValueError, KeyError):
+        return 0
+
+
+def _evict(root):
+    # 只在有進度的回測之間保留最近 WALK_RUNS 份；還沒寫入任何列的 (可能正要開始跑) 不列入也不刪
+    runs = [path for path in glob.glob(os.path.join(root, '*')) if _read_done(path) > 0]
+    runs.sort(key=os.path.getmtime, reverse=True)
+    for path in runs[WALK_RUNS:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def walk_forward_run(store, game_name, params, start=0, end=None, cache_dir=None):
+    # 同一組 (彩種, 參數, 用到的資料, 區間) 共用同一份結果檔，所以中斷或換頁後可以續跑
+    end = len(store) - 1 if end is None else min(end, len(store) - 1)
+    start = min(max(start, 0), end)
+    root = os.path.join(cache_dir or CACHE_DIR, 'walkforward')
+    name = f"{ledger_key(game_name, params)}-{store.fingerprint(end + 1)[:12]}-{start}-{end}"
+    return WalkForwardRun(os.path.join(root, name), start, end)
@@ -0,0 +1,172 @@
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from . import archive, metrics
+from .btcache import backtest_ledger
+from .features import FeatureTable, feature_table
+from .markov import TransitionIndex
+from .sources import CACHE_DIR, arrays_to_frame, frame_to_arrays, load_arrays, save_arrays
+from .store import NUM_COLS, DrawStore, build_draw_store
+
+# ==========================================
+# 👀 常駐監看：新期數一到就把衍生狀態補好並發佈快照
+# ==========================================
+# 背景行程定時輪詢資料來源；有新期數時只補算新列 (前綴和、特徵表、拖牌轉移、回測帳本)，
+# 再寫出一份帶版本號的 npz 快照。UI 行程每次 rerun 只讀一個小小的 latest.json，
+# 版本變了才載入新快照，所以開獎後第一個訪客也不必等任何計算。
+# 開獎歷史同時同步到 radar.archive 的封存檔，app 與 CLI 直接 memmap 同一份
+SNAPSHOT_KEEP = 3
+# 超過 STALE_POLLS 次輪詢間隔沒有心跳，就當作監看行程已停止，UI 改回自己讀資料來源
+STALE_POLLS = 3
+
+
+def _snapshot_dir(game_name, source_key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, 'snapshots', f"{source_key}-{game_name}")
+
+
+def _write_json(path, payload):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(payload, fh, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, 'latest.json'), encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def latest_meta(game_name, source_key, cache_dir=None, now=None):
+    """最新快照的描述 (版本、期數、心跳時間)；沒有快照或監看行程已停止則回傳 None。"""
+    meta = _read_meta(_snapshot_dir(game_name, source_key, cache_dir))
+    now = time.time() if now is None else now
+    if meta is None or now - meta['polled_at'] > STALE_POLLS * meta['interval']:
+        return None
+    return meta
+
+
+def read_snapshot(meta, cache_dir=None):
+    """依 latest_meta 載入快照：回傳 (df, 倉儲 (已附特徵表), 拖牌轉移索引)。"""
+    directory = _snapshot_dir(meta['game'], meta['source'], cache_dir)
+    arrays = load_arrays(os.path.join(directory, f"v{meta['version']:06d}.npz"))
+    frame = arrays_to_frame({key[len('frame_'):]: value for key, value in arrays.items() if key.startswith('frame_')})
+    store = DrawStore.from_arrays(arrays)
+    store.features = FeatureTable.from_arrays(arrays)
+    return frame, store, TransitionIndex.from_arrays(arrays)
+
+
+class Watcher:
+    """單一彩種 × 資料來源的監看狀態；load_frame 每次呼叫回傳目前完整的開獎表。"""
+
+    def __init__(self, game_name, source_key, load_frame, param_sets=(), interval=60, cache_dir=None):
+        self.game_name = game_name
+        self.source_key = source_key
+        self.load_frame = load_frame
+        self.param_sets = list(param_sets)
+        self.interval = interval
+        self.cache_dir = cache_dir
+        self.directory = _snapshot_dir(game_name, source_key, cache_dir)
+        self.frame = None
+        self.store = None
+        self.transition = None
+        self.version = 0
+        # 重新啟動時從上一份快照接著做，第一次輪詢同樣只補新列
+        meta = _read_meta(self.directory)
+        if meta is not None:
+            try:
+                self.frame, self.store, self.transition = read_snapshot(meta, cache_dir)
+                self.version = meta['version']
+            except (OSError, KeyError, ValueError):
+                self.version = max(self._versions(), default=0)
+
+    def _versions(self):
+        return [int(os.path.basename(p)[1:-4]) for p in glob.glob(os.path.join(self.directory, 'v*.npz'))]
+
+    def _consistent(self, frame):
+        # 新表的前 n 列必須和目前倉儲一模一樣，才能只補後面的新列
+        n = len(self.store)
+        if len(frame) < n:
+            return False
+        nums = np.sort(frame[NUM_COLS].values[:n], axis=1)
+        return bool((frame['Issue'].values[:n] == self.store.issues).all() and (nums == self.store.nums).all())
+
+    def refresh(self, frame):
+        """回傳 'rebuilt'、'appended' 或 'idle'；前兩者代表衍生狀態已更新、需要發佈。"""
+        if self.store is None or not self._consistent(frame):
+            self.store = build_draw_store(frame)
+            feature_table(self.store)
+            self.transition = TransitionIndex(self.store.nums)
+            status = 'rebuilt'
+        elif len(frame) > len(self.store):
+            new = frame.iloc[len(self.store):]
+            self.store.append(new['Issue'].values, new['Date'].values, new[NUM_COLS].values)
+            feature_table(self.store)
+            self.transition.append(self.store.nums[len(self.store) - len(new):])
+            status = 'appended'
+        else:
+            status = 'idle'
+        self.frame = frame
+        if status != 'idle' and len(self.store):
+            for params in self.param_sets:
+                backtest_ledger(self.store, self.game_name, self.source_key, params, self.cache_dir)
+        return status
+
+    def publish(self, polled_at):
+        # 先寫新版本的 npz，再換掉 latest.json；舊版本留幾份給正在讀取的行程
+        self.version += 1
+        arrays = {f"frame_{key}": value for key, value in frame_to_arrays(self.frame).items()}
+        arrays.update(self.store.to_arrays())
+        arrays.update(self.store.features.to_arrays())
+        arrays.update(self.transition.to_arrays())
+        save_arrays(os.path.join(self.directory, f"v{self.version:06d}.npz"), arrays)
+        if len(self.store):
+            archive.sync_archive(archive.archive_path(self.game_name, self.source_key, self.cache_dir), self.store)
+        self.heartbeat(polled_at)
+        for version in sorted(self._versions())[:-SNAPSHOT_KEEP]:
+            try:
+                os.remove(os.path.join(self.directory, f"v{version:06d}.npz"))
+            except OSError:
+                pass
+
+    def heartbeat(self, polled_at):
+        _write_json(os.path.join(self.directory, 'latest.json'), {
+            'game': self.game_name, 'source': self.source_key, 'version': self.version,
+            'n_draws': len(self.store), 'last_issue': int(self.store.issues[-1]) if len(self.store) else None,
+            'digest': self.store.fingerprint(), 'polled_at': polled_at, 'interval': self.interval,
+        })
+
+    def poll(self):
+        polled_at = time.time()
+        with metrics.span('watch_poll', game=self.game_name):
+            status = self.refresh(self.load_frame())
+        metrics.incr('watch_polls', game=self.game_name, status=status)
+        if status == 'idle' and self.version:
+            self.heartbeat(polled_at)
+        else:
+            self.publish(polled_at)
+        return status
+
+
+def run_forever(watchers, interval, once=False, log=sys.stderr):
+    """輪詢所有監看對象；單次失敗 (例如網路斷線) 只記錄下來，下一輪再試。"""
+    while True:
+        started = time.time()
+        for watcher in watchers:
+            try:
+                status = watcher.poll()
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {watcher.source_key}-{watcher.game_name}: "
+                      f"{status}, {len(watcher.store)} 期, v{watcher.version}", file=log, flush=True)
+            except Exception as exc:
+                metrics.incr('watch_errors', game=watcher.game_name)
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {watcher.source_key}-{watcher.game_name}: ❌ {exc!r}", file=log, flush=True)
+        if once:
+            return
+        time.sleep(max(interval - (time.time() - started), 0))
@@ -0,0 +1,245 @@
+import os
+import threading
+import time
+from itertools import combinations
+
+import numpy as np
+
+from .backtest import backtest_batch
+from .sources import CACHE_DIR, load_arrays, save_arrays
+from .spatial import _lowest_bits
+from .store import bits_to_numbers, popcount
+
+# ==========================================
+# 🎡 包牌 (覆蓋設計)：號碼池開出 m 顆時，保證至少一注中 k 顆
+# ==========================================
+# 設計只跟 (池大小 v, k, m) 有關，先在抽象池 0..v-1 上解，再對應到實際號碼。
+# 每注與每個「開出組合」都是 v 位元遮罩；覆蓋矩陣 cover[t, s] = 第 t 注與第 s 個 m 碼組合交集 ≥ k。
+# 先用貪婪法求一組可行解，再在時間預算內用局部搜尋 (換一注、減一注) 壓低注數；
+# 解過的設計存在 CACHE_DIR/wheels，同一組 (v, k, m) 之後直接讀取
+WHEEL_BUDGET = 1.0
+MIN_POOL = 5
+MAX_POOL = 15
+# 今彩 539 獎金表 (中 k 顆 → 每注獎金)，每注 50 元；頭獎實際為均分，這裡以上限計
+PRIZES_539 = {5: 8_000_000, 4: 20_000, 3: 300, 2: 50}
+TICKET_PRICE = 50
+# 號碼池來源：共識牌、長短線前 5 名 (HOT)、第 6~10 名 (WARM)、突破號
+POOL_SOURCES = ('consensus', 'hot', 'warm', 'breakout')
+
+_lock = threading.Lock()
+_designs = {}
+
+
+def _subset_masks(v, size):
+    # v 個元素中取 size 個的所有組合，以位元遮罩表示 (由小到大排序，可用 searchsorted 反查編號)
+    if size > v:
+        return np.zeros(0, dtype=np.uint64)
+    return np.sort(np.array([sum(1 << i for i in combo) for combo in combinations(range(v), size)], dtype=np.uint64))
+
+
+def coverage_matrix(v, k, m):
+    """(所有 5 碼注, 所有 m 碼組合, cover)；cover[t, s] 為第 t 注是否與第 s 個組合交集 ≥ k。"""
+    tickets = _subset_masks(v, 5)
+    targets = _subset_masks(v, m)
+    cover = np.zeros((len(tickets), len(targets)), dtype=bool)
+    for lo in range(0, len(tickets), 256):
+        cover[lo:lo + 256] = popcount(tickets[lo:lo + 256, None] & targets[None, :]) >= k
+    return tickets, targets, cover
+
+
+def greedy_cover(cover):
+    # 每次選能多覆蓋最多「尚未覆蓋組合」的注 (同分取編號小者)；增益只扣掉新覆蓋的欄位
+    uncovered = np.ones(cover.shape[1], dtype=bool)
+    gains = cover.sum(axis=1)
+    chosen = []
+    while uncovered.any():
+        best = int(np.argmax(gains))
+        chosen.append(best)
+        newly = cover[best] & uncovered
+        uncovered &= ~newly
+        gains -= cover[:, newly].sum(axis=1)
+    return _drop_redundant(cover, chosen)
+
+
+def _drop_redundant(cover, chosen):
+    # 拿掉所有組合都還被別注覆蓋的多餘注 (從最後選的開始試)
+    chosen = list(chosen)
+    counts = cover[chosen].sum(axis=0)
+    for t in reversed(list(chosen)):
+        if (counts[cover[t]] >= 2).all():
+            chosen.remove(t)
+            counts -= cover[t]
+    return chosen
+
+
+def local_search(cover, solution, deadline, seed=0):
+    """在 deadline 之前嘗試用更少注覆蓋全部組合；回傳找到的最小解。
+
+    目標注數 = 目前最佳 - 1：先拿掉損失最小的一注，之後每步挑一個未覆蓋組合，
+    在「能覆蓋它的注」與「解內的注」之間找換完後未覆蓋數最少的一組交換 (最近換出的注短期內不換回)。
+    """
+    rng = np.random.default_rng(seed)
+    best = list(solution)
+    # 用 float32 做矩陣乘法 (走 BLAS)；次數最多幾千，float32 仍是精確整數
+    cover_f = cover.astype(np.float32)
+    while len(best) > 1 and time.perf_counter() < deadline:
+        solution = list(best)
+        counts = cover[solution].sum(axis=0, dtype=np.int32)
+        loss = cover_f[solution] @ (counts == 1).astype(np.float32)
+        drop = solution.pop(int(np.argmin(loss)))
+        counts -= cover[drop]
+        tabu = {drop: 0}
+        step = 0
+        while time.perf_counter() < deadline:
+            uncovered = counts == 0
+            if not uncovered.any():
+                break
+            step += 1
+            target = rng.choice(np.flatnonzero(uncovered))
+            candidates = np.array([t for t in np.flatnonzero(cover[:, target]) if tabu.get(t, -1) < step], dtype=np.intp)
+            if len(candidates) == 0:
+                candidates = np.flatnonzero(cover[:, target])
+            single = (counts == 1).astype(np.float32)
+            gain = cover_f[candidates] @ uncovered.astype(np.float32)
+            loss = cover_f[solution] @ single
+            # 換入注與換出注共同覆蓋、原本只被換出注覆蓋的組合不會變成未覆蓋
+            overlap = cover_f[candidates] @ (cover_f[solution] * single).T
+            after = int(uncovered.sum()) - gain[:, None] + loss[None, :] - overlap
+            picks = np.argwhere(after == after.min())
+            add_row, drop_col = picks[rng.integers(len(picks))]
+            added, dropped = int(candidates[add_row]), solution[drop_col]
+            solution[drop_col] = added
+            counts += cover[added].astype(np.int32) - cover[dropped]
+            tabu[dropped] = step + 3
+        if (counts > 0).all():
+            best = _drop_redundant(cover, solution)
+        else:
+            break
+    return best
+
+
+def _design_path(v, k, m, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, 'wheels', f"wheel-v{v}-k{k}-m{m}.npz")
+
+
+def check_wheel(v, k, m):
+    if not MIN_POOL <= v <= MAX_POOL:
+        raise ValueError(f"號碼池需為 {MIN_POOL} ~ {MAX_POOL} 顆 (目前 {v} 顆)")
+    if not 1 <= k <= m <= 5:
+        raise ValueError("需滿足 1 ≤ 保證中 k 顆 ≤ 池中開出 m 顆 ≤ 5")
+
+
+def wheel_design(v, k, m, budget=WHEEL_BUDGET, improve=False, cache_dir=None):
+    """(v, k, m) 的包牌設計：{'tickets': v 位元遮罩 (uint64), 'searched': 累積搜尋秒數, 'status'}。
+
+    status 為 'hit' (直接取用快取)、'solved' (第一次求解) 或 'improved' (improve=True 時再搜尋一輪)。
+    """
+    check_wheel(v, k, m)
+    path = _design_path(v, k, m, cache_dir)
+    with _lock:
+        design = _designs.get(path)
+        if design is None and os.path.exists(path):
+            arrays = load_arrays(path)
+            design = {'tickets': arrays['tickets'], 'searched': float(arrays['searched'])}
+            _designs[path] = design
+        if design is not None and not improve:
+            return {**design, 'status': 'hit'}
+
+    started = time.perf_counter()
+    tickets, _, cover = coverage_matrix(v, k, m)
+    if design is None:
+        solution = greedy_cover(cover)
+        status, searched = 'solved', 0.0
+    else:
+        solution = [int(i) for i in np.searchsorted(tickets, design['tickets'])]
+        status, searched = 'improved', design['searched']
+    solution = local_search(cover, solution, started + budget, seed=v * 100 + k * 10 + m)
+    design = {
+        'tickets': np.sort(tickets[solution]),
+        'searched': searched + time.perf_counter() - started,
+    }
+    with _lock:
+        cached = _designs.get(path)
+        # 其他執行緒同時解出更少注的設計就保留那一份
+        if cached is None or len(design['tickets']) <= len(cached['tickets']):
+            _designs[path] = design
+            save_arrays(path, {'tickets': design['tickets'], 'searched': np.array(design['searched'])})
+        else:
+            design = cached
+    return {**design, 'status': status}
+
+
+def wheel_tickets(pool, k, m, budget=WHEEL_BUDGET, improve=False, cache_dir=None):
+    """號碼池 → 包牌注單 (每注 5 個號碼) 與對應的 39 位元遮罩。"""
+    pool = sorted(set(int(n) for n in pool))
+    design = wheel_design(len(pool), k, m, budget, improve, cache_dir)
+    numbers = np.array(pool, dtype=np.uint64)
+    lookup = np.left_shift(np.uint64(1), numbers - np.uint64(1))
+    rows, masks = [], []
+    for ticket in design['tickets']:
+        picked = [i for i in range(len(pool)) if int(ticket) >> i & 1]
+        rows.append([pool[i] for i in picked])
+        masks.append(np.bitwise_or.reduce(lookup[picked]))
+    return {
+        'tickets': rows, 'masks': np.array(masks, dtype=np.uint64),
+        'status': design['status'], 'searched': design['searched'],
+    }
+
+
+def pool_bits(picks, sources=POOL_SOURCES):
+    # 號碼池 = 所選來源的聯集；picks 為 {'consensus', 'short', 'long', 'breakout'} → 39 位元整數
+    bits = 0
+    if 'consensus' in sources:
+        bits |= int(picks['consensus'])
+    if 'hot' in sources:
+        bits |= _lowest_bits(int(picks['short']), 5) | _lowest_bits(int(picks['long']), 5)
+    if 'warm' in sources:
+        for field in ('short', 'long'):
+            bits |= _lowest_bits(int(picks[field]), 10) & ~_lowest_bits(int(picks[field]), 5)
+    if 'breakout' in sources:
+        bits |= int(picks['breakout'])
+    return bits
+
+
+def wheel_payout(masks, draw_mask, prizes=PRIZES_539):
+    # 每注命中顆數與總獎金
+    hits = popcount(np.asarray(masks, dtype=np.uint64) & np.uint64(int(draw_mask)))
+    return hits, sum(prizes.get(int(h), 0) for h in hits)
+
+
+def wheel_backtest(store, params, sources, k, m, start, end=None, budget=WHEEL_BUDGET, prizes=PRIZES_539, cache_dir=None):
+    """以第 i 期的號碼池包牌、對第 i+1 期開獎；池太小或太大的期別略過 (不下注)。"""
+    pos, preds, next_hit = backtest_batch(
+        store, params['death_sea_gap'], params['include_repeat'],
+        params['breakout_long_period'], params['breakout_long_thresh'],
+        params['breakout_short_period'], params['breakout_short_thresh'], start=start, end=end,
+    )
+    rows = []
+    for row, i in enumerate(pos):
+        picks = {field: int(preds[field][row]) for field in ('short', 'long', 'breakout')}
+        picks['consensus'] = picks['short'] & picks['long']
+        pool = bits_to_numbers(pool_bits(picks, sources))
+        in_pool = len(set(pool) & set(bits_to_numbers(next_hit[row])))
+        if not MIN_POOL <= len(pool) <= MAX_POOL:
+            rows.append({'position': int(i), 'pool': pool, 'tickets': 0, 'cost': 0, 'payout': 0, 'best_hits': 0, 'in_pool': in_pool})
+            continue
+        wheel = wheel_tickets(pool, k, m, budget, cache_dir=cache_dir)
+        hits, payout = wheel_payout(wheel['masks'], next_hit[row], prizes)
+        rows.append({
+            'position': int(i), 'pool': pool, 'tickets': len(wheel['tickets']),
+            'cost': len(wheel['tickets']) * TICKET_PRICE, 'payout': payout,
+            'best_hits': int(hits.max()), 'in_pool': in_pool,
+        })
+    played = [r for r in rows if r['tickets']]
+    cost = sum(r['cost'] for r in played)
+    payout = sum(r['payout'] for r in played)
+    return {
+        'rows': rows,
+        'summary': {
+            'draws': len(rows), 'played': len(played), 'skipped': len(rows) - len(played),
+            'cost': cost, 'payout': payout, 'roi': (payout - cost) / cost * 100 if cost else 0.0,
+            'guaranteed': sum(1 for r in played if r['in_pool'] >= m),
+            'guarantee_met': sum(1 for r in played if r['in_pool'] >= m and r['best_hits'] >= k),
+            'best_hits': [sum(1 for r in played if r['best_hits'] == h) for h in range(6)],
+        },
+    }
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 與 benchmarks 一樣直接從原始碼目錄匯入 radar (專案沒有安裝成套件)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,97 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from radar import archive
+from radar.archive import HEADER_SIZE, archive_path, archived_store, open_archive, open_store, read_header, sync_archive
+from radar.store import DrawStore
+
+
+def synthetic_store(n, seed=0):
+    rng = np.random.default_rng(seed)
+    nums = np.argpartition(rng.random((n, 39)), 5, axis=1)[:, :5] + 1
+    return DrawStore(np.arange(1, n + 1), np.datetime64('2020-01-01') + np.arange(n), nums)
+
+
+def assert_same_draws(store, expected):
+    assert len(store) == len(expected)
+    for field in ('issues', 'dates', 'nums', 'masks', 'prefix'):
+        assert (getattr(store, field) == getattr(expected, field)).all(), field
+
+
+@pytest.fixture
+def path(tmp_path):
+    return archive_path('539', 'local', str(tmp_path))
+
+
+def test_append_then_reopen(path):
+    full = synthetic_store(300)
+    head = DrawStore(full.issues[:200], full.dates[:200], full.nums[:200])
+    assert sync_archive(path, head) == 'rebuilt'
+    assert sync_archive(path, head) == 'hit'
+    generation = read_header(path)['generation']
+
+    assert sync_archive(path, full) == 'appended'
+    header, records = open_archive(path)
+    assert header['count'] == 300 and header['generation'] == generation
+    assert_same_draws(open_store(path), full)
+    # 附加前打開的筆數仍然只看得到前 200 期
+    assert_same_draws(open_store(path, 200), head)
+
+
+def test_crc_mismatch_detected(path):
+    store = synthetic_store(50)
+    sync_archive(path, store)
+    with open(path, 'r+b') as fh:
+        fh.seek(HEADER_SIZE + 10 * archive.RECORD.itemsize + 8)
+        fh.write(b'\xff')
+    with pytest.raises(ValueError):
+        open_archive(path)
+    open_archive(path, verify=False)
+    # 損毀的檔案在下次同步時整份重寫
+    assert sync_archive(path, store) == 'rebuilt'
+    assert_same_draws(open_store(path), store)
+
+
+def test_history_rewrite_keeps_old_generation(path):
+    store = synthetic_store(80)
+    old = archived_store(store, path)
+    old_generation = old.archive[2]
+
+    edited = DrawStore(store.issues, store.dates, np.vstack([[1, 2, 3, 4, 5], store.nums[1:]]))
+    assert sync_archive(path, edited) == 'rebuilt'
+    assert read_header(path)['generation'] != old_generation
+    # 舊世代改名保留，已經對應舊世代的倉儲 (含序列化後再讀回的) 照樣可用
+    assert_same_draws(pickle.loads(pickle.dumps(old)), store)
+    assert_same_draws(open_store(path), edited)
+
+
+def test_pickle_carries_only_location(path):
+    store = archived_store(synthetic_store(2000), path)
+    payload = pickle.dumps(store)
+    assert len(payload) < 1000
+    assert store.__reduce_ex__(pickle.HIGHEST_PROTOCOL)[1] == (path, 2000, read_header(path)['generation'])
+    restored = pickle.loads(payload)
+    assert restored.archive == store.archive
+    assert isinstance(restored.nums, np.memmap)
+    assert_same_draws(restored, store)
+
+
+def test_missing_generation_fails_as_unpickling_error(path):
+    store = archived_store(synthetic_store(30), path)
+    with pytest.raises(pickle.UnpicklingError):
+        open_store(path, 30, store.archive[2] + 1)
+    with pytest.raises(pickle.UnpicklingError):
+        open_store(path, 31)
+
+
+def test_opened_drops_superseded_generations(path):
+    store = synthetic_store(60)
+    old = archived_store(store, path)
+    edited = synthetic_store(60, seed=1)
+    new = archived_store(edited, path)
+    generations = [gen for (p, gen) in archive._opened if p == path]
+    assert generations == [new.archive[2]]
+    # 已經握著舊世代 memmap 的倉儲仍然讀得到原本的資料
+    assert_same_draws(old, store)
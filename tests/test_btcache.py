@@ -0,0 +1,125 @@
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from radar import btcache
+from radar.backtest import PICK_FIELDS, backtest_batch, hit_counts
+from radar.btcache import HIT_FIELDS, backtest_ledger, ledger_key, ledger_rows
+from radar.store import DrawStore
+
+PARAMS = {
+    'death_sea_gap': 7, 'include_repeat': True,
+    'breakout_long_period': 60, 'breakout_long_thresh': 8,
+    'breakout_short_period': 20, 'breakout_short_thresh': 3,
+}
+
+
+def synthetic_store(n, seed=0):
+    rng = np.random.default_rng(seed)
+    nums = np.argpartition(rng.random((n, 39)), 5, axis=1)[:, :5] + 1
+    return DrawStore(np.arange(1, n + 1), np.datetime64('2020-01-01') + np.arange(n), nums)
+
+
+def head(store, n):
+    return DrawStore(store.issues[:n], store.dates[:n], store.nums[:n])
+
+
+def expected_ledger(store, params):
+    _, preds, next_hit = backtest_batch(
+        store, params['death_sea_gap'], params['include_repeat'],
+        params['breakout_long_period'], params['breakout_long_thresh'],
+        params['breakout_short_period'], params['breakout_short_thresh'],
+    )
+    hits = hit_counts(preds, next_hit)
+    return preds, np.cumsum(np.stack([hits[field] for field in HIT_FIELDS], axis=1), axis=0)
+
+
+def assert_matches_full_backtest(ledger, store, params):
+    preds, cum = expected_ledger(store, params)
+    for field in PICK_FIELDS:
+        assert (ledger[field] == preds[field]).all(), field
+    assert (ledger['cum'][0] == 0).all() and (ledger['cum'][1:] == cum).all()
+    assert ledger['n_draws'] == len(store) and ledger['digest'] == store.fingerprint()
+
+
+@pytest.fixture(autouse=True)
+def fresh_memory(monkeypatch):
+    monkeypatch.setattr(btcache, '_ledgers', OrderedDict())
+    monkeypatch.setattr(btcache, '_key_locks', {})
+
+
+def test_extend_matches_full_backtest(tmp_path):
+    store = synthetic_store(400)
+    ledger, status = backtest_ledger(head(store, 250), '539', 'local', PARAMS, str(tmp_path))
+    assert status == 'miss'
+    assert_matches_full_backtest(ledger, head(store, 250), PARAMS)
+
+    ledger, status = backtest_ledger(store, '539', 'local', PARAMS, str(tmp_path))
+    assert status == 'extended'
+    assert_matches_full_backtest(ledger, store, PARAMS)
+    assert backtest_ledger(store, '539', 'local', PARAMS, str(tmp_path))[1] == 'hit'
+
+    # 任意區間的累積命中是兩列相減
+    picks, hits, cum = ledger_rows(ledger, 100)
+    _, preds, next_hit = backtest_batch(store, 7, True, 60, 8, 20, 3, start=100)
+    assert (picks['worst_10'] == preds['worst_10']).all()
+    assert (cum['kill_fails'] == np.cumsum(hit_counts(preds, next_hit)['kill_fails'])).all()
+
+
+def test_changed_history_invalidates(tmp_path):
+    store = synthetic_store(200)
+    backtest_ledger(store, '539', 'local', PARAMS, str(tmp_path))
+    nums = store.nums.copy()
+    nums[50] = [1, 2, 3, 4, 5]
+    edited = DrawStore(store.issues, store.dates, nums)
+    ledger, status = backtest_ledger(edited, '539', 'local', PARAMS, str(tmp_path))
+    assert status == 'miss'
+    assert_matches_full_backtest(ledger, edited, PARAMS)
+    # 較短的新歷史 (例如換成較舊的快照) 也不能沿用較長的帳本
+    assert backtest_ledger(head(store, 150), '539', 'local', PARAMS, str(tmp_path))[1] == 'miss'
+
+
+def test_sources_keep_separate_ledgers(tmp_path):
+    sheet, local = synthetic_store(200), synthetic_store(180)
+    assert ledger_key('539', PARAMS, 'sheet') != ledger_key('539', PARAMS, 'local')
+    assert backtest_ledger(sheet, '539', 'sheet', PARAMS, str(tmp_path))[1] == 'miss'
+    assert backtest_ledger(local, '539', 'local', PARAMS, str(tmp_path))[1] == 'miss'
+    # 來回切換資料來源時各自命中，不會互相蓋掉
+    assert backtest_ledger(sheet, '539', 'sheet', PARAMS, str(tmp_path))[1] == 'hit'
+    assert backtest_ledger(local, '539', 'local', PARAMS, str(tmp_path))[1] == 'hit'
+    assert len(os.listdir(tmp_path / 'backtest')) == 2
+
+
+def test_memory_lru_falls_back_to_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(btcache, 'MEMORY_ENTRIES', 2)
+    store = synthetic_store(120)
+    keys = []
+    for gap in (5, 7, 9):
+        params = dict(PARAMS, death_sea_gap=gap)
+        backtest_ledger(store, '539', 'local', params, str(tmp_path))
+        keys.append(ledger_key('539', params, 'local'))
+    assert list(btcache._ledgers) == keys[1:]
+    # 被擠出記憶體的帳本從磁碟讀回，不必重算
+    ledger, status = backtest_ledger(store, '539', 'local', dict(PARAMS, death_sea_gap=5), str(tmp_path))
+    assert status == 'hit' and list(btcache._ledgers) == keys[2:] + keys[:1]
+    assert_matches_full_backtest(ledger, store, dict(PARAMS, death_sea_gap=5))
+
+
+def test_disk_lru_keeps_recent_ledgers(tmp_path, monkeypatch):
+    monkeypatch.setattr(btcache, 'DISK_ENTRIES', 2)
+    store = synthetic_store(120)
+    paths = []
+    for age, gap in zip((300, 200, 0), (5, 7, 9)):
+        params = dict(PARAMS, death_sea_gap=gap)
+        backtest_ledger(store, '539', 'local', params, str(tmp_path))
+        path = btcache._ledger_path(ledger_key('539', params, 'local'), str(tmp_path))
+        then = time.time() - age
+        os.utime(path, (then, then))
+        paths.append(path)
+    backtest_ledger(store, '539', 'local', dict(PARAMS, death_sea_gap=3), str(tmp_path))
+    remaining = sorted(os.listdir(tmp_path / 'backtest'))
+    assert len(remaining) == 2
+    assert not os.path.exists(paths[0]) and not os.path.exists(paths[1]) and os.path.exists(paths[2])
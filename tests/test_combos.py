@@ -0,0 +1,61 @@
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from radar.combos import PAIRS, TRIPLES, ComboIndex
+from radar.store import BALLS
+
+# 跨過 32 期 checkpoint 的各種區間 (含剛好落在邊界、同一區塊內、空區間)
+RANGES = [(0, 0), (0, 31), (0, 32), (0, 33), (5, 30), (31, 33), (32, 64), (33, 95), (63, 129), (100, 100), (17, 200), (0, 200)]
+
+
+def synthetic_nums(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.argpartition(rng.random((n, BALLS)), 5, axis=1)[:, :5] + 1
+
+
+def brute_force_counts(nums, start, end, size, combos):
+    counter = Counter(combo for draw in nums[start:end] for combo in combinations(sorted(draw.tolist()), size))
+    return np.array([counter[combo] for combo in combos])
+
+
+@pytest.fixture(scope='module')
+def nums():
+    return synthetic_nums(200)
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+def test_pair_and_triple_counts_match_brute_force(nums, start, end):
+    index = ComboIndex(nums)
+    assert (index.pair_counts(start, end) == brute_force_counts(nums, start, end, 2, PAIRS)).all()
+    assert (index.triple_counts(start, end) == brute_force_counts(nums, start, end, 3, TRIPLES)).all()
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+def test_single_combo_count_matches_brute_force(nums, start, end):
+    index = ComboIndex(nums)
+    rng = np.random.default_rng(start * 1000 + end)
+    for combo in [PAIRS[i] for i in rng.choice(len(PAIRS), 20)] + [TRIPLES[i] for i in rng.choice(len(TRIPLES), 20)]:
+        expected = sum(set(combo) <= set(draw.tolist()) for draw in nums[start:end])
+        assert index.count(combo, start, end) == expected, combo
+        assert len(index.positions(combo, start, end)) == expected
+
+
+@pytest.mark.parametrize('split', [1, 31, 32, 33, 64, 150])
+def test_append_matches_rebuild(nums, split):
+    grown = ComboIndex(nums[:split]).append(nums[split:])
+    rebuilt = ComboIndex(nums)
+    assert (grown.pair_checkpoints == rebuilt.pair_checkpoints).all()
+    assert (grown.triple_checkpoints == rebuilt.triple_checkpoints).all()
+    assert grown.bits == rebuilt.bits
+    for start, end in RANGES:
+        assert (grown.pair_counts(start, end) == rebuilt.pair_counts(start, end)).all()
+
+
+def test_pair_matrix_is_symmetric(nums):
+    matrix = ComboIndex(nums).pair_matrix(10, 150)
+    assert (matrix == matrix.T).all() and (np.diag(matrix) == 0).all()
+    # 每期 10 組兩碼，矩陣上三角總和 = 期數 × 10
+    assert np.triu(matrix).sum() == 140 * 10
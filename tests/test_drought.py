@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from radar.drought import DROUGHT_CAP, DroughtIndex, drought_backtest, drought_report
+from radar.store import BALLS, draws_to_masks
+
+
+def synthetic_masks(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return draws_to_masks(np.argpartition(rng.random((n, BALLS)), 5, axis=1)[:, :5] + 1)
+
+
+def brute_force_state(masks):
+    # 逐期掃過：最後開出位置與「兩次開出之間」的遺漏次數
+    last_seen = np.full(BALLS, -1)
+    hist = np.zeros((BALLS, DROUGHT_CAP + 1), dtype=np.int64)
+    for pos, mask in enumerate(masks):
+        for k in range(BALLS):
+            if int(mask) >> k & 1:
+                if last_seen[k] >= 0:
+                    hist[k, min(pos - last_seen[k] - 1, DROUGHT_CAP)] += 1
+                last_seen[k] = pos
+    return last_seen, hist
+
+
+def assert_same_index(a, b):
+    assert len(a) == len(b)
+    assert (a.last_seen == b.last_seen).all() and (a.hist == b.hist).all()
+    assert a.cp_last.shape == b.cp_last.shape and (a.cp_last == b.cp_last).all()
+    assert (a.cp_hist == b.cp_hist).all()
+
+
+@pytest.mark.parametrize('n', [0, 1, 63, 64, 65, 127, 128, 129, 300])
+def test_append_matches_rebuild(n):
+    masks = synthetic_masks(300)
+    # 從空的開始逐期 append，與一次建好的索引完全相同 (含 checkpoint)
+    grown = DroughtIndex(masks[:0])
+    for mask in masks[:n]:
+        grown.append([mask])
+    rebuilt = DroughtIndex(masks[:n])
+    assert_same_index(grown, rebuilt)
+    last_seen, hist = brute_force_state(masks[:n])
+    assert (rebuilt.last_seen == last_seen).all() and (rebuilt.hist == hist).all()
+
+
+@pytest.mark.parametrize('base, extra', [(60, 3), (60, 4), (60, 5), (63, 1), (64, 1), (10, 200)])
+def test_batch_append_across_checkpoints(base, extra):
+    masks = synthetic_masks(base + extra, seed=base)
+    grown = DroughtIndex(masks[:base]).append(masks[base:])
+    assert_same_index(grown, DroughtIndex(masks))
+
+
+@pytest.mark.parametrize('end', [0, 1, 63, 64, 65, 127, 128, 129, 250])
+def test_state_from_checkpoint_matches_prefix(end):
+    masks = synthetic_masks(250, seed=3)
+    index = DroughtIndex(masks)
+    last_seen, hist = index.state(end)
+    expected_last, expected_hist = brute_force_state(masks[:end])
+    assert (last_seen == expected_last).all() and (hist == expected_hist).all()
+    report, expected = index.report(end), DroughtIndex(masks[:end]).report()
+    for field in ('drought', 'samples', 'median', 'p90', 'max'):
+        assert (report[field] == expected[field]).all(), field
+    assert np.array_equal(report['percentile'], expected['percentile'], equal_nan=True)
+
+
+def test_report_drought_values():
+    # 號碼 1 在第 0、3 期開出；號碼 39 從沒開出
+    draws = [[1, 2, 3, 4, 5], [2, 3, 4, 5, 6], [2, 3, 4, 5, 6], [1, 2, 3, 4, 5], [6, 7, 8, 9, 10]]
+    index = DroughtIndex(draws_to_masks(np.array(draws)))
+    report = drought_report(*index.state(), len(index))
+    assert report['drought'][0] == 1 and report['drought'][5] == 0 and report['drought'][38] == 5
+    assert report['samples'][0] == 1 and report['max'][0] == 2 and report['samples'][38] == 0
+
+
+def test_backtest_uses_only_past_draws():
+    masks = synthetic_masks(200, seed=5)
+    result = drought_backtest(DroughtIndex(masks), 60, 130)
+    # 第 i 期的訊號只看第 0 ~ i 期：截掉之後的歷史不影響結果
+    truncated = drought_backtest(DroughtIndex(masks[:131]), 60, 130)
+    for field in ('kill', 'buy', 'kill_fails', 'buy_hits'):
+        assert (result[field] == truncated[field]).all(), field
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from radar.ingest import issue_range_frame, next_issue, validate_batch
+from radar.sources import FRAME_COLUMNS
+from radar.store import DrawStore
+
+# 資料庫最後三期落在民國 114 年底
+STORE_ROWS = [
+    ('2025-12-29', 114360, [3, 8, 15, 22, 37]),
+    ('2025-12-30', 114361, [1, 9, 18, 27, 36]),
+    ('2025-12-31', 114362, [5, 11, 19, 28, 39]),
+]
+
+
+@pytest.fixture
+def store():
+    return DrawStore([issue for _, issue, _ in STORE_ROWS], [date for date, _, _ in STORE_ROWS], [nums for _, _, nums in STORE_ROWS])
+
+
+def batch(*rows):
+    return pd.DataFrame([[date, issue, *nums] for date, issue, nums in rows], columns=FRAME_COLUMNS)
+
+
+CASES = [
+    # (名稱, 批次, 新期數 (None 為不檢查；有錯誤時整批不可寫入), 錯誤訊息片段, 警告訊息片段)
+    ('rollover to 001', [('2026-01-01', 115001, [2, 4, 6, 8, 10])], [115001], None, None),
+    ('rollover run', [('2026-01-02', 115002, [1, 2, 3, 4, 5]), ('2026-01-01', 115001, [6, 7, 8, 9, 10])], [115001, 115002], None, None),
+    ('serial continues past year end', [('2026-01-01', 114363, [2, 4, 6, 8, 10])], [114363], None, None),
+    ('new year skips 001', [('2026-01-01', 115002, [2, 4, 6, 8, 10])], None, '114362 之後應為 114363 或 115001', None),
+    ('new year issue dated old year', [('2025-12-31', 115001, [2, 4, 6, 8, 10])], None, '114362 之後應為 114363', None),
+    ('gap in serial', [('2026-01-01', 114364, [2, 4, 6, 8, 10])], None, '期數不連號', None),
+    ('number above 39', [('2026-01-01', 115001, [2, 4, 6, 8, 40])], [], '號碼必須介於 1 ~ 39', None),
+    ('number zero', [('2026-01-01', 115001, [0, 4, 6, 8, 10])], [], '號碼必須介於 1 ~ 39', None),
+    ('fractional number', [('2026-01-01', 115001, [2.5, 4, 6, 8, 10])], [], '號碼必須是五個整數', None),
+    ('duplicate numbers', [('2026-01-01', 115001, [2, 4, 4, 8, 10])], [], '五個號碼不可重複', None),
+    ('duplicate issue in batch', [('2026-01-01', 115001, [2, 4, 6, 8, 10]), ('2026-01-01', 115001, [2, 4, 6, 8, 10])], None, '批次內期數重複：115001', None),
+    ('stored issue, same numbers', [('2025-12-31', 114362, [39, 28, 19, 11, 5])], [], None, None),
+    ('stored issue, different numbers', [('2025-12-31', 114362, [5, 11, 19, 28, 38])], [], '114362 已存在且號碼不同', None),
+    ('date not after previous', [('2025-12-31', 114363, [2, 4, 6, 8, 10])], None, '未晚於上一期', None),
+    ('bad date', [('not a date', 115001, [2, 4, 6, 8, 10])], [], '日期無法解析', None),
+    ('long holiday only warns', [('2026-01-09', 115001, [2, 4, 6, 8, 10])], [115001], None, '距上一期 9 天'),
+]
+
+
+@pytest.mark.parametrize('rows, fresh, error, warning', [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_validate_batch(store, rows, fresh, error, warning):
+    report = validate_batch(batch(*rows), store)
+    if error is None:
+        assert report['errors'] == []
+    else:
+        assert any(error in message for message in report['errors']), report['errors']
+    if fresh is not None:
+        assert report['rows']['Issue'].tolist() == fresh
+    if warning is None:
+        assert report['warnings'] == []
+    else:
+        assert any(warning in message for message in report['warnings']), report['warnings']
+
+
+def test_stored_duplicate_is_skipped(store):
+    report = validate_batch(batch(('2025-12-31', 114362, [39, 28, 19, 11, 5]), ('2026-01-01', 115001, [9, 3, 7, 1, 5])), store)
+    assert report['errors'] == [] and report['skipped'] == [114362]
+    assert report['rows'].values.tolist() == [['2026-01-01', 115001, 1, 3, 5, 7, 9]]
+
+
+def test_missing_columns_rejected(store):
+    report = validate_batch(batch(('2026-01-01', 115001, [2, 4, 6, 8, 10])).drop(columns=['N5']), store)
+    assert report['errors'] == ['缺少欄位：N5']
+
+
+def test_sheet_headers_are_accepted(store):
+    frame = batch(('2026-01-01', 115001, [2, 4, 6, 8, 10])).rename(columns={'Issue': 'Issue (期數)', 'N1': 'N1 (號碼1)'})
+    assert validate_batch(frame, store)['rows']['Issue'].tolist() == [115001]
+
+
+def test_issue_range_crosses_roc_year():
+    assert next_issue(114362, '2026-01-01') == 115001
+    assert next_issue(114362, '2025-12-31') == 114363
+    frame = issue_range_frame(114361, 4, '2025-12-30')
+    assert frame['Issue'].tolist() == [114361, 114362, 115001, 115002]
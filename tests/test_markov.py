@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from radar.markov import TransitionIndex, follower_report, ranked_followers, resonance_picks, window_first_follow, window_matrix
+from radar.store import BALLS, DrawStore
+
+
+def synthetic_store(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # 與 539.xlsx 相同，N1..N5 由小到大
+    nums = np.sort(np.argpartition(rng.random((n, BALLS)), 5, axis=1)[:, :5] + 1, axis=1)
+    return DrawStore(np.arange(1, n + 1), np.datetime64('2020-01-01') + np.arange(n), nums)
+
+
+def baseline_followers(store, end, lookback, draw_num):
+    # 原本拖牌實驗室的逐期掃描 (historical_df 為第 [0, end) 期)
+    historical_df = pd.DataFrame(store.nums[:end], columns=['N1', 'N2', 'N3', 'N4', 'N5'])
+    hist_subset = historical_df.tail(lookback).reset_index(drop=True)
+    appearances = 0
+    next_draws = []
+    for i in range(len(hist_subset) - 1):
+        curr_draw = hist_subset.iloc[i][['N1', 'N2', 'N3', 'N4', 'N5']].values
+        if draw_num in curr_draw:
+            appearances += 1
+            next_draws.extend(hist_subset.iloc[i+1][['N1', 'N2', 'N3', 'N4', 'N5']].values)
+    return appearances, pd.Series(next_draws).value_counts()
+
+
+# lookback 小、同次數多，最容易看出排序差異
+@pytest.mark.parametrize('end, lookback', [(60, 12), (120, 30), (200, 50), (40, 200), (300, 100)])
+def test_followers_match_baseline_value_counts(end, lookback):
+    store = synthetic_store(300, seed=end)
+    index = TransitionIndex(store.nums)
+    matrix, lead_counts = window_matrix(index, store.prefix, end, lookback)
+    first = window_first_follow(index, end, lookback)
+    for num in range(1, BALLS + 1):
+        appearances, freq = baseline_followers(store, end, lookback, num)
+        assert int(lead_counts[num - 1]) == appearances
+        expected = [(int(k), int(v)) for k, v in freq.items()]
+        assert ranked_followers(matrix[num - 1], first[num - 1]) == expected, num
+
+
+@pytest.mark.parametrize('end, lookback', [(60, 12), (200, 50)])
+def test_follower_report_matches_baseline(end, lookback):
+    store = synthetic_store(300, seed=end + 1)
+    index = TransitionIndex(store.nums)
+    matrix, lead_counts = window_matrix(index, store.prefix, end, lookback)
+    target_draw = store.draw(end - 1)
+    rows = follower_report(matrix, lead_counts, target_draw, window_first_follow(index, end, lookback))
+    recommendations = []
+    for row, num in zip(rows, [n for n in target_draw if baseline_followers(store, end, lookback, n)[0] > 0]):
+        _, freq = baseline_followers(store, end, lookback, num)
+        assert row['number'] == num
+        assert row['top_3'] == [(int(k), int(v)) for k, v in freq.head(3).items()]
+        assert row['bottom_3'] == [(int(k), int(v)) for k, v in freq.tail(3).items()]
+        assert row['never'] == [n for n in range(1, 40) if n not in freq.index]
+        recommendations.extend(int(k) for k in freq.head(3).keys())
+    buy = sorted(k for k in set(recommendations) if recommendations.count(k) >= 2)
+    assert resonance_picks(rows)['buy'] == buy
+
+
+def test_ties_follow_first_occurrence_not_number():
+    # 1 之後先跟著開出 20 ~ 24，後來才開出 2：同樣 1 次時 20 ~ 24 排在 2 前面
+    nums = np.array([[1, 3, 5, 7, 9], [20, 21, 22, 23, 24], [1, 3, 5, 7, 9], [2, 30, 31, 32, 33]])
+    store = DrawStore(np.arange(1, 5), np.datetime64('2020-01-01') + np.arange(4), nums)
+    index = TransitionIndex(store.nums)
+    matrix, _ = window_matrix(index, store.prefix, 4, 4)
+    first = window_first_follow(index, 4, 4)
+    assert [k for k, _ in ranked_followers(matrix[0], first[0])] == [20, 21, 22, 23, 24, 2, 30, 31, 32, 33]
+    assert [k for k, _ in ranked_followers(matrix[0])] == [2, 20, 21, 22, 23, 24, 30, 31, 32, 33]
+
+
+@pytest.mark.parametrize('split', [1, 15, 16, 17, 33, 150])
+def test_append_matches_rebuild(split):
+    store = synthetic_store(200, seed=split)
+    grown = TransitionIndex(store.nums[:split])
+    grown.append(store.nums[split:])
+    rebuilt = TransitionIndex(store.nums)
+    assert (grown.onehot == rebuilt.onehot).all() and (grown.checkpoints == rebuilt.checkpoints).all()
+    for start, end in [(0, 0), (0, 15), (3, 16), (16, 32), (17, 199), (0, 199)]:
+        assert (grown.transitions(start, end) == rebuilt.transitions(start, end)).all()
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from radar.spatial import batch_predictions, get_predictions, mask_to_numbers, sea_ranges
+from radar.store import BALLS, numbers_to_bits
+
+# get_predictions 回傳的 10 個值 → batch_predictions 的鍵 (死亡之海、最大斷層另外比)
+PICK_INDEX = {
+    'short': 0, 'long': 1, 'consensus': 2, 'sandwich': 4, 'center': 5,
+    'tail': 6, 'worst_10': 8, 'breakout': 9,
+}
+
+
+# 改寫前 app.py 的 get_predictions 原文 (殺牌排除的是 list(set(...))[:10]，不一定是最小的 10 個)
+def baseline_get_predictions(target_draw, gap_limit, allow_repeat, s_long_series, s_short_series, long_thresh, short_thresh):
+    target_draw = sorted(target_draw)
+    extended_draw = [0] + target_draw + [40]
+
+    death_seas = []
+    for i in range(len(extended_draw)-1):
+        start, end = extended_draw[i], extended_draw[i+1]
+        if end - start - 1 >= gap_limit:
+            death_seas.append((start, end))
+
+    short_picks = []
+    for n in target_draw:
+        for c in [n-1, n+1]:
+            if 1 <= c <= 39 and not any(sea_start < c < sea_end for sea_start, sea_end in death_seas):
+                short_picks.append(int(c))
+
+    if allow_repeat: short_picks.extend(target_draw)
+    short_picks = list(set(short_picks))
+
+    sandwiches = [int(target_draw[i]+1) for i in range(len(target_draw)-1) if target_draw[i+1]-target_draw[i]==2]
+
+    max_gap = 0
+    geometric_centers = []
+    for i in range(len(extended_draw)-1):
+        gap = extended_draw[i+1] - extended_draw[i] - 1
+        if gap > max_gap:
+            max_gap = gap
+            center = (extended_draw[i+1] + extended_draw[i]) / 2
+            geometric_centers = [int(np.floor(center)), int(np.ceil(center))] if center % 1 != 0 else [int(center)]
+        elif gap == max_gap and gap > 0:
+            center = (extended_draw[i+1] + extended_draw[i]) / 2
+            geometric_centers.extend([int(np.floor(center)), int(np.ceil(center))] if center % 1 != 0 else [int(center)])
+    geometric_centers = [int(c) for c in geometric_centers if 1 <= c <= 39]
+
+    tails = [n % 10 for n in target_draw]
+    hot_tails = [t for t in set(tails) if tails.count(t) >= 2]
+
+    tail_resonances = []
+    if hot_tails:
+        for t in hot_tails:
+            for n in range(1, 40):
+                if n % 10 == t: tail_resonances.append(n)
+
+    if not allow_repeat:
+        short_picks = [p for p in short_picks if p not in target_draw]
+        sandwiches = [p for p in sandwiches if p not in target_draw]
+        geometric_centers = [p for p in geometric_centers if p not in target_draw]
+        tail_resonances = [p for p in tail_resonances if p not in target_draw]
+
+    long_picks = list(set(geometric_centers + sandwiches + tail_resonances))
+    consensus_picks = sorted(list(set(short_picks).intersection(set(long_picks))))
+
+    worst_10_picks = []
+    breakout_picks = []
+
+    if s_long_series is not None:
+        cold_nums = [p for p in range(1, 40) if any(s < p < e for s,e in death_seas) and p not in target_draw and p not in short_picks[:10] and p not in long_picks[:10]]
+        neutral_nums = [p for p in range(1, 40) if p not in target_draw and p not in short_picks[:10] and p not in long_picks[:10] and p not in cold_nums]
+
+        cold_sorted = sorted(cold_nums, key=lambda x: s_long_series.get(x, 0))
+        neutral_sorted = sorted(neutral_nums, key=lambda x: s_long_series.get(x, 0))
+
+        dead_pool = target_draw if not allow_repeat else []
+        worst_10_pool = dead_pool + cold_sorted + neutral_sorted
+        worst_10_picks = sorted(worst_10_pool[:10])
+
+    if s_long_series is not None and s_short_series is not None:
+        for p in range(1, 40):
+            if s_long_series.get(p, 0) <= long_thresh and s_short_series.get(p, 0) >= short_thresh:
+                if p not in worst_10_picks: breakout_picks.append(p)
+
+    return short_picks, long_picks, consensus_picks, death_seas, sandwiches, geometric_centers, tail_resonances, max_gap, worst_10_picks, breakout_picks
+
+
+def synthetic_draws(n, seed):
+    # 固定種子的 5/39 開獎；次數範圍刻意很窄，讓殺牌排序常常遇到同分
+    rng = np.random.default_rng(seed)
+    draws = np.sort(np.argpartition(rng.random((n, BALLS)), 5, axis=1)[:, :5] + 1, axis=1)
+    long_counts = rng.integers(0, 16, size=(n, BALLS))
+    short_counts = rng.integers(0, 6, size=(n, BALLS))
+    return draws, long_counts, short_counts
+
+
+@pytest.mark.parametrize('allow_repeat', [True, False])
+@pytest.mark.parametrize('gap_limit', [1, 3, 5, 7, 9, 40])
+@pytest.mark.parametrize('with_counts', [True, False])
+def test_batch_predictions_matches_get_predictions(allow_repeat, gap_limit, with_counts):
+    draws, long_counts, short_counts = synthetic_draws(300, seed=gap_limit)
+    long_thresh, short_thresh = 8, 3
+    if not with_counts:
+        long_counts = short_counts = None
+    batch = batch_predictions(draws, gap_limit, allow_repeat, long_counts, short_counts, long_thresh, short_thresh)
+
+    for i, draw in enumerate(draws):
+        expected = get_predictions(
+            draw.tolist(), gap_limit, allow_repeat,
+            None if long_counts is None else long_counts[i],
+            None if short_counts is None else short_counts[i],
+            long_thresh, short_thresh,
+        )
+        for key, index in PICK_INDEX.items():
+            assert mask_to_numbers(batch[key][i]) == expected[index], (i, key)
+        assert sea_ranges(numbers_to_bits(mask_to_numbers(batch['death_sea'][i]))) == expected[3], i
+        assert batch['max_gap'][i] == expected[7], i
+
+
+def test_batch_predictions_per_row_gap_limit():
+    # gap_limit 也可以每期各自一組
+    draws, long_counts, short_counts = synthetic_draws(200, seed=42)
+    gap_limits = np.random.default_rng(7).integers(1, 12, size=len(draws))
+    batch = batch_predictions(draws, gap_limits, False, long_counts, short_counts, 8, 3)
+
+    for i, draw in enumerate(draws):
+        expected = get_predictions(draw.tolist(), int(gap_limits[i]), False, long_counts[i], short_counts[i], 8, 3)
+        for key, index in PICK_INDEX.items():
+            assert mask_to_numbers(batch[key][i]) == expected[index], (i, key)
+
+
+@pytest.mark.parametrize('allow_repeat', [True, False])
+@pytest.mark.parametrize('gap_limit', [3, 5, 7, 9])
+def test_get_predictions_matches_baseline(allow_repeat, gap_limit):
+    # 殺牌與突破號要與改寫前逐位元相同；其他類別比內容 (回傳順序改為由小到大)
+    draws, long_counts, short_counts = synthetic_draws(500, seed=100 + gap_limit)
+    index = np.arange(1, BALLS + 1)
+    for i, draw in enumerate(draws):
+        s_long, s_short = pd.Series(long_counts[i], index=index), pd.Series(short_counts[i], index=index)
+        args = (draw.tolist(), gap_limit, allow_repeat, s_long, s_short, 8, 3)
+        expected = baseline_get_predictions(*args)
+        result = get_predictions(*args)
+        assert result[8] == expected[8], (i, 'worst_10')
+        assert result[9] == expected[9], (i, 'breakout')
+        assert result[2] == expected[2] and result[3] == expected[3] and result[7] == expected[7], i
+        for index_ in (0, 1, 4, 5, 6):
+            assert result[index_] == sorted(expected[index_]), (i, index_)
+
+
+def test_worst_10_keeps_set_order_cut():
+    # 短線 15 個，舊版 list(set(...)) 的前 10 個是 32,36,37,6,38,8,7,15,16,17 (不是最小的 10 個)：
+    # 21、23、30 沒被排除而 32、36、38 被排除，讓這 6 個號碼最冷就看得出差別
+    draw = [7, 16, 22, 31, 37]
+    long_counts = np.full(BALLS, 10)
+    long_counts[np.array([21, 23, 30, 32, 36, 38]) - 1] = 0
+    short_counts = np.zeros(BALLS, dtype=int)
+    index = np.arange(1, BALLS + 1)
+    expected = baseline_get_predictions(draw, 9, True, pd.Series(long_counts, index=index), pd.Series(short_counts, index=index), 8, 3)
+    assert expected[8] == [1, 2, 3, 4, 5, 9, 10, 21, 23, 30]
+    assert get_predictions(draw, 9, True, long_counts, short_counts, 8, 3)[8] == expected[8]
+    batch = batch_predictions(np.array([draw]), 9, True, long_counts[None], short_counts[None], 8, 3)
+    assert mask_to_numbers(batch['worst_10'][0]) == expected[8]
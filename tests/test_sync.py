@@ -0,0 +1,137 @@
+import re
+import threading
+
+import pytest
+
+from radar import prefetch, sync
+
+HEADER = ['Date (開獎日期)', 'Issue (期數)', 'N1 (號碼1)', 'N2 (號碼2)', 'N3 (號碼3)', 'N4 (號碼4)', 'N5 (號碼5)', '備註']
+
+
+def column_index(letters):
+    index = 0
+    for ch in letters:
+        index = index * 26 + ord(ch) - ord('A') + 1
+    return index
+
+
+class FakeWorksheet:
+    """只實作 sync 用到的兩個讀取呼叫；requests 記下每次 batch_get 的範圍。"""
+
+    def __init__(self, rows, on_fetch=None):
+        self.values = [HEADER] + [list(row) for row in rows]
+        self.requests = []
+        self.full_fetches = 0
+        self.on_fetch = on_fetch
+
+    def get_all_values(self):
+        self.full_fetches += 1
+        if self.on_fetch:
+            self.on_fetch()
+        return [list(row) for row in self.values]
+
+    def batch_get(self, ranges):
+        self.requests.append(list(ranges))
+        if self.on_fetch:
+            self.on_fetch()
+        result = []
+        for a1 in ranges:
+            lo, first, hi, last = re.fullmatch(r'([A-Z]+)(\d+):([A-Z]+)(\d*)', a1).groups()
+            rows = self.values[int(first) - 1:int(last) if last else None]
+            block = [row[column_index(lo) - 1:column_index(hi)] for row in rows]
+            # 與 Sheets API 一樣不回傳尾端的空白列
+            while block and not any(block[-1]):
+                block.pop()
+            result.append(block)
+        return result
+
+
+def draw_rows(n, start=113000001):
+    return [[f"2024/01/{i % 28 + 1:02d}", str(start + i), *(str((i + k) % 39 + 1) for k in range(5)), ''] for i in range(n)]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync, 'CACHE_DIR', str(tmp_path))
+    yield tmp_path
+    sync.invalidate()
+
+
+def test_tail_sync_reads_only_new_rows():
+    sheet = FakeWorksheet(draw_rows(50))
+    state, refetched = sync.sync_sheet(sheet, '539')
+    assert refetched and len(state['rows']) == 50 and sheet.full_fetches == 1
+
+    sheet.values += draw_rows(2, start=113000051)
+    state, refetched = sync.sync_sheet(sheet, '539')
+    assert not refetched and len(state['rows']) == 52
+    # 非檢查輪次只讀重疊的 3 列與之後的新列，不讀回整段歷史
+    assert sheet.requests[-1] == [f"A{50 - sync.SYNC_OVERLAP + 2}:H"]
+    assert state['rows'] == sheet.values[1:]
+
+
+def test_overlap_edit_refetches_every_time():
+    sheet = FakeWorksheet(draw_rows(50))
+    sync.sync_sheet(sheet, '539')
+    sync.sync_sheet(sheet, '539')
+    sheet.values[-2][4] = '38'
+    state, refetched = sync.sync_sheet(sheet, '539')
+    assert refetched and state['rows'] == sheet.values[1:]
+
+
+def test_history_edit_caught_on_verify_cadence(monkeypatch):
+    monkeypatch.setattr(sync, 'SYNC_VERIFY_EVERY', 3)
+    sheet = FakeWorksheet(draw_rows(50))
+    sync.sync_sheet(sheet, '539')                       # 第 0 次：整張抓
+    sheet.values[5][3] = '39'
+    assert not sync.sync_sheet(sheet, '539')[1]         # 第 1、2 次只看重疊區
+    assert not sync.sync_sheet(sheet, '539')[1]
+    state, refetched = sync.sync_sheet(sheet, '539')    # 第 3 次連同期數 / 號碼欄整段核對
+    assert refetched and state['rows'] == sheet.values[1:]
+    assert sheet.requests[-1] == [f"A{50 - sync.SYNC_OVERLAP + 2}:H", "B2:G51"]
+
+
+def test_first_sync_after_restart_verifies_saved_state():
+    sheet = FakeWorksheet(draw_rows(50))
+    sync.sync_sheet(sheet, '539')
+    # 行程重啟：記憶體裡的狀態沒了，從磁碟載入後第一次同步就整段核對
+    sync._states.clear()
+    sync._sync_counts.clear()
+    sheet.values[10][2] = '1'
+    assert sync.sync_sheet(sheet, '539')[1]
+
+
+def test_same_sheet_opened_once(monkeypatch):
+    opened = []
+
+    class Client:
+        def open_by_url(self, url):
+            opened.append(url)
+            threading.Event().wait(0.05)
+            return self
+
+        def worksheet(self, name):
+            return FakeWorksheet([])
+
+    monkeypatch.setattr(sync, 'get_client', lambda creds_json: Client())
+    monkeypatch.setattr(sync, '_worksheets', {})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sync.get_worksheet('{}', 'url', '539'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(opened) == 1 and all(ws is results[0] for ws in results)
+
+
+def test_two_games_sync_concurrently():
+    # 背景預載同時同步兩個彩種：兩邊的網路往返必須能重疊 (任一邊佔著鎖不放，柵欄就會逾時)
+    barrier = threading.Barrier(2, timeout=5)
+    sheets = {game: FakeWorksheet(draw_rows(30), on_fetch=barrier.wait) for game in ('539', '天天樂')}
+    try:
+        for _ in range(2):  # 第一次整張抓、第二次增量
+            futures = [prefetch.submit(('test-sync', game, _), sync.sync_sheet, sheet, game) for game, sheet in sheets.items()]
+            assert all(len(future.result(timeout=10)[0]['rows']) == 30 for future in futures)
+    finally:
+        prefetch.forget(lambda key: key[0] == 'test-sync')
+    assert all(sheet.full_fetches == 1 and len(sheet.requests) == 1 for sheet in sheets.values())
@@ -0,0 +1,116 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from radar import tickets
+from radar.backtest import backtest_batch
+from radar.store import BALLS, DrawStore, bits_to_numbers, numbers_to_bits, popcount
+from radar.tickets import TICKET_COUNT, rank_tickets, score_tickets, ticket_backtest, ticket_table, top_tickets
+
+PARAMS = {
+    'death_sea_gap': 7, 'include_repeat': False,
+    'breakout_long_period': 60, 'breakout_long_thresh': 8,
+    'breakout_short_period': 20, 'breakout_short_thresh': 3,
+}
+
+
+def synthetic_store(n, seed=0):
+    rng = np.random.default_rng(seed)
+    nums = np.argpartition(rng.random((n, BALLS)), 5, axis=1)[:, :5] + 1
+    return DrawStore(np.arange(1, n + 1), np.datetime64('2020-01-01') + np.arange(n), nums)
+
+
+def seeded_inputs(seed):
+    rng = np.random.default_rng(seed)
+    picks = {field: numbers_to_bits(rng.choice(np.arange(1, BALLS + 1), 8, replace=False).tolist()) for field in tickets.PICK_FEATURES}
+    return picks, rng.integers(0, 20, BALLS), rng.integers(0, 8, BALLS)
+
+
+@pytest.fixture(scope='module')
+def table(tmp_path_factory):
+    return ticket_table(str(tmp_path_factory.mktemp('cache')))
+
+
+def test_table_lists_every_ticket_once(table):
+    nums, masks = table['nums'], table['masks']
+    assert isinstance(nums, np.memmap) and isinstance(masks, np.memmap)
+    assert nums.shape == (TICKET_COUNT, 5) == (575757, 5) and masks.shape == (575757,)
+    # 字典序：第一注 1~5、最後一注 35~39，每注號碼由小到大
+    assert nums[0].tolist() == [1, 2, 3, 4, 5] and nums[-1].tolist() == [35, 36, 37, 38, 39]
+    assert (np.diff(nums.astype(np.int16), axis=1) > 0).all()
+    assert len(np.unique(masks)) == TICKET_COUNT and (popcount(masks) == 5).all()
+    assert bits_to_numbers(int(masks[123456])) == nums[123456].tolist()
+
+
+def test_table_is_shared_and_rebuilt_when_truncated(tmp_path, monkeypatch):
+    monkeypatch.setattr(tickets, '_tables', {})
+    first = ticket_table(str(tmp_path))
+    assert ticket_table(str(tmp_path)) is first
+    # 檔案不完整 (例如舊版本或被截斷) 時重新列舉
+    monkeypatch.setattr(tickets, '_tables', {})
+    tickets._save_npy(tickets._table_paths(str(tmp_path))['masks'], np.zeros(10, dtype=np.uint64))
+    assert len(ticket_table(str(tmp_path))['masks']) == TICKET_COUNT
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_killed_numbers_score_minus_inf(table, seed):
+    picks, long_counts, short_counts = seeded_inputs(seed)
+    kill = numbers_to_bits(np.random.default_rng(seed + 100).choice(np.arange(1, BALLS + 1), 10, replace=False).tolist())
+    score = score_tickets(table, picks, long_counts, short_counts, 60, 20, kill)
+    touches_kill = (np.asarray(table['masks']) & np.uint64(kill)) != 0
+    assert np.isneginf(score[touches_kill]).all() and np.isfinite(score[~touches_kill]).all()
+    for row in rank_tickets(table, picks, long_counts, short_counts, 60, 20, k=20, kill=kill):
+        assert not set(row['numbers']) & set(bits_to_numbers(kill))
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_top_k_matches_full_sort(table, seed):
+    picks, long_counts, short_counts = seeded_inputs(seed)
+    score = score_tickets(table, picks, long_counts, short_counts, 60, 20, kill=numbers_to_bits([1, 2, 3]))
+    # 分數由高到低、同分取字典序較前 (位置較小) 的注
+    expected = np.lexsort((np.arange(len(score)), -score))
+    for k in (1, 10, 50):
+        assert (top_tickets(score, k) == expected[:k]).all()
+    rows = rank_tickets(table, picks, long_counts, short_counts, 60, 20, k=10, kill=numbers_to_bits([1, 2, 3]))
+    assert rows == rank_tickets(table, picks, long_counts, short_counts, 60, 20, k=10, kill=numbers_to_bits([1, 2, 3]))
+    assert [row['numbers'] for row in rows] == [table['nums'][i].tolist() for i in expected[:10]]
+
+
+def test_ties_go_to_lexicographic_order(table):
+    # 權重全為 0 時每注同分，前 k 注就是字典序最前的 k 注；殺掉 1 之後從 2~6 開始
+    weights = dict.fromkeys(tickets.TICKET_FEATURES, 0.0)
+    picks, long_counts, short_counts = seeded_inputs(0)
+    score = score_tickets(table, picks, long_counts, short_counts, 60, 20, weights=weights)
+    assert top_tickets(score, 3).tolist() == [0, 1, 2]
+    rows = rank_tickets(table, picks, long_counts, short_counts, 60, 20, k=2, kill=numbers_to_bits([1]), weights=weights)
+    assert [row['numbers'] for row in rows] == [list(c) for c in list(combinations(range(2, BALLS + 1), 5))[:2]]
+
+
+def test_top_k_skips_excluded_tickets():
+    score = np.array([1.0, -np.inf, 3.0, -np.inf, 3.0])
+    assert top_tickets(score, 10).tolist() == [2, 4, 0]
+    assert top_tickets(np.full(4, -np.inf), 3).tolist() == []
+
+
+def test_ticket_backtest_matches_ranked_tickets(table):
+    store = synthetic_store(120, seed=7)
+    result = ticket_backtest(store, PARAMS, 90, 100, k=5, table=table)
+    again = ticket_backtest(store, PARAMS, 90, 100, k=5, table=table)
+    assert (result['best_hits'] == again['best_hits']).all() and (result['distribution'] == again['distribution']).all()
+
+    pos, preds, _ = backtest_batch(store, 7, False, 60, 8, 20, 3, start=90, end=100)
+    assert (result['positions'] == pos).all() and (result['distribution'].sum(axis=1) == 5).all()
+    for row, p in enumerate(pos):
+        picks = {
+            'consensus': int(preds['short'][row] & preds['long'][row]), 'short': int(preds['short'][row]),
+            'long': int(preds['long'][row]), 'breakout': int(preds['breakout'][row]),
+        }
+        ranked = rank_tickets(
+            table, picks, store.window_counts(p + 1, 60), store.window_counts(p + 1, 20), 60, 20,
+            k=5, kill=int(preds['worst_10'][row]),
+        )
+        drawn = set(store.draw(p + 1))
+        hits = [len(drawn & set(r['numbers'])) for r in ranked]
+        assert result['best_hits'][row] == max(hits)
+        assert result['distribution'][row].tolist() == np.bincount(hits, minlength=6).tolist()
@@ -0,0 +1,91 @@
+import itertools
+import json
+import os
+
+import numpy as np
+
+from radar import walkforward
+from radar.backtest import PICK_FIELDS, backtest_batch, hit_counts
+from radar.btcache import HIT_FIELDS
+from radar.store import DrawStore
+from radar.walkforward import COLUMNS, walk_forward_run
+
+PARAMS = {
+    'death_sea_gap': 7, 'include_repeat': False,
+    'breakout_long_period': 60, 'breakout_long_thresh': 8,
+    'breakout_short_period': 20, 'breakout_short_thresh': 3,
+}
+
+
+def synthetic_store(n, seed=0):
+    rng = np.random.default_rng(seed)
+    nums = np.argpartition(rng.random((n, 39)), 5, axis=1)[:, :5] + 1
+    return DrawStore(np.arange(1, n + 1), np.datetime64('2020-01-01') + np.arange(n), nums)
+
+
+def test_render_creates_nothing(tmp_path):
+    store = synthetic_store(300)
+    for start in range(20):
+        run = walk_forward_run(store, '539', PARAMS, start, 250, cache_dir=str(tmp_path))
+        assert run.done == 0 and run.summary()['draws'] == 0
+    assert not os.path.exists(tmp_path / 'walkforward')
+
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    store = synthetic_store(500)
+    run = walk_forward_run(store, '539', PARAMS, 20, 450, cache_dir=str(tmp_path / 'paused'))
+    list(itertools.islice(run.stream(store, PARAMS, chunk=64), 3))
+    assert run.done == 192
+
+    # 每個欄位一個 .npy，meta.json 記錄斷點
+    assert sorted(os.listdir(run.directory)) == sorted([f"{name}.npy" for name in COLUMNS] + ['meta.json'])
+    with open(run.meta_path, encoding='utf-8') as fh:
+        assert json.load(fh) == {'start': 20, 'end': 450, 'done': 192}
+
+    # 換頁 / 重新整理後用同一組參數與區間拿到同一份結果檔，從斷點續跑
+    resumed = walk_forward_run(store, '539', PARAMS, 20, 450, cache_dir=str(tmp_path / 'paused'))
+    assert resumed.directory == run.directory and resumed.done == 192
+    for _ in resumed.stream(store, PARAMS, chunk=64):
+        pass
+    assert resumed.finished and resumed.done == 430
+
+    straight = walk_forward_run(store, '539', PARAMS, 20, 450, cache_dir=str(tmp_path / 'straight'))
+    for _ in straight.stream(store, PARAMS, chunk=1000):
+        pass
+    a, b = resumed.columns(), straight.columns()
+    assert all((a[name] == b[name]).all() for name in COLUMNS)
+    assert resumed.summary() == straight.summary()
+
+    # 與一次算完的 backtest_batch 相同
+    pos, preds, next_hit = backtest_batch(store, 7, False, 60, 8, 20, 3, start=20, end=450)
+    hits = hit_counts(preds, next_hit)
+    assert (a['pos'] == pos).all() and (a['issue'] == store.issues[pos + 1]).all()
+    for field in PICK_FIELDS:
+        assert (a[field] == preds[field]).all(), field
+    for field in HIT_FIELDS:
+        assert (a[f"{field}_cum"] == np.cumsum(hits[field])).all(), field
+
+
+def test_evict_ignores_runs_without_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(walkforward, 'WALK_RUNS', 2)
+    store = synthetic_store(300)
+    cache_dir = str(tmp_path)
+    paused = walk_forward_run(store, '539', PARAMS, 0, 250, cache_dir=cache_dir)
+    next(paused.stream(store, PARAMS, chunk=50))
+
+    # 只開過頁面 (沒有 stream) 的區間不佔名額，也不會把暫停中的回測擠掉
+    for start in range(1, 10):
+        walk_forward_run(store, '539', PARAMS, start, 250, cache_dir=cache_dir)
+    # 剛建立、還沒寫入任何列的結果檔也不會被刪
+    empty = walk_forward_run(store, '539', PARAMS, 100, 250, cache_dir=cache_dir)
+    empty._create()
+    other = walk_forward_run(store, '539', PARAMS, 50, 250, cache_dir=cache_dir)
+    next(other.stream(store, PARAMS, chunk=50))
+    assert os.path.exists(paused.directory) and os.path.exists(empty.directory)
+
+    # 有進度的超過 WALK_RUNS 份時才淘汰最久沒用的
+    os.utime(paused.directory, (1, 1))
+    third = walk_forward_run(store, '539', PARAMS, 60, 250, cache_dir=cache_dir)
+    next(third.stream(store, PARAMS, chunk=50))
+    assert not os.path.exists(paused.directory)
+    assert os.path.exists(other.directory) and os.path.exists(third.directory) and os.path.exists(empty.directory)
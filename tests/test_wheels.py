@@ -0,0 +1,79 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from radar import wheels
+from radar.store import BALLS, DrawStore, bits_to_numbers, numbers_to_bits
+from radar.wheels import check_wheel, coverage_matrix, wheel_backtest, wheel_design, wheel_payout, wheel_tickets
+
+PARAMS = {
+    'death_sea_gap': 7, 'include_repeat': False,
+    'breakout_long_period': 60, 'breakout_long_thresh': 8,
+    'breakout_short_period': 20, 'breakout_short_thresh': 3,
+}
+
+# 小號碼池的所有 (v, k, m)，外加兩組較大的池
+SMALL_CASES = [(v, k, m) for v in range(5, 10) for m in range(1, 6) for k in range(1, m + 1)]
+LARGE_CASES = [(12, 3, 5), (13, 2, 4)]
+
+
+def synthetic_store(n, seed=0):
+    rng = np.random.default_rng(seed)
+    nums = np.argpartition(rng.random((n, BALLS)), 5, axis=1)[:, :5] + 1
+    return DrawStore(np.arange(1, n + 1), np.datetime64('2020-01-01') + np.arange(n), nums)
+
+
+def assert_covers(pool, tickets, k, m):
+    # 暴力檢查：池中任 m 顆開出，至少一注中 k 顆
+    assert all(len(ticket) == 5 and len(set(ticket)) == 5 and set(ticket) <= set(pool) for ticket in tickets)
+    for drawn in combinations(pool, m):
+        assert max(len(set(drawn) & set(ticket)) for ticket in tickets) >= k, drawn
+
+
+@pytest.mark.parametrize('v, k, m', SMALL_CASES + LARGE_CASES)
+def test_every_m_subset_hits_a_ticket(tmp_path, v, k, m):
+    pool = sorted(np.random.default_rng(v * 100 + k * 10 + m).choice(np.arange(1, BALLS + 1), v, replace=False).tolist())
+    wheel = wheel_tickets(pool, k, m, budget=0.05, cache_dir=str(tmp_path))
+    assert wheel['status'] == 'solved'
+    assert_covers(pool, wheel['tickets'], k, m)
+    assert [bits_to_numbers(mask) for mask in wheel['masks']] == wheel['tickets']
+
+
+def test_cached_and_improved_designs_still_cover(tmp_path, monkeypatch):
+    pool = [2, 5, 11, 17, 23, 29, 31, 36, 38, 39]
+    first = wheel_tickets(pool, 3, 4, budget=0.05, cache_dir=str(tmp_path))
+    # 記憶體快取清掉後從磁碟讀回同一份設計
+    monkeypatch.setattr(wheels, '_designs', {})
+    cached = wheel_tickets(pool, 3, 4, budget=0.05, cache_dir=str(tmp_path))
+    assert cached['status'] == 'hit' and cached['tickets'] == first['tickets']
+    improved = wheel_tickets(pool, 3, 4, budget=0.2, improve=True, cache_dir=str(tmp_path))
+    assert improved['status'] == 'improved' and len(improved['tickets']) <= len(first['tickets'])
+    assert_covers(pool, improved['tickets'], 3, 4)
+
+
+def test_design_matches_coverage_matrix(tmp_path):
+    tickets, targets, cover = coverage_matrix(8, 2, 3)
+    assert len(tickets) == 56 and len(targets) == 56
+    design = wheel_design(8, 2, 3, budget=0.05, cache_dir=str(tmp_path))
+    chosen = np.searchsorted(tickets, design['tickets'])
+    assert (tickets[chosen] == design['tickets']).all() and cover[chosen].any(axis=0).all()
+
+
+@pytest.mark.parametrize('v, k, m', [(4, 1, 1), (16, 2, 3), (8, 0, 3), (8, 4, 3), (8, 3, 6)])
+def test_check_wheel_rejects(v, k, m):
+    with pytest.raises(ValueError):
+        check_wheel(v, k, m)
+
+
+def test_backtest_guarantee_is_met(tmp_path):
+    store = synthetic_store(200, seed=3)
+    result = wheel_backtest(store, PARAMS, ('consensus', 'hot'), 2, 3, 100, 160, budget=0.05, cache_dir=str(tmp_path))
+    summary = result['summary']
+    assert summary['played'] > 0
+    assert summary['guarantee_met'] == summary['guaranteed']
+    for row in result['rows']:
+        if row['tickets']:
+            wheel = wheel_tickets(row['pool'], 2, 3, cache_dir=str(tmp_path))
+            hits, payout = wheel_payout(wheel['masks'], numbers_to_bits(store.draw(row['position'] + 1)))
+            assert row['best_hits'] == int(hits.max()) and row['payout'] == payout